@@ -83,8 +83,18 @@ class BaseAgent(ABC):
         except Exception as e:
             raise AgentException(f"工具 '{tool_name}' 执行失败: {str(e)}")
     
-    async def think(self, prompt: str, context: Dict = None) -> str:
-        """调用LLM进行思考"""
+    async def think(self, prompt: str, context: Dict = None,
+                    include_history: bool = True, use_cache: bool = True) -> str:
+        """
+        调用LLM进行思考
+        
+        Args:
+            prompt: 任务提示词
+            context: 上下文信息
+            include_history: 是否附加最近的历史记录；提示词自包含时关闭，
+                             使相同输入得到相同提示词，从而命中响应缓存
+            use_cache: 是否使用 LLM 响应缓存
+        """
         try:
             # 构建完整的提示词
             full_prompt = prompt
@@ -95,13 +105,13 @@ class BaseAgent(ABC):
                 full_prompt = f"上下文信息:\n{context_str}\n\n任务:\n{prompt}"
             
             # 添加历史记录
-            if self.history:
+            if include_history and self.history:
                 history_str = "\n".join(self.history[-10:])  # 只保留最近10条
                 full_prompt += f"\n\n历史记录:\n{history_str}"
             
             # 调用 HelloAgent LLM
             response = await asyncio.wait_for(
-                self.llm.ainvoke(full_prompt),
+                self.llm.ainvoke(full_prompt, use_cache=use_cache),
                 timeout=self.timeout
             )
             
@@ -13,6 +13,9 @@ from core.database import db_manager
 from core.vector_store import vector_store_manager
 from core.exceptions import AgentException
 
+# 风格参考检索最多使用的段落数
+STYLE_QUERY_PARAGRAPHS = 5
+
 class CoachAgent(BaseAgent):
     """写作助教智能体"""
     
@@ -316,25 +319,38 @@ class CoachAgent(BaseAgent):
             "language": "english"
         })
     
-    async def _get_style_references(self, user_id: str, content: str) -> List[Dict[str, Any]]:
-        """获取风格参考"""
+    async def _get_style_references(self, user_id: str, content: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """获取风格参考
+        
+        多段落文本按段落分别检索（一次 hybrid_search_many 批量完成），
+        避免整篇文本的单个向量被混合主题稀释；各段命中的论文按最高分合并去重。
+        """
         try:
+            paragraphs = [p.strip() for p in content.split("\n\n") if p.strip()][:STYLE_QUERY_PARAGRAPHS]
+            
             # 搜索用户库中的相关论文
-            search_results = await vector_store_manager.hybrid_search(
-                query=content,
+            search_results = await vector_store_manager.hybrid_search_many(
+                queries=paragraphs or [content],
                 user_id=user_id,
-                top_k=3,
+                top_k=limit,
                 include_l2=True,
-                include_l1=False
+                include_l1=False,
+                payload_fields=["title", "abstract"]
             )
             
+            best: Dict[str, Dict[str, Any]] = {}
+            for result in (result for results in search_results for result in results):
+                key = str(result["payload"].get("paper_id") or result["id"])
+                if key not in best or result["fused_score"] > best[key]["fused_score"]:
+                    best[key] = result
+            
             references = []
-            for result in search_results:
+            for result in sorted(best.values(), key=lambda r: r["fused_score"], reverse=True)[:limit]:
                 payload = result["payload"]
                 references.append({
                     "title": payload.get("title", ""),
-                    "abstract": payload.get("abstract", "")[:200],
-                    "similarity": result["score"]
+                    "abstract": (payload.get("abstract") or "")[:200],
+                    "similarity": result["vector_score"]
                 })
             
             return references
@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime
 import json
 import logging
+import uuid
 from enum import Enum
 
 from agents.base import BaseAgent
@@ -17,6 +18,7 @@ from agents.coach import CoachAgent
 from agents.validator import ValidatorAgent
 from core.config import get_config
 from core.exceptions import AgentException, TimeoutException
+from core.state_backend import TASK_EVENTS_CHANNEL, WORKER_ID, get_state_backend
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,14 @@ class TaskStatus(Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+FINISHED_STATUSES = (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED)
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
 class AgentController:
     """智能体控制器"""
     
@@ -50,10 +60,9 @@ class AgentController:
             "validator": ValidatorAgent()
         }
         
-        # 任务管理
-        self.active_tasks = {}
-        self.task_history = []
-        self.task_queue = asyncio.Queue()
+        # 任务管理：任务状态和待执行队列保存在共享状态后端，任何 worker 都可以取出执行；
+        # 本进程只保留自己提交或正在执行的任务对象（含回调等不可序列化的字段）
+        self.local_tasks: Dict[str, Dict[str, Any]] = {}
         
         # 并发控制
         self.semaphore = asyncio.Semaphore(self.config.concurrent_agents)
@@ -63,6 +72,7 @@ class AgentController:
             "task_started": [],
             "task_completed": [],
             "task_failed": [],
+            "task_cancelled": [],
             "agent_status_changed": []
         }
     
@@ -78,7 +88,7 @@ class AgentController:
     async def submit_task(self, task_type: TaskType, input_data: Dict[str, Any], 
                          priority: int = 0, callback: Callable = None) -> str:
         """提交任务"""
-        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.active_tasks)}"
+        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         task = {
             "id": task_id,
@@ -95,66 +105,185 @@ class AgentController:
             "agent_results": {}
         }
         
-        self.active_tasks[task_id] = task
-        await self.task_queue.put((priority, task))
+        self.local_tasks[task_id] = task
+        backend = get_state_backend()
+        await backend.save_task(self._task_record(task))
+        await backend.enqueue_task(task_id, priority)
         
         logger.info(f"任务已提交: {task_id}, 类型: {task_type.value}")
         return task_id
     
-    async def execute_task(self, task_id: str) -> Dict[str, Any]:
-        """执行单个任务"""
-        if task_id not in self.active_tasks:
+    def _task_record(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """任务对象 → 可序列化的共享状态记录"""
+        record = {
+            "id": task["id"],
+            "type": task["type"].value,
+            "status": task["status"].value,
+            "priority": task["priority"],
+            "input_data": task["input_data"],
+            "created_at": _isoformat(task["created_at"]),
+            "started_at": _isoformat(task["started_at"]),
+            "completed_at": _isoformat(task["completed_at"]),
+            "result": task["result"],
+            "error": task["error"],
+            "worker": WORKER_ID
+        }
+        # 结果中可能含有 datetime 等对象，统一转换为 JSON 可表示的值
+        return json.loads(json.dumps(record, ensure_ascii=False, default=str))
+    
+    def _task_from_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """共享状态记录 → 任务对象（用于执行其他 worker 提交的任务）"""
+        return {
+            "id": record["id"],
+            "type": TaskType(record["type"]),
+            "input_data": record["input_data"],
+            "status": TaskStatus(record["status"]),
+            "priority": record["priority"],
+            "callback": None,
+            "created_at": _parse_datetime(record["created_at"]),
+            "started_at": _parse_datetime(record["started_at"]),
+            "completed_at": _parse_datetime(record["completed_at"]),
+            "result": record["result"],
+            "error": record["error"],
+            "agent_results": {}
+        }
+    
+    @staticmethod
+    def _status_view(record: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": record["id"],
+            "type": record["type"],
+            "status": record["status"],
+            "created_at": record["created_at"],
+            "started_at": record["started_at"],
+            "completed_at": record["completed_at"],
+            "priority": record["priority"]
+        }
+    
+    def _finished_result(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """已结束任务的结果；失败或取消时抛出异常"""
+        if record["status"] == TaskStatus.COMPLETED.value:
+            return record["result"]
+        if record["status"] == TaskStatus.CANCELLED.value:
+            raise AgentException(f"任务已取消: {record['id']}")
+        raise AgentException(f"任务执行失败: {record['error']}")
+    
+    async def wait_for_task(self, task_id: str, timeout: float = None) -> Dict[str, Any]:
+        """等待任务（可能由其他 worker 执行）结束并返回结果"""
+        timeout = timeout or self.config.agent_timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        backend = get_state_backend()
+        # 先订阅再读取状态，读取之后发生的结束事件不会漏掉
+        async with backend.subscribe(TASK_EVENTS_CHANNEL) as events:
+            while True:
+                record = await backend.get_task(task_id)
+                if record is None:
+                    raise AgentException(f"任务不存在: {task_id}")
+                if TaskStatus(record["status"]) in FINISHED_STATUSES:
+                    return self._finished_result(record)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TimeoutException(f"等待任务超时: {task_id}")
+                # 事件只用于唤醒，定期兜底重新读取状态
+                await events.get(timeout=min(remaining, 5.0))
+    
+    async def execute_task(self, task_id: str, wait: bool = True) -> Optional[Dict[str, Any]]:
+        """执行单个任务
+        
+        执行前先在共享状态后端认领任务；任务已被其他调用方（本进程的任务处理器或其他 worker）
+        认领时，等待其结束并返回同一份结果，而不是重复执行。wait 为 False 时（任务处理器）
+        不等待，任务已被认领或已结束时直接返回 None。执行期间定期续期认领（心跳）。
+        """
+        backend = get_state_backend()
+        record = await backend.get_task(task_id)
+        if record is not None and TaskStatus(record["status"]) not in FINISHED_STATUSES:
+            if not await backend.claim_task(task_id):
+                return await self.wait_for_task(task_id) if wait else None
+            # 归档时认领标记已删除，认领成功后再读取一次，确认任务没有在读取和认领之间结束
+            record = await backend.get_task(task_id)
+        if record is None:
             raise AgentException(f"任务不存在: {task_id}")
+        if TaskStatus(record["status"]) in FINISHED_STATUSES:
+            # 以共享状态为准，本地任务对象可能已过时（例如已被其他 worker 取消）
+            self.local_tasks.pop(task_id, None)
+            return self._finished_result(record) if wait else None
         
-        task = self.active_tasks[task_id]
+        task = self.local_tasks.get(task_id) or self._task_from_record(record)
+        self.local_tasks[task_id] = task
         
-        async with self.semaphore:  # 并发控制
+        heartbeat = asyncio.create_task(self._heartbeat(task_id))
+        try:
+            async with self.semaphore:  # 并发控制
+                return await self._run_task(task)
+        finally:
+            heartbeat.cancel()
+    
+    async def _heartbeat(self, task_id: str):
+        """执行期间按认领过期时间的 1/3 周期续期认领，worker 退出后认领自然过期"""
+        backend = get_state_backend()
+        while True:
+            await asyncio.sleep(self.config.task_claim_ttl / 3)
             try:
-                task["status"] = TaskStatus.RUNNING
-                task["started_at"] = datetime.now()
-                
-                await self._trigger_event("task_started", task)
-                
-                # 根据任务类型执行相应的逻辑
-                if task["type"] == TaskType.PAPER_HUNTING:
-                    result = await self._execute_paper_hunting(task)
-                elif task["type"] == TaskType.PAPER_ANALYSIS:
-                    result = await self._execute_paper_analysis(task)
-                elif task["type"] == TaskType.WRITING_ASSISTANCE:
-                    result = await self._execute_writing_assistance(task)
-                elif task["type"] == TaskType.CITATION_VALIDATION:
-                    result = await self._execute_citation_validation(task)
-                elif task["type"] == TaskType.FULL_WORKFLOW:
-                    result = await self._execute_full_workflow(task)
-                else:
-                    raise AgentException(f"不支持的任务类型: {task['type']}")
-                
-                task["status"] = TaskStatus.COMPLETED
-                task["completed_at"] = datetime.now()
-                task["result"] = result
-                
-                await self._trigger_event("task_completed", task)
-                
-                # 执行回调
-                if task["callback"]:
-                    await task["callback"](task)
-                
-                return result
-                
+                if not await backend.refresh_claim(task_id):
+                    logger.warning(f"任务认领已过期，可能已被其他 worker 回收: {task_id}")
+                    return
             except Exception as e:
-                task["status"] = TaskStatus.FAILED
-                task["completed_at"] = datetime.now()
-                task["error"] = str(e)
-                
-                await self._trigger_event("task_failed", task)
-                
-                logger.error(f"任务执行失败 {task_id}: {str(e)}")
-                raise AgentException(f"任务执行失败: {str(e)}")
+                logger.warning(f"任务心跳续期失败 {task_id}: {str(e)}")
+    
+    async def _run_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """执行已认领的任务，保存每次状态变化，结束后移入历史记录"""
+        backend = get_state_backend()
+        task_id = task["id"]
+        try:
+            task["status"] = TaskStatus.RUNNING
+            task["started_at"] = datetime.now()
+            await backend.save_task(self._task_record(task))
+            
+            await self._trigger_event("task_started", task)
+            
+            # 根据任务类型执行相应的逻辑
+            if task["type"] == TaskType.PAPER_HUNTING:
+                result = await self._execute_paper_hunting(task)
+            elif task["type"] == TaskType.PAPER_ANALYSIS:
+                result = await self._execute_paper_analysis(task)
+            elif task["type"] == TaskType.WRITING_ASSISTANCE:
+                result = await self._execute_writing_assistance(task)
+            elif task["type"] == TaskType.CITATION_VALIDATION:
+                result = await self._execute_citation_validation(task)
+            elif task["type"] == TaskType.FULL_WORKFLOW:
+                result = await self._execute_full_workflow(task)
+            else:
+                raise AgentException(f"不支持的任务类型: {task['type']}")
+            
+            task["status"] = TaskStatus.COMPLETED
+            task["completed_at"] = datetime.now()
+            task["result"] = result
+            await backend.save_task(self._task_record(task))
+            
+            await self._trigger_event("task_completed", task)
+            
+            # 执行回调
+            if task["callback"]:
+                await task["callback"](task)
+            
+            return result
+        
+        except Exception as e:
+            task["status"] = TaskStatus.FAILED
+            task["completed_at"] = datetime.now()
+            task["error"] = str(e)
+            await backend.save_task(self._task_record(task))
+            
+            await self._trigger_event("task_failed", task)
             
-            finally:
-                # 移动到历史记录
-                self.task_history.append(task.copy())
-                del self.active_tasks[task_id]
+            logger.error(f"任务执行失败 {task_id}: {str(e)}")
+            raise AgentException(f"任务执行失败: {str(e)}")
+        
+        finally:
+            # 移动到历史记录
+            await backend.archive_task(self._task_record(task))
+            self.local_tasks.pop(task_id, None)
     
     async def _execute_paper_hunting(self, task: Dict) -> Dict[str, Any]:
         """执行论文抓取任务"""
@@ -246,19 +375,22 @@ class AgentController:
             
             # Stage 2: 论文分析
             self._add_to_history("开始论文分析阶段")
-            for paper in downloaded_papers:
-                if paper.get("db_id"):
-                    analysis_input = {
-                        "paper_id": paper["db_id"],
-                        "user_id": user_id,
-                        "analysis_type": "full"
-                    }
-                    
-                    try:
-                        analysis_result = await self.agents["miner"].run(analysis_input)
-                        workflow_result["analysis_reports"].append(analysis_result)
-                    except Exception as e:
-                        self._add_to_history(f"论文分析失败 {paper.get('title', 'Unknown')}: {str(e)}")
+            # 所有待分析论文的相关论文一次批量检索，避免每篇论文单独检索
+            papers_to_analyze = [paper for paper in downloaded_papers if paper.get("db_id")]
+            related = await self.agents["miner"].find_related_papers_many(papers_to_analyze, user_id)
+            for paper, related_papers in zip(papers_to_analyze, related):
+                analysis_input = {
+                    "paper_id": paper["db_id"],
+                    "user_id": user_id,
+                    "analysis_type": "full",
+                    "related_papers": related_papers
+                }
+                
+                try:
+                    analysis_result = await self.agents["miner"].run(analysis_input)
+                    workflow_result["analysis_reports"].append(analysis_result)
+                except Exception as e:
+                    self._add_to_history(f"论文分析失败 {paper.get('title', 'Unknown')}: {str(e)}")
             
             # Stage 3: 引用校验（可选）
             if input_data.get("validate_citations", False):
@@ -284,7 +416,7 @@ class AgentController:
                         self._add_to_history(f"引用校验失败 {paper.get('title', 'Unknown')}: {str(e)}")
             
             self._add_to_history("完整工作流执行完成")
-            
+        
         except Exception as e:
             self._add_to_history(f"工作流执行失败: {str(e)}")
             raise
@@ -292,65 +424,117 @@ class AgentController:
         return workflow_result
     
     async def start_task_processor(self):
-        """启动任务处理器"""
+        """启动任务处理器
+        
+        从共享任务队列取任务执行（任务可能由其他 worker 提交），本进程有空闲并发名额时才取，
+        避免把其他 worker 能执行的任务压在本地；每隔认领过期时间的 1/3 回收一次无主任务。
+        """
         logger.info("启动任务处理器...")
         
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.config.concurrent_agents)
+        reap_interval = self.config.task_claim_ttl / 3
+        next_reap = loop.time()
         while True:
             try:
-                # 获取任务（按优先级排序）
-                priority, task = await self.task_queue.get()
+                if loop.time() >= next_reap:
+                    next_reap = loop.time() + reap_interval
+                    await self.reap_orphaned_tasks()
                 
-                # 异步执行任务
-                asyncio.create_task(self.execute_task(task["id"]))
+                await slots.acquire()
+                try:
+                    # 获取任务（按优先级排序）
+                    task_id = await get_state_backend().dequeue_task(timeout=1.0)
+                except Exception:
+                    slots.release()
+                    raise
+                if task_id is None:
+                    slots.release()
+                    continue
                 
+                # 异步执行任务
+                job = asyncio.create_task(self._process_queued_task(task_id))
+                job.add_done_callback(lambda _: slots.release())
+            
             except Exception as e:
                 logger.error(f"任务处理器异常: {str(e)}")
                 await asyncio.sleep(1)
     
+    async def _process_queued_task(self, task_id: str):
+        """执行从队列取出的任务；失败已写入任务状态，这里只防止异常无人处理"""
+        try:
+            await self.execute_task(task_id, wait=False)
+        except AgentException:
+            pass
+        except Exception as e:
+            logger.error(f"任务处理异常 {task_id}: {str(e)}")
+    
+    async def reap_orphaned_tasks(self) -> int:
+        """回收无主任务（认领已过期或从未认领的活跃任务），返回标记为失败的任务数
+        
+        - 等待中的任务重新放入任务队列：取出它的 worker 可能在认领前退出，已在队列中时不重复放入；
+        - 执行中的任务说明执行它的 worker 已停止心跳，认领后标记为失败并移入历史记录，
+          不自动重新执行，避免重复产生外部副作用。
+        """
+        backend = get_state_backend()
+        reaped = 0
+        for record in await backend.list_active_tasks():
+            task_id = record["id"]
+            if await backend.get_claim_owner(task_id) is not None:
+                continue
+            if record["status"] == TaskStatus.PENDING.value:
+                await backend.enqueue_task(task_id, record["priority"])
+                continue
+            # 认领成功的回收者只有一个；认领后重新读取，任务可能在列出之后刚刚结束
+            if not await backend.claim_task(task_id):
+                continue
+            record = await backend.get_task(task_id)
+            if record is None or TaskStatus(record["status"]) in FINISHED_STATUSES:
+                continue
+            
+            task = self.local_tasks.pop(task_id, None) or self._task_from_record(record)
+            task["status"] = TaskStatus.FAILED
+            task["completed_at"] = datetime.now()
+            task["error"] = f"执行任务的 worker 已失联: {record.get('worker')}"
+            await backend.archive_task(self._task_record(task))
+            await self._trigger_event("task_failed", task)
+            
+            logger.warning(f"已回收无主任务 {task_id}（worker {record.get('worker')}）")
+            reaped += 1
+        return reaped
+    
     async def get_task_status(self, task_id: str) -> Optional[Dict]:
-        """获取任务状态"""
-        if task_id in self.active_tasks:
-            task = self.active_tasks[task_id]
-            return {
-                "id": task["id"],
-                "type": task["type"].value,
-                "status": task["status"].value,
-                "created_at": task["created_at"].isoformat(),
-                "started_at": task["started_at"].isoformat() if task["started_at"] else None,
-                "completed_at": task["completed_at"].isoformat() if task["completed_at"] else None,
-                "priority": task["priority"]
-            }
-        else:
-            # 在历史记录中查找
-            for task in self.task_history:
-                if task["id"] == task_id:
-                    return {
-                        "id": task["id"],
-                        "type": task["type"].value,
-                        "status": task["status"].value,
-                        "created_at": task["created_at"].isoformat(),
-                        "started_at": task["started_at"].isoformat() if task["started_at"] else None,
-                        "completed_at": task["completed_at"].isoformat() if task["completed_at"] else None,
-                        "priority": task["priority"]
-                    }
-        return None
+        """获取任务状态（活跃任务或历史任务，可能由其他 worker 执行）"""
+        record = await get_state_backend().get_task(task_id)
+        return self._status_view(record) if record else None
+    
+    async def list_tasks(self, history_limit: int = 50) -> List[Dict[str, Any]]:
+        """获取活跃任务和最近的历史任务状态"""
+        backend = get_state_backend()
+        active = await backend.list_active_tasks()
+        history = await backend.list_task_history(history_limit)
+        return [self._status_view(record) for record in active + history]
     
     async def cancel_task(self, task_id: str) -> bool:
-        """取消任务"""
-        if task_id in self.active_tasks:
-            task = self.active_tasks[task_id]
-            if task["status"] == TaskStatus.PENDING:
-                task["status"] = TaskStatus.CANCELLED
-                task["completed_at"] = datetime.now()
-                
-                # 移动到历史记录
-                self.task_history.append(task.copy())
-                del self.active_tasks[task_id]
-                
-                logger.info(f"任务已取消: {task_id}")
-                return True
+        """取消任务（只能取消尚未开始执行的任务）"""
+        backend = get_state_backend()
+        record = await backend.get_task(task_id)
+        if not record or record["status"] != TaskStatus.PENDING.value:
+            return False
+        # 认领成功说明没有 worker 开始执行，之后也不会再被执行
+        if not await backend.claim_task(task_id):
+            return False
+        
+        task = self.local_tasks.pop(task_id, None) or self._task_from_record(record)
+        task["status"] = TaskStatus.CANCELLED
+        task["completed_at"] = datetime.now()
         
-        return False
+        # 移动到历史记录
+        await backend.archive_task(self._task_record(task))
+        await self._trigger_event("task_cancelled", task)
+        
+        logger.info(f"任务已取消: {task_id}")
+        return True
     
     async def get_agent_status(self) -> Dict[str, Any]:
         """获取所有智能体状态"""
@@ -358,12 +542,14 @@ class AgentController:
         for name, agent in self.agents.items():
             agent_status[name] = agent.get_status()
         
+        counts = await get_state_backend().count_tasks()
         return {
             "agents": agent_status,
-            "active_tasks": len(self.active_tasks),
-            "queued_tasks": self.task_queue.qsize(),
-            "completed_tasks": len(self.task_history),
-            "max_concurrent": self.config.concurrent_agents
+            "active_tasks": counts["active"],
+            "queued_tasks": counts["queued"],
+            "completed_tasks": counts["history"],
+            "max_concurrent": self.config.concurrent_agents,
+            "worker": WORKER_ID
         }
     
     def add_event_callback(self, event_type: str, callback: Callable):
@@ -372,7 +558,16 @@ class AgentController:
             self.event_callbacks[event_type].append(callback)
     
     async def _trigger_event(self, event_type: str, data: Any):
-        """触发事件"""
+        """触发事件：执行本进程回调，任务事件同时发布到共享状态后端供其他 worker 订阅"""
+        if event_type.startswith("task_") and isinstance(data, dict) and "id" in data:
+            try:
+                await get_state_backend().publish(
+                    TASK_EVENTS_CHANNEL,
+                    {"event": event_type, "task": self._status_view(self._task_record(data))}
+                )
+            except Exception as e:
+                logger.error(f"任务事件发布失败 {event_type}: {str(e)}")
+        
         if event_type in self.event_callbacks:
             for callback in self.event_callbacks[event_type]:
                 try:
@@ -392,9 +587,10 @@ class AgentController:
         """关闭控制器"""
         logger.info("关闭Agent Controller...")
         
-        # 取消所有待处理任务
-        for task_id in list(self.active_tasks.keys()):
-            await self.cancel_task(task_id)
+        # 共享状态后端中的待处理任务留给其他 worker 执行；进程内后端随进程结束，取消本进程提交的任务
+        if not get_state_backend().shared:
+            for task_id in list(self.local_tasks.keys()):
+                await self.cancel_task(task_id)
         
         # 清理智能体资源
         for agent in self.agents.values():
@@ -72,6 +72,9 @@ class HunterAgent(BaseAgent):
                 except Exception as e:
                     self._add_to_history(f"下载论文失败 {paper.get('title', 'Unknown')}: {str(e)}")
             
+            # 批量保存到数据库
+            await self._save_papers_to_db(downloaded_papers)
+            
             self.set_state("completed")
             
             return {
@@ -268,14 +271,11 @@ class HunterAgent(BaseAgent):
                         # 计算文件哈希
                         content_hash = hashlib.sha256(content).hexdigest()
                         
-                        # 更新论文信息
+                        # 更新论文信息（数据库记录在全部下载完成后批量写入）
                         paper["file_path"] = file_path
                         paper["content_hash"] = content_hash
                         paper["file_size"] = len(content)
                         
-                        # 保存到数据库
-                        await self._save_paper_to_db(paper)
-                        
                         self._add_to_history(f"成功下载论文: {filename}")
                         return paper
                     else:
@@ -286,28 +286,42 @@ class HunterAgent(BaseAgent):
             self._add_to_history(f"下载论文异常: {str(e)}")
             return None
     
-    async def _save_paper_to_db(self, paper: Dict):
-        """保存论文到数据库"""
+    async def _save_papers_to_db(self, papers: List[Dict]):
+        """批量保存论文到数据库：一次查询已存在的哈希，一次插入新论文"""
+        papers = [paper for paper in papers if paper.get("content_hash")]
+        if not papers:
+            return
+        
         try:
             # 检查是否已存在
-            existing_paper = await db_manager.get_paper_by_hash(paper.get("content_hash"))
-            if existing_paper:
-                self._add_to_history(f"论文已存在于数据库: {paper.get('title')}")
-                return
+            existing = await db_manager.get_papers_by_hashes([paper["content_hash"] for paper in papers])
+            new_papers = []
+            for paper in papers:
+                if paper["content_hash"] in existing:
+                    paper["db_id"] = str(existing[paper["content_hash"]]["id"])
+                    self._add_to_history(f"论文已存在于数据库: {paper.get('title')}")
+                else:
+                    new_papers.append(paper)
             
             # 创建论文记录
-            paper_id = await db_manager.create_paper(
-                title=paper.get("title", ""),
-                authors=paper.get("authors", []),
-                abstract=paper.get("abstract", ""),
-                doi=paper.get("doi", ""),
-                file_path=paper.get("file_path", ""),
-                content_hash=paper.get("content_hash", ""),
-                is_preset=False
-            )
+            created = await db_manager.create_papers([
+                {
+                    "title": paper.get("title", ""),
+                    "authors": paper.get("authors", []),
+                    "abstract": paper.get("abstract", ""),
+                    "doi": paper.get("doi", ""),
+                    "file_path": paper.get("file_path", ""),
+                    "content_hash": paper["content_hash"],
+                    "is_preset": False
+                }
+                for paper in new_papers
+            ])
+            created_ids = {row["content_hash"]: row["id"] for row in created}
+            for paper in new_papers:
+                if paper["content_hash"] in created_ids:
+                    paper["db_id"] = created_ids[paper["content_hash"]]
             
-            paper["db_id"] = paper_id
-            self._add_to_history(f"论文已保存到数据库: {paper_id}")
+            self._add_to_history(f"{len(created)} 篇论文已保存到数据库")
             
         except Exception as e:
             self._add_to_history(f"保存论文到数据库失败: {str(e)}")
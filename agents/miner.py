@@ -13,6 +13,15 @@ from agents.base import BaseAgent
 from core.database import db_manager
 from core.vector_store import vector_store_manager
 from core.exceptions import AgentException
+from utils.token_budget import PromptBudget
+
+# 提示词模板本身预留的 token 数
+PROMPT_TEMPLATE_RESERVE = 512
+
+# 各提示词中可变内容的 token 上限，在 max_prompt_tokens 总预算之内再按调用点封顶
+COMPARISON_SECTIONS_TOKENS = 1000
+REPORT_SECTIONS_TOKENS = 1500
+REPORT_COMPARISON_TOKENS = 1000
 
 class MinerAgent(BaseAgent):
     """洞察专家智能体"""
@@ -47,12 +56,14 @@ class MinerAgent(BaseAgent):
             # 1. 解析PDF内容
             parsed_content = await self._parse_paper_content(paper)
             
-            # 2. 检索相关历史论文
-            related_papers = await self._find_related_papers(
-                paper["title"], 
-                paper["abstract"], 
-                user_id
-            )
+            # 2. 检索相关历史论文（批量工作流会预先检索并通过 related_papers 传入）
+            related_papers = input_data.get("related_papers")
+            if related_papers is None:
+                related_papers = await self._find_related_papers(
+                    paper["title"], 
+                    paper["abstract"], 
+                    user_id
+                )
             
             # 3. 进行对比分析
             comparison_result = await self._perform_comparison_analysis(
@@ -159,38 +170,54 @@ class MinerAgent(BaseAgent):
     
     async def _find_related_papers(self, title: str, abstract: str, user_id: str = None) -> List[Dict]:
         """查找相关论文"""
+        return (await self.find_related_papers_many([{"title": title, "abstract": abstract}], user_id))[0]
+    
+    async def find_related_papers_many(self, papers: List[Dict], user_id: str = None) -> List[List[Dict]]:
+        """
+        批量查找多篇论文的相关论文
+        
+        所有论文的查询一次 hybrid_search_many（批量生成向量、每个集合一次批量检索），
+        命中的论文详情合并后一次批量读取。
+        
+        Returns:
+            与 papers 一一对应的相关论文列表；检索失败时每项为空列表
+        """
+        if not papers:
+            return []
         try:
-            # 构建查询
-            query = f"{title} {abstract}"
-            
-            # 执行混合搜索
-            search_results = await vector_store_manager.hybrid_search(
-                query=query,
+            search_results = await vector_store_manager.hybrid_search_many(
+                queries=[f"{paper.get('title') or ''} {paper.get('abstract') or ''}" for paper in papers],
                 user_id=user_id,
                 top_k=10,
                 include_l1=True,
-                include_l2=bool(user_id)
+                include_l2=bool(user_id),
+                payload_fields=["paper_id"]
             )
             
-            # 获取详细论文信息
-            related_papers = []
-            for result in search_results:
-                payload = result["payload"]
-                paper_id = payload.get("paper_id")
-                
-                if paper_id:
-                    paper_info = await db_manager.get_paper(paper_id)
+            # 获取详细论文信息（所有查询的结果一次批量查询）
+            details = await db_manager.get_papers([
+                result["payload"].get("paper_id") for results in search_results for result in results
+            ])
+            related = []
+            for results in search_results:
+                related_papers = []
+                for result in results:
+                    paper_info = details.get(str(result["payload"].get("paper_id")))
                     if paper_info:
-                        paper_info["similarity_score"] = result["score"]
+                        # 同一篇论文可能同时命中 L1 和 L2，各自保留一份
+                        paper_info = dict(paper_info)
+                        paper_info["similarity_score"] = result["vector_score"]
+                        paper_info["relevance_score"] = result["fused_score"]
                         paper_info["collection_type"] = result["collection_type"]
                         related_papers.append(paper_info)
+                related.append(related_papers)
             
-            self._add_to_history(f"找到 {len(related_papers)} 篇相关论文")
-            return related_papers
+            self._add_to_history(f"为 {len(papers)} 篇论文找到 {sum(map(len, related))} 篇相关论文")
+            return related
             
         except Exception as e:
             self._add_to_history(f"搜索相关论文失败: {str(e)}")
-            return []
+            return [[] for _ in papers]
     
     async def _perform_comparison_analysis(self, current_paper: Dict, related_papers: List[Dict]) -> Dict[str, Any]:
         """执行对比分析"""
@@ -202,6 +229,15 @@ class MinerAgent(BaseAgent):
                 "gaps_identified": []
             }
         
+        related_text = self._format_related_papers_for_comparison(related_papers[:5])
+        
+        # 按 token 预算截断当前论文的章节内容
+        sections_text = PromptBudget(safety_margin=PROMPT_TEMPLATE_RESERVE).fit(
+            {"sections": str(current_paper.get('sections', {}))},
+            limits={"sections": COMPARISON_SECTIONS_TOKENS},
+            overhead=f"{current_paper.get('title', '')} {current_paper.get('abstract', '')} {related_text}"
+        )["sections"]
+        
         # 构建对比分析的prompt
         comparison_prompt = f"""
         请分析当前论文与历史相关论文的对比情况：
@@ -209,10 +245,10 @@ class MinerAgent(BaseAgent):
         当前论文：
         标题：{current_paper.get('title', '')}
         摘要：{current_paper.get('abstract', '')}
-        主要内容：{str(current_paper.get('sections', {}))[:1000]}...
+        主要内容：{sections_text}...
         
         相关论文：
-        {self._format_related_papers_for_comparison(related_papers[:5])}
+        {related_text}
         
         请从以下角度进行对比分析：
         1. 方法的创新性和改进点
@@ -245,6 +281,11 @@ class MinerAgent(BaseAgent):
                 "gaps_identified": []
             }
     
+    @staticmethod
+    def _format_similarity(score: Optional[float]) -> str:
+        # 只被关键词检索命中的论文没有向量相似度
+        return f"{score:.3f}" if score is not None else "仅关键词匹配"
+    
     def _format_related_papers_for_comparison(self, papers: List[Dict]) -> str:
         """格式化相关论文用于对比"""
         formatted = []
@@ -253,7 +294,7 @@ class MinerAgent(BaseAgent):
             论文{i}：
             标题：{paper.get('title', '')}
             摘要：{paper.get('abstract', '')[:300]}...
-            相似度：{paper.get('similarity_score', 0):.3f}
+            相似度：{self._format_similarity(paper.get('similarity_score'))}
             """)
         return "\n".join(formatted)
     
@@ -272,6 +313,17 @@ class MinerAgent(BaseAgent):
                                     user_id: str = None) -> Dict[str, Any]:
         """创建分析报告"""
         
+        # 按 token 预算在解析内容和对比结果之间分配上下文
+        fitted = PromptBudget(safety_margin=PROMPT_TEMPLATE_RESERVE).fit(
+            {
+                "sections": str(parsed_content.get('sections', {})),
+                "comparison": str(comparison_result)
+            },
+            weights={"sections": 3, "comparison": 2},
+            limits={"sections": REPORT_SECTIONS_TOKENS, "comparison": REPORT_COMPARISON_TOKENS},
+            overhead=f"{paper.get('title', '')} {', '.join(paper.get('authors', []))} {paper.get('abstract', '')}"
+        )
+        
         report_prompt = f"""
         基于以下信息，生成一份详细的论文分析报告：
         
@@ -281,10 +333,10 @@ class MinerAgent(BaseAgent):
         摘要：{paper.get('abstract', '')}
         
         解析内容：
-        {str(parsed_content.get('sections', {}))[:1500]}...
+        {fitted["sections"]}...
         
         对比分析结果：
-        {str(comparison_result)[:1000]}...
+        {fitted["comparison"]}...
         
         请生成包含以下部分的报告：
         1. Summary - 论文主要贡献和方法概述
@@ -296,7 +348,8 @@ class MinerAgent(BaseAgent):
         """
         
         try:
-            response = await self.think(report_prompt)
+            # 报告提示词已包含全部上下文，不附加历史记录以便命中响应缓存
+            response = await self.think(report_prompt, include_history=False)
             
             # 尝试解析JSON响应
             try:
@@ -396,9 +449,13 @@ class MinerAgent(BaseAgent):
             results = await vector_store_manager.hybrid_search(
                 query=query,
                 user_id=user_id,
-                top_k=5
+                top_k=5,
+                payload_fields=["title", "abstract", "year"]
             )
-            return [{"id": r["id"], "score": r["score"], "payload": r["payload"]} for r in results]
+            return [
+                {"id": r["id"], "score": r["fused_score"], "similarity": r["vector_score"], "payload": r["payload"]}
+                for r in results
+            ]
         except Exception as e:
             return [{"error": str(e)}]
     
@@ -12,6 +12,8 @@ import uvicorn
 from core.config import get_config
 from core.database import db_manager
 from core.vector_store import vector_store_manager
+from core.llm_adapter import close_provider_http_clients, get_llm_stats
+from core.state_backend import cache_invalidation_bus, close_state_backend, init_state_backend
 from agents.controller import agent_controller
 from .routes import papers, users, tasks, analysis, writing, citations, workflow
 
@@ -25,6 +27,10 @@ async def lifespan(app: FastAPI):
     # 启动时初始化
     logger.info("正在启动InnoCore AI...")
     
+    # 初始化共享状态后端（多 worker 部署时为 Redis，连接失败直接中止启动）
+    await init_state_backend()
+    cache_invalidation_bus.start()
+    
     # 初始化数据库（可选）
     try:
         await db_manager.initialize()
@@ -60,6 +66,10 @@ async def lifespan(app: FastAPI):
     await agent_controller.shutdown()
     await db_manager.close()
     await vector_store_manager.close()
+    await close_provider_http_clients()
+    await tasks.manager.close()
+    await cache_invalidation_bus.stop()
+    await close_state_backend()
     logger.info("InnoCore AI已关闭")
 
 # 创建FastAPI应用
@@ -130,7 +140,8 @@ async def health_check():
                 "database": "connected",
                 "vector_store": "connected",
                 "agents": agent_status
-            }
+            },
+            "llm": get_llm_stats()
         }
     except Exception as e:
         return JSONResponse(
@@ -3,13 +3,20 @@
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pydantic import BaseModel
+import asyncio
 import logging
+import re
 import arxiv
 import os
 from core.config import get_config
+from core.database import db_manager
 from core.llm_adapter import get_llm_adapter
+from core.singleflight import SingleFlight
+from core.vector_store import vector_store_manager
+from api.sse import format_sse, sse_response
+from utils.token_budget import PromptBudget
 from utils.pdf_parser import pdf_parser
 
 logger = logging.getLogger(__name__)
@@ -44,57 +51,93 @@ class PaperAnalysisRequest(BaseModel):
     paper_url: str
     analysis_type: str = "summary"  # summary, innovation, comparison, comprehensive
 
-@router.post("/analyze", response_model=Dict[str, Any])
-async def analyze_paper(request: PaperAnalysisRequest):
-    """分析论文 - 支持 ArXiv URL 和本地 PDF 文件"""
-    try:
-        if not llm:
-            raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
-        
-        import re
-        paper_url = request.paper_url.strip()
-        
-        # 检查是否是本地上传的 PDF 文件
-        if paper_url.startswith('/uploads/') or paper_url.endswith('.pdf'):
-            logger.info(f"检测到本地 PDF 文件: {paper_url}")
-            
-            # 构建完整的文件路径
-            if paper_url.startswith('/uploads/'):
-                # 假设上传的文件在 downloads 目录
-                file_path = os.path.join('downloads', paper_url.replace('/uploads/', ''))
-            else:
-                file_path = paper_url
-            
-            # 检查文件是否存在
-            if not os.path.exists(file_path):
-                logger.warning(f"PDF 文件不存在: {file_path}")
-                raise HTTPException(status_code=404, detail=f"PDF 文件不存在: {paper_url}")
-            
-            # 解析 PDF 文件
-            logger.info(f"开始解析 PDF 文件: {file_path}")
-            pdf_result = await pdf_parser.parse_pdf(file_path)
-            
-            if not pdf_result.get("success"):
-                raise HTTPException(status_code=500, detail=pdf_result.get("error", "PDF 解析失败"))
-            
-            # 使用解析出的内容进行 AI 分析
-            title = pdf_result.get("title", "未知标题")
-            authors = pdf_result.get("authors", ["未知作者"])
-            abstract = pdf_result.get("abstract", "")
-            full_text = pdf_result.get("full_text", "")
-            
-            # 限制文本长度以避免超出 token 限制
-            text_for_analysis = full_text[:8000] if len(full_text) > 8000 else full_text
-            
-            # 根据分析类型生成提示词
-            prompts = {
-                "summary": f"""请对以下论文进行摘要分析：
+# 提示词模板本身预留的 token 数
+PROMPT_TEMPLATE_RESERVE = 512
+# 单次分析使用的论文正文 token 上限
+ANALYSIS_TEXT_TOKENS = 4000
+
+# 相同论文 + 分析类型的并发分析请求合并为一次上游调用
+analysis_singleflight = SingleFlight("analysis")
+
+ARXIV_PATTERNS = [
+    r'arxiv\.org/abs/(\d+\.\d+)',
+    r'arxiv\.org/pdf/(\d+\.\d+)',
+    r'arXiv:(\d+\.\d+)',
+    r'\[(\d+\.\d+)v?\d*\]',
+    r'^(\d{4}\.\d{4,5})v?\d*$'
+]
+
+def _resolve_paper_source(paper_url: str) -> Tuple[str, str]:
+    """
+    解析论文来源
+    
+    Returns:
+        (来源类型, 标识)：("pdf", 本地文件路径) 或 ("arxiv", ArXiv ID)
+    """
+    paper_url = paper_url.strip()
+    
+    # 检查是否是本地上传的 PDF 文件
+    if paper_url.startswith('/uploads/') or paper_url.endswith('.pdf'):
+        logger.info(f"检测到本地 PDF 文件: {paper_url}")
+        
+        # 构建完整的文件路径
+        if paper_url.startswith('/uploads/'):
+            # 假设上传的文件在 downloads 目录
+            file_path = os.path.join('downloads', paper_url.replace('/uploads/', ''))
+        else:
+            file_path = paper_url
+        
+        # 检查文件是否存在
+        if not os.path.exists(file_path):
+            logger.warning(f"PDF 文件不存在: {file_path}")
+            raise HTTPException(status_code=404, detail=f"PDF 文件不存在: {paper_url}")
+        
+        return "pdf", file_path
+    
+    # ArXiv 论文处理
+    for pattern in ARXIV_PATTERNS:
+        match = re.search(pattern, paper_url, re.IGNORECASE)
+        if match:
+            return "arxiv", match.group(1)
+    
+    raise HTTPException(
+        status_code=400, 
+        detail=f"无效的输入。支持的格式：\n" +
+               "- ArXiv URL: https://arxiv.org/abs/2511.16672\n" +
+               "- ArXiv ID: 2511.16672\n" +
+               "- 本地 PDF: 上传后自动填充"
+    )
+
+async def _build_pdf_analysis_prompt(file_path: str, paper_url: str, analysis_type: str) -> Dict[str, Any]:
+    """解析本地 PDF 并构建分析提示词"""
+    logger.info(f"开始解析 PDF 文件: {file_path}")
+    pdf_result = await pdf_parser.parse_pdf(file_path)
+    
+    if not pdf_result.get("success"):
+        raise HTTPException(status_code=500, detail=pdf_result.get("error", "PDF 解析失败"))
+    
+    # 使用解析出的内容进行 AI 分析
+    title = pdf_result.get("title", "未知标题")
+    authors = pdf_result.get("authors", ["未知作者"])
+    abstract = pdf_result.get("abstract", "")
+    full_text = pdf_result.get("full_text", "")
+    
+    # 按模型上下文窗口的 token 预算截断正文，预留提示词模板的开销
+    text_for_analysis = PromptBudget(safety_margin=PROMPT_TEMPLATE_RESERVE).fit(
+        {"full_text": full_text},
+        limits={"full_text": ANALYSIS_TEXT_TOKENS},
+        overhead=f"{title} {', '.join(authors)} {abstract}"
+    )["full_text"]
+    
+    # 根据分析类型生成提示词
+    prompts = {
+        "summary": f"""请对以下论文进行摘要分析：
 
 标题：{title}
 作者：{', '.join(authors)}
 摘要：{abstract}
 
-论文内容（前8000字符）：
+论文内容（节选）：
 {text_for_analysis}
 
 请提供：
@@ -105,8 +148,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 研究意义
 
 请用中文回答，保持专业和简洁。""",
-                
-                "innovation": f"""请分析以下论文的创新点：
+        
+        "innovation": f"""请分析以下论文的创新点：
 
 标题：{title}
 摘要：{abstract}
@@ -122,8 +165,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 潜在应用价值
 
 请用中文回答。""",
-                
-                "comparison": f"""请对以下论文进行对比分析：
+        
+        "comparison": f"""请对以下论文进行对比分析：
 
 标题：{title}
 摘要：{abstract}
@@ -139,8 +182,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 局限性
 
 请用中文回答。""",
-                
-                "comprehensive": f"""请对以下论文进行全面综合分析：
+        
+        "comprehensive": f"""请对以下论文进行全面综合分析：
 
 标题：{title}
 作者：{', '.join(authors)}
@@ -159,69 +202,37 @@ async def analyze_paper(request: PaperAnalysisRequest):
 7. 实际应用价值
 
 请用中文回答，保持专业和深度。"""
-            }
-            
-            prompt = prompts.get(request.analysis_type, prompts["summary"])
-            
-            # 调用 LLM 进行分析
-            logger.info(f"开始 AI 分析，类型: {request.analysis_type}")
-            response = await llm.ainvoke(prompt)
-            analysis_content = response.content if hasattr(response, 'content') else str(response)
-            
-            return {
-                "success": True,
-                "paper_info": {
-                    "id": "local_pdf",
-                    "title": title,
-                    "authors": authors,
-                    "published_date": "N/A",
-                    "url": paper_url,
-                    "categories": ["本地文件"],
-                    "page_count": pdf_result.get("page_count", 0),
-                    "word_count": pdf_result.get("word_count", 0)
-                },
-                "analysis_type": request.analysis_type,
-                "analysis": analysis_content,
-                "abstract": abstract
-            }
-        
-        # ArXiv 论文处理
-        arxiv_patterns = [
-            r'arxiv\.org/abs/(\d+\.\d+)',
-            r'arxiv\.org/pdf/(\d+\.\d+)',
-            r'arXiv:(\d+\.\d+)',
-            r'\[(\d+\.\d+)v?\d*\]',
-            r'^(\d{4}\.\d{4,5})v?\d*$'
-        ]
-        
-        paper_id = None
-        for pattern in arxiv_patterns:
-            match = re.search(pattern, paper_url, re.IGNORECASE)
-            if match:
-                paper_id = match.group(1)
-                break
-        
-        if not paper_id:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"无效的输入。支持的格式：\n" +
-                       "- ArXiv URL: https://arxiv.org/abs/2511.16672\n" +
-                       "- ArXiv ID: 2511.16672\n" +
-                       "- 本地 PDF: 上传后自动填充"
-            )
-        
-        logger.info(f"正在分析 ArXiv 论文: {paper_id}")
-        
-        # 获取论文信息
-        search = arxiv.Search(id_list=[paper_id])
-        paper = next(search.results(), None)
-        
-        if not paper:
-            raise HTTPException(status_code=404, detail=f"未找到 ArXiv 论文: {paper_id}")
-        
-        # 根据分析类型生成提示词
-        prompts = {
-            "summary": f"""请对以下论文进行摘要分析：
+    }
+    
+    return {
+        "prompt": prompts.get(analysis_type, prompts["summary"]),
+        "abstract": abstract,
+        "paper_info": {
+            "id": "local_pdf",
+            "title": title,
+            "authors": authors,
+            "published_date": "N/A",
+            "url": paper_url,
+            "categories": ["本地文件"],
+            "page_count": pdf_result.get("page_count", 0),
+            "word_count": pdf_result.get("word_count", 0)
+        }
+    }
+
+async def _build_arxiv_analysis_prompt(paper_id: str, analysis_type: str) -> Dict[str, Any]:
+    """获取 ArXiv 论文信息并构建分析提示词"""
+    logger.info(f"正在分析 ArXiv 论文: {paper_id}")
+    
+    # 获取论文信息（arxiv 客户端是同步的，放到线程中避免阻塞事件循环）
+    search = arxiv.Search(id_list=[paper_id])
+    paper = await asyncio.to_thread(lambda: next(search.results(), None))
+    
+    if not paper:
+        raise HTTPException(status_code=404, detail=f"未找到 ArXiv 论文: {paper_id}")
+    
+    # 根据分析类型生成提示词
+    prompts = {
+        "summary": f"""请对以下论文进行摘要分析：
 
 标题：{paper.title}
 作者：{', '.join([a.name for a in paper.authors])}
@@ -235,8 +246,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 研究意义
 
 请用中文回答，保持专业和简洁。""",
-            
-            "innovation": f"""请分析以下论文的创新点：
+        
+        "innovation": f"""请分析以下论文的创新点：
 
 标题：{paper.title}
 摘要：{paper.summary}
@@ -249,8 +260,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 潜在应用价值
 
 请用中文回答。""",
-            
-            "comparison": f"""请对以下论文进行对比分析：
+        
+        "comparison": f"""请对以下论文进行对比分析：
 
 标题：{paper.title}
 摘要：{paper.summary}
@@ -263,8 +274,8 @@ async def analyze_paper(request: PaperAnalysisRequest):
 5. 局限性
 
 请用中文回答。""",
-            
-            "comprehensive": f"""请对以下论文进行全面综合分析：
+        
+        "comprehensive": f"""请对以下论文进行全面综合分析：
 
 标题：{paper.title}
 作者：{', '.join([a.name for a in paper.authors])}
@@ -281,28 +292,62 @@ async def analyze_paper(request: PaperAnalysisRequest):
 7. 实际应用价值
 
 请用中文回答，保持专业和深度。"""
+    }
+    
+    return {
+        "prompt": prompts.get(analysis_type, prompts["summary"]),
+        "abstract": paper.summary,
+        "paper_info": {
+            "id": paper_id,
+            "title": paper.title,
+            "authors": [a.name for a in paper.authors],
+            "published_date": paper.published.strftime("%Y-%m-%d"),
+            "url": paper.entry_id,
+            "categories": paper.categories
         }
+    }
+
+async def _build_analysis_prompt(source_type: str, source_id: str, paper_url: str,
+                                 analysis_type: str) -> Dict[str, Any]:
+    """根据论文来源构建分析提示词和论文信息"""
+    if source_type == "pdf":
+        return await _build_pdf_analysis_prompt(source_id, paper_url.strip(), analysis_type)
+    return await _build_arxiv_analysis_prompt(source_id, analysis_type)
+
+async def _run_analysis(source_type: str, source_id: str, request: PaperAnalysisRequest) -> Dict[str, Any]:
+    """执行一次完整的论文分析"""
+    analysis_context = await _build_analysis_prompt(
+        source_type, source_id, request.paper_url, request.analysis_type
+    )
+    
+    # 调用 LLM 进行分析
+    logger.info(f"开始 AI 分析，类型: {request.analysis_type}")
+    response = await llm.ainvoke(analysis_context["prompt"])
+    analysis_content = response.content if hasattr(response, 'content') else str(response)
+    
+    return {
+        "success": True,
+        "paper_info": analysis_context["paper_info"],
+        "analysis_type": request.analysis_type,
+        "analysis": analysis_content,
+        "abstract": analysis_context["abstract"]
+    }
+
+@router.post("/analyze", response_model=Dict[str, Any])
+async def analyze_paper(request: PaperAnalysisRequest):
+    """分析论文 - 支持 ArXiv URL 和本地 PDF 文件"""
+    try:
+        if not llm:
+            raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
         
-        prompt = prompts.get(request.analysis_type, prompts["summary"])
-        
-        # 调用 LLM 进行分析
-        response = await llm.ainvoke(prompt)
-        analysis_content = response.content if hasattr(response, 'content') else str(response)
+        source_type, source_id = _resolve_paper_source(request.paper_url)
         
-        return {
-            "success": True,
-            "paper_info": {
-                "id": paper_id,
-                "title": paper.title,
-                "authors": [a.name for a in paper.authors],
-                "published_date": paper.published.strftime("%Y-%m-%d"),
-                "url": paper.entry_id,
-                "categories": paper.categories
-            },
-            "analysis_type": request.analysis_type,
-            "analysis": analysis_content,
-            "abstract": paper.summary
-        }
+        # 同一论文 + 分析类型的并发请求共享一次分析
+        flight_key = f"{source_type}:{source_id}:{request.analysis_type}"
+        return await analysis_singleflight.do(
+            flight_key,
+            lambda: _run_analysis(source_type, source_id, request)
+        )
         
     except HTTPException:
         raise
@@ -310,6 +355,53 @@ async def analyze_paper(request: PaperAnalysisRequest):
         logger.error(f"论文分析失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"分析失败: {str(e)}")
 
+@router.post("/analyze/stream")
+async def analyze_paper_stream(request: PaperAnalysisRequest):
+    """流式分析论文（SSE）- 逐段推送 LLM 生成的内容
+    
+    事件序列: start -> meta(论文信息) -> delta(文本片段)* -> done；出错时推送 error
+    """
+    if not llm:
+        raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
+    
+    source_type, source_id = _resolve_paper_source(request.paper_url)
+    
+    async def event_stream():
+        yield format_sse({"analysis_type": request.analysis_type}, event="start")
+        try:
+            analysis_context = await _build_analysis_prompt(
+                source_type, source_id, request.paper_url, request.analysis_type
+            )
+            yield format_sse({
+                "paper_info": analysis_context["paper_info"],
+                "abstract": analysis_context["abstract"]
+            }, event="meta")
+            
+            logger.info(f"开始流式 AI 分析，类型: {request.analysis_type}")
+            async for delta in llm.astream(analysis_context["prompt"]):
+                yield format_sse({"delta": delta}, event="delta")
+            
+            yield format_sse({"success": True}, event="done")
+        except HTTPException as e:
+            yield format_sse({"status_code": e.status_code, "detail": e.detail}, event="error")
+        except Exception as e:
+            logger.error(f"流式论文分析失败: {str(e)}")
+            yield format_sse({"status_code": 500, "detail": f"分析失败: {str(e)}"}, event="error")
+    
+    return sse_response(event_stream())
+
+@router.get("/stats", response_model=Dict[str, Any])
+async def get_analysis_stats():
+    """获取分析请求合并、LLM 缓存、混合搜索缓存与数据库读穿透缓存统计"""
+    return {
+        "success": True,
+        "analysis_singleflight": analysis_singleflight.get_stats(),
+        "llm": llm.get_stats() if llm else {},
+        "search_cache": vector_store_manager.get_cache_stats(),
+        "db_cache": db_manager.get_cache_stats()
+    }
+
+
 @router.post("/compare", response_model=Dict[str, Any])
 async def compare_papers(request: ComparisonRequest):
     """对比多篇论文"""
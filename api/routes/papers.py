@@ -8,6 +8,8 @@ from pydantic import BaseModel
 import logging
 import arxiv
 from datetime import datetime
+from core.database import db_manager
+from core.exceptions import ValidationException
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -84,6 +86,28 @@ async def search_papers(request: PaperSearchRequest):
         logger.error(f"论文搜索失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
 
+@router.get("/library/search", response_model=Dict[str, Any])
+async def search_library(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor")
+):
+    """检索本地论文库（全文检索，游标分页）"""
+    try:
+        page = await db_manager.search_papers_page(q, limit=limit, cursor=cursor)
+        return {
+            "success": True,
+            "papers": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        }
+        
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    except Exception as e:
+        logger.error(f"论文库检索失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"检索失败: {str(e)}")
+
 @router.post("/upload", response_model=Dict[str, Any])
 async def upload_paper(file: UploadFile = File(...)):
     """上传论文PDF"""
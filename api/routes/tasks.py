@@ -9,10 +9,8 @@ import logging
 import json
 import asyncio
 
-# from ...agents.controller import agent_controller, TaskType
-# 临时注释，避免相对导入错误
-agent_controller = None
-TaskType = None
+from agents.controller import agent_controller, TaskType
+from core.state_backend import BROADCAST_CHANNEL, TASK_EVENTS_CHANNEL, get_state_backend
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -34,26 +32,56 @@ class TaskResponse(BaseModel):
 
 # WebSocket连接管理
 class ConnectionManager:
+    """WebSocket 连接管理
+    
+    连接本身只能由接受它的 worker 持有；广播消息经共享状态后端发布，
+    每个 worker 的转发任务再发送给本进程的连接，因此多个 worker 时所有客户端都能收到。
+    """
+    
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self._relay_task: Optional[asyncio.Task] = None
     
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        if self._relay_task is None or self._relay_task.done():
+            self._relay_task = asyncio.create_task(self._relay_broadcasts())
     
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
     
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
     
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
+        """向所有 worker 上的连接广播"""
+        await get_state_backend().publish(BROADCAST_CHANNEL, {"message": message})
+    
+    async def _send_local(self, message: str):
+        for connection in list(self.active_connections):
             try:
                 await connection.send_text(message)
-            except:
+            except Exception:
                 # 连接已断开，移除
-                self.active_connections.remove(connection)
+                self.disconnect(connection)
+    
+    async def _relay_broadcasts(self):
+        """把共享状态后端上的广播转发给本进程的连接"""
+        try:
+            async with get_state_backend().subscribe(BROADCAST_CHANNEL) as subscription:
+                async for event in subscription:
+                    await self._send_local(event["message"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"WebSocket 广播转发中断: {str(e)}")
+    
+    async def close(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            self._relay_task = None
 
 manager = ConnectionManager()
 
@@ -137,33 +165,9 @@ async def cancel_task(task_id: str):
 async def list_tasks():
     """获取任务列表"""
     try:
-        # 获取活跃任务
-        active_tasks = []
-        for task_id, task in agent_controller.active_tasks.items():
-            active_tasks.append(TaskResponse(
-                id=task["id"],
-                type=task["type"].value,
-                status=task["status"].value,
-                created_at=task["created_at"].isoformat(),
-                started_at=task["started_at"].isoformat() if task["started_at"] else None,
-                completed_at=task["completed_at"].isoformat() if task["completed_at"] else None,
-                priority=task["priority"]
-            ))
-        
-        # 获取历史任务（最近50个）
-        history_tasks = []
-        for task in agent_controller.task_history[-50:]:
-            history_tasks.append(TaskResponse(
-                id=task["id"],
-                type=task["type"].value,
-                status=task["status"].value,
-                created_at=task["created_at"].isoformat(),
-                started_at=task["started_at"].isoformat() if task["started_at"] else None,
-                completed_at=task["completed_at"].isoformat() if task["completed_at"] else None,
-                priority=task["priority"]
-            ))
-        
-        return active_tasks + history_tasks
+        # 活跃任务 + 最近50个历史任务（所有 worker 共享）
+        tasks = await agent_controller.list_tasks(history_limit=50)
+        return [TaskResponse(**task) for task in tasks]
         
     except Exception as e:
         logger.error(f"获取任务列表失败: {str(e)}")
@@ -209,31 +213,32 @@ async def run_full_workflow(input_data: Dict[str, Any]):
 
 @router.websocket("/ws/{task_id}")
 async def websocket_task_updates(websocket: WebSocket, task_id: str):
-    """WebSocket任务更新"""
+    """WebSocket任务更新（订阅任务事件，任务可能在其他 worker 上执行）"""
     await manager.connect(websocket)
     try:
-        # 发送初始状态
-        status = await agent_controller.get_task_status(task_id)
-        if status:
-            await manager.send_personal_message(
-                json.dumps({"type": "status", "data": status}),
-                websocket
-            )
-        
-        # 监听任务状态变化
-        while True:
-            await asyncio.sleep(1)  # 每秒检查一次
-            
+        # 先订阅再发送初始状态，之后的状态变化不会漏掉
+        async with get_state_backend().subscribe(TASK_EVENTS_CHANNEL) as events:
             status = await agent_controller.get_task_status(task_id)
             if status:
                 await manager.send_personal_message(
                     json.dumps({"type": "status", "data": status}),
                     websocket
                 )
+            
+            # 监听任务状态变化
+            while not status or status["status"] not in ["completed", "failed", "cancelled"]:
+                event = await events.get(timeout=5.0)  # 超时后兜底重新读取状态
+                if event and event["task"]["id"] != task_id:
+                    continue
                 
-                # 如果任务完成，断开连接
-                if status["status"] in ["completed", "failed", "cancelled"]:
-                    break
+                latest = await agent_controller.get_task_status(task_id)
+                if latest and latest != status:
+                    status = latest
+                    await manager.send_personal_message(
+                        json.dumps({"type": "status", "data": status}),
+                        websocket
+                    )
+        manager.disconnect(websocket)
     
     except WebSocketDisconnect:
         manager.disconnect(websocket)
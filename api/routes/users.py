@@ -2,15 +2,14 @@
 用户相关API路由
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 import logging
 import uuid
 
-# from ...core.database import db_manager
-# 临时注释，避免相对导入错误
-db_manager = None
+from core.database import db_manager
+from core.exceptions import ValidationException
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -129,4 +128,26 @@ async def update_user_profile(user_id: str, profile: Dict[str, Any]):
         raise
     except Exception as e:
         logger.error(f"更新用户配置失败: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/papers")
+async def get_user_papers(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor")
+):
+    """获取用户论文库（按加入时间倒序，游标分页）"""
+    try:
+        page = await db_manager.get_user_papers_page(user_id, limit=limit, cursor=cursor)
+        return {
+            "success": True,
+            "papers": page["items"],
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        }
+        
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    except Exception as e:
+        logger.error(f"获取用户论文失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 import logging
 from core.config import get_config
 from core.llm_adapter import get_llm_adapter
+from api.sse import format_sse, sse_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -55,18 +56,10 @@ class SuggestRequest(BaseModel):
     text: str
     context: Optional[Dict[str, Any]] = {}
 
-@router.post("/coach", response_model=Dict[str, Any])
-async def writing_coach(request: WritingCoachRequest):
-    """写作助手 - 使用真实的 AI 处理"""
-    try:
-        if not llm:
-            raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
-        
-        logger.info(f"处理写作任务: {request.task}, 风格: {request.style}")
-        
-        # 根据任务类型生成提示词
-        prompts = {
-            "polish": f"""作为一位专业的学术写作编辑，请帮我润色以下文本，使其符合{request.style}学术写作标准：
+def _build_coach_prompt(request: WritingCoachRequest) -> str:
+    """根据任务类型生成写作助手提示词"""
+    prompts = {
+        "polish": f"""作为一位专业的学术写作编辑，请帮我润色以下文本，使其符合{request.style}学术写作标准：
 
 原文：
 {request.text}
@@ -81,8 +74,8 @@ async def writing_coach(request: WritingCoachRequest):
 - 提升表达清晰度
 - 使用恰当的学术用语
 - 改善句子结构和逻辑流畅性""",
-            
-            "translate": f"""请将以下中文学术文本翻译成专业的英文学术论文表达：
+        
+        "translate": f"""请将以下中文学术文本翻译成专业的英文学术论文表达：
 
 原文：
 {request.text}
@@ -92,8 +85,8 @@ async def writing_coach(request: WritingCoachRequest):
 - 使用地道的英文学术表达
 - 符合{request.style}风格的学术写作规范
 - 保持技术术语的准确性""",
-            
-            "explain": f"""请详细解释以下概念或内容：
+        
+        "explain": f"""请详细解释以下概念或内容：
 
 {request.text}
 
@@ -102,8 +95,8 @@ async def writing_coach(request: WritingCoachRequest):
 - 保持技术准确性
 - 提供具体例子
 - 说明应用场景和重要性""",
-            
-            "expand": f"""请扩展以下内容，使其更加详细和完整：
+        
+        "expand": f"""请扩展以下内容，使其更加详细和完整：
 
 原文：
 {request.text}
@@ -115,9 +108,20 @@ async def writing_coach(request: WritingCoachRequest):
 - 增加潜在影响和应用
 - 保持逻辑连贯性
 - 符合{request.style}学术写作风格"""
-        }
+    }
+    
+    return prompts.get(request.task, prompts["polish"])
+
+@router.post("/coach", response_model=Dict[str, Any])
+async def writing_coach(request: WritingCoachRequest):
+    """写作助手 - 使用真实的 AI 处理"""
+    try:
+        if not llm:
+            raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
         
-        prompt = prompts.get(request.task, prompts["polish"])
+        logger.info(f"处理写作任务: {request.task}, 风格: {request.style}")
+        
+        prompt = _build_coach_prompt(request)
         
         # 调用 LLM 处理
         response = await llm.ainvoke(prompt)
@@ -137,6 +141,30 @@ async def writing_coach(request: WritingCoachRequest):
         logger.error(f"写作助手处理失败: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理失败: {str(e)}")
 
+@router.post("/coach/stream")
+async def writing_coach_stream(request: WritingCoachRequest):
+    """写作助手流式版本（SSE）- 逐段推送 LLM 生成的内容
+    
+    事件序列: start -> delta(文本片段)* -> done；出错时推送 error
+    """
+    if not llm:
+        raise HTTPException(status_code=503, detail="AI 服务未配置，请设置 OPENAI_API_KEY")
+    
+    logger.info(f"流式处理写作任务: {request.task}, 风格: {request.style}")
+    prompt = _build_coach_prompt(request)
+    
+    async def event_stream():
+        yield format_sse({"task": request.task, "style": request.style}, event="start")
+        try:
+            async for delta in llm.astream(prompt):
+                yield format_sse({"delta": delta}, event="delta")
+            yield format_sse({"success": True}, event="done")
+        except Exception as e:
+            logger.error(f"流式写作助手处理失败: {str(e)}")
+            yield format_sse({"status_code": 500, "detail": f"处理失败: {str(e)}"}, event="error")
+    
+    return sse_response(event_stream())
+
 @router.post("/explain", response_model=Dict[str, Any])
 async def explain_concept(request: ExplainRequest):
     """解释复杂概念"""
@@ -0,0 +1,26 @@
+"""
+Server-Sent Events 工具
+"""
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 关闭 Nginx 缓冲，保证逐段推送
+}
+
+def format_sse(data: Any, event: str = None) -> str:
+    """将数据编码为一条 SSE 消息（data 统一为 JSON）"""
+    message = ""
+    if event:
+        message += f"event: {event}\n"
+    message += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return message
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """构建 SSE 流式响应"""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
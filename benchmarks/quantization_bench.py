@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+向量量化基准测试
+用 numpy 复现各集合存储方案的打分方式，报告 recall@k 与每个向量常驻内存字节数，
+用于选择 l1_collection_profile / l2_collection_profile
+
+- memory/on_disk：float32 精确打分（基准，召回率 1.0）
+- scalar：按分位数截断后线性映射到 int8
+- product：每 4 维一个子空间、256 个中心（x16 压缩），非对称距离查表打分
+量化方案分别报告不重排和"取 k * oversampling 个候选后用原始向量重排"的召回率。
+
+用法:
+    python benchmarks/quantization_bench.py [--dim 1536] [--size 20000]
+    python benchmarks/quantization_bench.py --vectors l1_vectors.npy
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.collection_profiles import COLLECTION_PROFILES
+from utils.similarity import normalize_rows, select_top_k
+
+def synthetic_vectors(size: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """带主题簇结构的合成向量（比各向同性随机向量更接近真实 embedding）"""
+    centers = rng.standard_normal((max(size // 100, 8), dim), dtype=np.float32)
+    assignments = rng.integers(0, len(centers), size)
+    noise = rng.standard_normal((size, dim), dtype=np.float32)
+    return normalize_rows(centers[assignments] + 0.8 * noise)
+
+def scalar_quantize(vectors: np.ndarray, quantile: float = 0.99):
+    """int8 标量量化：截断到 [low, high] 分位数后线性映射到 [-127, 127]"""
+    low, high = np.quantile(vectors, [(1 - quantile) / 2, (1 + quantile) / 2])
+    scale = (high - low) / 254.0
+    codes = np.clip(np.round((vectors - low) / scale) - 127, -127, 127).astype(np.int8)
+    return codes, scale, low
+
+def scalar_scores(queries: np.ndarray, codes: np.ndarray, scale: float, low: float) -> np.ndarray:
+    # (codes + 127) * scale + low 为反量化值，展开后只需一次整型矩阵乘法
+    dot = queries @ codes.T.astype(np.float32)
+    return scale * dot + (127 * scale + low) * queries.sum(axis=1, keepdims=True)
+
+def kmeans(points: np.ndarray, clusters: int, rng: np.random.Generator, iterations: int = 8) -> np.ndarray:
+    centroids = points[rng.choice(len(points), clusters, replace=False)]
+    for _ in range(iterations):
+        distances = (
+            (points ** 2).sum(axis=1, keepdims=True) - 2 * points @ centroids.T
+            + (centroids ** 2).sum(axis=1)
+        )
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=clusters)
+        sums = np.stack([
+            np.bincount(labels, weights=points[:, column], minlength=clusters)
+            for column in range(points.shape[1])
+        ], axis=1)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+    return centroids
+
+def product_quantize(vectors: np.ndarray, rng: np.random.Generator, sub_dim: int = 4,
+                     clusters: int = 256, train_size: int = 10000):
+    """乘积量化：每 sub_dim 维训练一个码本，每个子向量用 1 字节的中心编号表示"""
+    train = vectors[rng.choice(len(vectors), min(train_size, len(vectors)), replace=False)]
+    codebooks, codes = [], []
+    for start in range(0, vectors.shape[1], sub_dim):
+        centroids = kmeans(train[:, start:start + sub_dim].copy(), clusters, rng)
+        sub = vectors[:, start:start + sub_dim]
+        distances = (sub ** 2).sum(axis=1, keepdims=True) - 2 * sub @ centroids.T + (centroids ** 2).sum(axis=1)
+        codebooks.append(centroids)
+        codes.append(distances.argmin(axis=1).astype(np.uint8))
+    return codebooks, np.stack(codes, axis=1)
+
+def product_scores(queries: np.ndarray, codebooks, codes: np.ndarray, sub_dim: int = 4) -> np.ndarray:
+    """非对称距离：查询保持 float32，每个子空间预先计算与全部中心的内积表"""
+    scores = np.zeros((len(queries), len(codes)), dtype=np.float32)
+    for index, centroids in enumerate(codebooks):
+        table = queries[:, index * sub_dim:(index + 1) * sub_dim] @ centroids.T
+        scores += table[:, codes[:, index]]
+    return scores
+
+def recall(approx_scores: np.ndarray, vectors: np.ndarray, queries: np.ndarray,
+           truth: list, k: int, oversampling: float = None) -> float:
+    """approx 打分取 top-k；给定 oversampling 时先取 k * oversampling 个候选再用原始向量重排"""
+    hits = 0
+    for i, query in enumerate(queries):
+        if oversampling:
+            candidates, _ = select_top_k(approx_scores[i], int(k * oversampling))
+            exact = vectors[candidates] @ query
+            top = candidates[select_top_k(exact, k)[0]]
+        else:
+            top, _ = select_top_k(approx_scores[i], k)
+        hits += len(truth[i] & set(top.tolist()))
+    return hits / (k * len(queries))
+
+def main():
+    parser = argparse.ArgumentParser(description="向量量化召回率与内存基准测试")
+    parser.add_argument("--vectors", help="真实向量 .npy 文件（N x dim），默认使用合成数据")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[2.0, 4.0])
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    if args.vectors:
+        vectors = normalize_rows(np.load(args.vectors).astype(np.float32))
+    else:
+        vectors = synthetic_vectors(args.size + args.queries, args.dim, rng)
+    # 查询取自同分布的留出样本
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    size, dim = vectors.shape
+    k = args.top_k
+    
+    truth = [set(select_top_k(scores, k)[0].tolist()) for scores in queries @ vectors.T]
+    
+    start = time.perf_counter()
+    sq_codes, scale, low = scalar_quantize(vectors)
+    sq_scores = scalar_scores(queries, sq_codes, scale, low)
+    sq_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    codebooks, pq_codes = product_quantize(vectors, rng)
+    pq_scores = product_scores(queries, codebooks, pq_codes)
+    pq_time = time.perf_counter() - start
+    
+    approx = {"scalar": sq_scores, "product": pq_scores}
+    print(f"向量数={size} 维度={dim} 查询数={len(queries)} k={k}")
+    print(f"量化耗时: scalar {sq_time:.1f}s, product {pq_time:.1f}s")
+    
+    oversampling_columns = "".join(f" {'重排x' + format(o, 'g'):>10}" for o in args.oversampling)
+    print(f"{'方案':>8} {'内存/向量(B)':>12} {'内存总计(MB)':>12} {'磁盘(MB)':>10} {'不重排':>10}{oversampling_columns}")
+    for name, profile in COLLECTION_PROFILES.items():
+        ram = profile.memory_bytes_per_vector(dim)
+        disk = size * dim * 4 / 2 ** 20 if profile.on_disk else 0.0
+        if profile.quantization is None:
+            recalls = ["1.000"] * (1 + len(args.oversampling))
+        else:
+            scores = approx[profile.quantization]
+            recalls = [f"{recall(scores, vectors, queries, truth, k):.3f}"] + [
+                f"{recall(scores, vectors, queries, truth, k, o):.3f}" for o in args.oversampling
+            ]
+        print(
+            f"{name:>8} {ram:>12.0f} {ram * size / 2 ** 20:>12.1f} {disk:>10.1f} "
+            + " ".join(f"{value:>10}" for value in recalls)
+        )
+
+if __name__ == "__main__":
+    main()
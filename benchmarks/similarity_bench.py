@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+相似度检索基准测试
+对比逐条循环计算与 SimilarityIndex 矩阵检索在不同候选规模下的耗时
+
+用法: python benchmarks/similarity_bench.py [--dim 1536] [--queries 32] [--top-k 10]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.similarity import SimilarityIndex
+
+def loop_search(query, candidates, top_k):
+    """原实现：逐条计算余弦相似度后全量排序"""
+    similarities = []
+    for i, candidate in enumerate(candidates):
+        vec1 = np.array(query)
+        vec2 = np.array(candidate)
+        similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+        similarities.append((i, similarity))
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:top_k]
+
+def timed(func, *args, repeat=3):
+    """返回多次运行中的最短耗时（秒）和最后一次的结果"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="相似度检索基准测试")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--loop-max", type=int, default=10000,
+                        help="逐条循环实现只在不超过该规模时运行")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    
+    print(f"维度={args.dim} 查询数={args.queries} top_k={args.top_k}")
+    print(f"{'候选数':>8} {'建索引(ms)':>12} {'单查询(ms)':>12} {'批量/查询(ms)':>14} {'循环/查询(ms)':>14}")
+    
+    for size in args.sizes:
+        candidates = rng.standard_normal((size, args.dim), dtype=np.float32)
+        
+        build_time, index = timed(SimilarityIndex, candidates, repeat=1)
+        single_time, single = timed(index.search, queries[0], args.top_k)
+        batch_time, batch = timed(index.search_many, queries, args.top_k)
+        
+        # 批量与单查询结果一致
+        assert [i for i, _ in batch[0]] == [i for i, _ in single]
+        
+        loop_column = "-"
+        if size <= args.loop_max:
+            loop_time, looped = timed(loop_search, queries[0], candidates, args.top_k, repeat=1)
+            assert [i for i, _ in looped] == [i for i, _ in single]
+            loop_column = f"{loop_time * 1000:.2f}"
+        
+        print(
+            f"{size:>8} {build_time * 1000:>12.2f} {single_time * 1000:>12.2f} "
+            f"{batch_time * 1000 / args.queries:>14.3f} {loop_column:>14}"
+        )
+
+if __name__ == "__main__":
+    main()
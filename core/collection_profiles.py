@@ -0,0 +1,73 @@
+"""
+InnoCore AI 向量集合存储方案
+在内存占用与召回率之间取舍：全内存 float32、原始向量落盘、int8 标量量化和乘积量化
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from qdrant_client.models import (
+    CompressionRatio, Distance, ProductQuantization, ProductQuantizationConfig,
+    QuantizationConfig, QuantizationSearchParams, ScalarQuantization,
+    ScalarQuantizationConfig, ScalarType, SearchParams, VectorParams
+)
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """集合存储方案"""
+    name: str
+    on_disk: bool = False  # 原始向量是否存放在磁盘（内存映射）
+    quantization: Optional[str] = None  # None、"scalar" 或 "product"
+    pq_compression: CompressionRatio = CompressionRatio.X16
+    description: str = ""
+    
+    def vectors_config(self, dimension: int) -> VectorParams:
+        return VectorParams(size=dimension, distance=Distance.COSINE, on_disk=self.on_disk)
+    
+    def quantization_config(self) -> Optional[QuantizationConfig]:
+        """量化向量常驻内存，原始向量按 on_disk 存放，用于重排"""
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "product":
+            return ProductQuantization(
+                product=ProductQuantizationConfig(compression=self.pq_compression, always_ram=True)
+            )
+        return None
+    
+    def search_params(self, oversampling: float = 2.0) -> Optional[SearchParams]:
+        """量化集合先按量化向量取 limit * oversampling 个候选，再用原始向量重新打分"""
+        if self.quantization is None:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling)
+        )
+    
+    def memory_bytes_per_vector(self, dimension: int) -> float:
+        """每个向量常驻内存的字节数（不含 HNSW 图和 payload）"""
+        if self.quantization == "scalar":
+            return dimension
+        if self.quantization == "product":
+            return dimension * 4 / int(self.pq_compression.value[1:])
+        return 0 if self.on_disk else dimension * 4
+
+COLLECTION_PROFILES: Dict[str, CollectionProfile] = {
+    profile.name: profile
+    for profile in (
+        CollectionProfile("memory", description="float32 全部常驻内存，召回率最高"),
+        CollectionProfile("on_disk", on_disk=True,
+                          description="原始向量内存映射到磁盘，依赖页缓存，冷查询较慢"),
+        CollectionProfile("scalar", on_disk=True, quantization="scalar",
+                          description="int8 标量量化常驻内存（约 1/4），原始向量在磁盘用于重排"),
+        CollectionProfile("product", on_disk=True, quantization="product",
+                          description="乘积量化常驻内存（约 1/16），原始向量在磁盘用于重排"),
+    )
+}
+
+def get_collection_profile(name: str) -> CollectionProfile:
+    """按名称获取存储方案"""
+    try:
+        return COLLECTION_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"未知的集合存储方案: {name}，可选: {', '.join(COLLECTION_PROFILES)}")
@@ -23,6 +23,7 @@ class VectorDBType(Enum):
     QDRANT = "qdrant"
     CHROMA = "chroma"
     PINECONE = "pinecone"
+    LOCAL = "local"  # 进程内 HNSW 索引，无需外部服务
 
 @dataclass
 class LLMConfig:
@@ -36,6 +37,14 @@ class LLMConfig:
     temperature: float = 0.7
     max_tokens: int = 4000
     timeout: int = 60
+    context_window: Optional[int] = None  # 为空时按模型名推断
+    max_prompt_tokens: Optional[int] = 8000  # 单次提示词 token 上限（控制成本），0 或空表示只受上下文窗口限制
+    tokenizer: str = "auto"  # auto, tiktoken, heuristic（离线启发式）
+    # 异步客户端连接池配置（按提供商共享）
+    use_async_client: bool = True
+    max_connections: int = 50
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
 
 @dataclass
 class VectorDBConfig:
@@ -45,7 +54,40 @@ class VectorDBConfig:
     port: int = 6333
     api_key: Optional[str] = None
     collection_name_prefix: str = "innocore"
-    embedding_model: str = "text-embedding-3-small"
+    prefer_grpc: bool = False
+    pool_size: int = 32  # 客户端连接池大小
+    timeout: int = 30  # 客户端 HTTP 请求超时上限（秒）
+    search_timeout: int = 5  # 检索/滚动查询的服务端超时（秒）
+    write_timeout: int = 30  # 写入/删除的调用超时（秒）
+    upsert_batch_size: int = 256  # 批量导入时每次 upsert 的点数
+    upsert_concurrency: int = 4  # 批量导入时同时处理的块数
+    lexical_index_enabled: bool = True  # 混合搜索是否启用 BM25 词法检索
+    lexical_index_dir: str = "data/lexical_index"
+    hybrid_oversample: int = 4  # 每路检索的候选数 = top_k * hybrid_oversample
+    rrf_k: int = 60  # 倒数排名融合的平滑常数
+    slim_payloads: bool = True  # Postgres 中有记录的论文只保存检索所需字段，摘要等按需回查
+    search_cache_enabled: bool = True  # 缓存混合搜索的分路候选和查询向量
+    search_cache_max_entries: int = 2048
+    search_cache_ttl: int = 600  # 秒；写入会通过版本号立即失效相关条目
+    # 集合存储方案：memory（float32 全内存）、on_disk（原始向量在磁盘）、
+    # scalar（int8 标量量化常驻内存）、product（乘积量化常驻内存），后两者原始向量在磁盘用于重排
+    l1_collection_profile: str = "memory"
+    l2_collection_profile: str = "memory"
+    quantization_oversampling: float = 2.0  # 量化检索的过采样倍数，候选用原始向量重新打分
+    # 本地向量索引（db_type=LOCAL）
+    local_path: str = "data/vector_index"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef_search: int = 128  # 纯 Python HNSW，性能和召回率见 core/local_vector_index.py
+    local_exact_search_threshold: int = 10000  # 候选数不超过该值时直接精确检索（召回率 100%）
+    embedding_model: str = "text-embedding-3-small"  # 设为 "local" 使用本地离线向量后端
+    local_embedding_dim: int = 384  # 本地向量后端的输出维度
+    embedding_dimensions: Optional[int] = None  # text-embedding-3 系列可截短输出维度（如 512、1024）
+    embedding_max_tokens: int = 8191  # embedding 模型单条输入 token 上限
+    embedding_batch_max_tokens: int = 100000  # 单次批量请求的 token 预算
+    embedding_batch_max_items: int = 512  # 单次批量请求的最大条数
+    embedding_concurrency: int = 4  # 同时进行的 embedding 请求数
+    embedding_max_retries: int = 2
 
 @dataclass
 class DatabaseConfig:
@@ -65,6 +107,9 @@ class RedisConfig:
     db: int = 0
     password: Optional[str] = None
     max_connections: int = 20
+    enabled: bool = False  # 启用后作为跨进程共享的缓存层；host 为 "memory" 时使用进程内替身
+    key_prefix: str = "innocore:"
+    socket_timeout: float = 1.0  # 秒；Redis 不可用时尽快回退到数据库
 
 @dataclass
 class ExternalAPIConfig:
@@ -114,9 +159,23 @@ class InnoCoreConfig:
     
     # 性能配置
     cache_ttl: int = 3600  # 缓存过期时间(秒)
+    cache_dir: str = "data/cache"  # 磁盘缓存目录
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1024
+    embedding_cache_max_bytes: int = 256 * 1024 * 1024  # 向量内存缓存字节预算
+    embedding_cache_disk_enabled: bool = True
+    db_cache_enabled: bool = True  # 论文/用户/分析报告的读穿透缓存
+    db_cache_max_entries: int = 4096
+    db_cache_local_ttl: int = 30  # 秒；启用 Redis 时进程内层的过期时间，限制其他进程写入后的陈旧时间
     batch_size: int = 10
     max_concurrent_requests: int = 50
     
+    # 共享状态配置：多个 API worker 时使用 "redis"，任务状态、任务事件和缓存失效通过 Redis 共享
+    state_backend: str = "memory"  # "memory" 或 "redis"
+    task_history_limit: int = 1000
+    task_history_ttl: int = 7 * 24 * 3600  # 秒；已结束任务记录的保留时间（Redis 后端）
+    task_claim_ttl: int = 60  # 秒；任务认领的过期时间，执行中的 worker 按 1/3 周期续期，过期后任务视为无主
+    
     def __post_init__(self):
         """初始化后处理"""
         # 从环境变量加载配置
@@ -127,14 +186,27 @@ class InnoCoreConfig:
         env_model = os.getenv("OPENAI_MODEL") or os.getenv("LLM_MODEL")
         if env_model:
             self.llm.model_name = env_model
+        self.llm.tokenizer = os.getenv("LLM_TOKENIZER", self.llm.tokenizer)
+        self.llm.max_prompt_tokens = int(os.getenv("LLM_MAX_PROMPT_TOKENS", self.llm.max_prompt_tokens or 0)) or None
+        self.vector_db.embedding_model = os.getenv("EMBEDDING_MODEL", self.vector_db.embedding_model)
+        self.vector_db.db_type = VectorDBType(os.getenv("VECTOR_DB_TYPE", self.vector_db.db_type.value))
         
         self.database.password = self.database.password or os.getenv("DATABASE_PASSWORD")
         self.redis.password = self.redis.password or os.getenv("REDIS_PASSWORD")
+        self.redis.host = os.getenv("REDIS_HOST", self.redis.host)
+        self.redis.port = int(os.getenv("REDIS_PORT", self.redis.port))
+        self.redis.enabled = os.getenv("REDIS_ENABLED", str(self.redis.enabled)).lower() == "true"
         
         self.external_apis.crossref_api_key = self.external_apis.crossref_api_key or os.getenv("CROSSREF_API_KEY")
         self.external_apis.google_scholar_api_key = self.external_apis.google_scholar_api_key or os.getenv("GOOGLE_SCHOLAR_API_KEY")
         self.external_apis.serpapi_key = self.external_apis.serpapi_key or os.getenv("SERPAPI_KEY")
         
+        self.cache_ttl = int(os.getenv("CACHE_TTL", self.cache_ttl))
+        self.cache_dir = os.getenv("CACHE_DIR", self.cache_dir)
+        self.llm_cache_enabled = os.getenv("LLM_CACHE_ENABLED", str(self.llm_cache_enabled)).lower() == "true"
+        self.state_backend = os.getenv("STATE_BACKEND", self.state_backend).lower()
+        self.db_cache_enabled = os.getenv("DB_CACHE_ENABLED", str(self.db_cache_enabled)).lower() == "true"
+        
         self.debug = os.getenv("DEBUG", "false").lower() == "true"
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
 
@@ -4,6 +4,8 @@ InnoCore AI 数据库管理模块
 
 import asyncio
 import asyncpg
+import logging
+import re
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 import json
@@ -11,7 +13,45 @@ import uuid
 from contextlib import asynccontextmanager
 
 from .config import get_config
-from .exceptions import DatabaseException
+from .db_cache import ReadThroughCache
+from .redis_client import create_redis_client
+from .exceptions import DatabaseException, ValidationException
+from .pagination import decode_cursor, make_page
+from .text import CJK_RANGES
+
+logger = logging.getLogger(__name__)
+
+# 论文表对外返回的列（不含 search_vector 等内部列）
+PAPER_COLUMNS = ("id", "title", "authors", "abstract", "doi", "file_path",
+                 "content_hash", "is_preset", "created_at")
+
+# 全文检索配置：标题权重 A、摘要权重 B
+TEXT_SEARCH_CONFIG = "english"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce(abstract, '')), 'B')"
+)
+
+# 默认文本检索配置按空白切词，无法切分中日韩文本，这类查询改走 ILIKE/三元组检索
+_CJK_PATTERN = re.compile(rf"[{CJK_RANGES}]")
+_TSQUERY_TERM_PATTERN = re.compile(r"[^\W_]+")
+
+def paper_columns(alias: str = None) -> str:
+    """论文表列清单，alias 为联表查询时的表别名"""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(prefix + column for column in PAPER_COLUMNS)
+
+def build_prefix_tsquery(query: str) -> str:
+    """把用户输入转换为前缀匹配的 tsquery 文本（各词 AND 连接）
+    
+    只保留字母数字词元，tsquery 运算符和标点全部丢弃，因此结果可以安全地传给 to_tsquery。
+    """
+    terms = _TSQUERY_TERM_PATTERN.findall(query.lower())
+    return " & ".join(f"{term}:*" for term in terms)
+
+def escape_like(text: str) -> str:
+    """转义 LIKE 模式中的通配符"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 class DatabaseManager:
     """数据库管理器"""
@@ -19,6 +59,11 @@ class DatabaseManager:
     def __init__(self):
         self.config = get_config().database
         self.pool = None
+        # 全文检索和 pg_trgm 依赖数据库版本与扩展权限，不可用时退回 ILIKE
+        self.fulltext_enabled = False
+        self.trigram_enabled = False
+        # 论文、用户和分析报告的读穿透缓存，Redis 层在 initialize 中按配置挂接
+        self.cache = ReadThroughCache(name="db")
     
     async def initialize(self):
         """初始化数据库连接池"""
@@ -35,6 +80,9 @@ class DatabaseManager:
             await self._create_tables()
         except Exception as e:
             raise DatabaseException(f"数据库初始化失败: {str(e)}")
+        
+        if self.cache.redis is None:
+            self.cache.attach_redis(await create_redis_client())
     
     async def _create_tables(self):
         """创建数据库表"""
@@ -98,12 +146,43 @@ class DatabaseManager:
         CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi);
         CREATE INDEX IF NOT EXISTS idx_user_paper_relations_user_id ON user_paper_relations(user_id);
         CREATE INDEX IF NOT EXISTS idx_user_paper_relations_paper_id ON user_paper_relations(paper_id);
+        CREATE INDEX IF NOT EXISTS idx_user_paper_relations_user_added
+            ON user_paper_relations(user_id, added_at DESC, paper_id DESC);
         CREATE INDEX IF NOT EXISTS idx_analysis_reports_paper_id ON analysis_reports(paper_id);
         CREATE INDEX IF NOT EXISTS idx_analysis_reports_user_id ON analysis_reports(generated_for_user_id);
         """
         
         async with self.pool.acquire() as conn:
             await conn.execute(create_tables_sql)
+            await self._create_search_indexes(conn)
+    
+    async def _create_search_indexes(self, conn):
+        """创建论文全文检索列和索引
+        
+        - search_vector：标题（权重 A）和摘要（权重 B）的 tsvector 生成列 + GIN 索引，
+          需要 PostgreSQL 12+；
+        - pg_trgm 三元组 GIN 索引：用于标题模糊匹配，以及 CJK 查询的 ILIKE 回退。
+        每一步失败都只记录警告，search_papers 会按可用能力选择查询方式。
+        """
+        try:
+            await conn.execute(f"""
+            ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED;
+            CREATE INDEX IF NOT EXISTS idx_papers_search_vector ON papers USING GIN (search_vector);
+            """)
+            self.fulltext_enabled = True
+        except Exception as e:
+            logger.warning(f"论文全文检索列创建失败，搜索退回 ILIKE: {e}")
+        
+        try:
+            await conn.execute("""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS idx_papers_title_trgm ON papers USING GIN (title gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS idx_papers_abstract_trgm ON papers USING GIN (abstract gin_trgm_ops);
+            """)
+            self.trigram_enabled = True
+        except Exception as e:
+            logger.warning(f"pg_trgm 不可用，标题模糊匹配已禁用: {e}")
     
     @asynccontextmanager
     async def get_connection(self):
@@ -128,7 +207,10 @@ class DatabaseManager:
             return str(user_id)
     
     async def get_user(self, user_id: str) -> Optional[Dict]:
-        """获取用户信息"""
+        """获取用户信息（读穿透缓存）"""
+        return await self.cache.get_or_load("user", str(user_id), lambda: self._fetch_user(user_id))
+    
+    async def _fetch_user(self, user_id: str) -> Optional[Dict]:
         async with self.get_connection() as conn:
             row = await conn.fetchrow(
                 "SELECT * FROM users WHERE id = $1", user_id
@@ -142,7 +224,8 @@ class DatabaseManager:
                 "UPDATE users SET profile = $1 WHERE id = $2",
                 json.dumps(profile), user_id
             )
-            return result == "UPDATE 1"
+        await self.cache.invalidate("user", str(user_id))
+        return result == "UPDATE 1"
     
     # 论文相关操作
     async def create_paper(self, title: str, authors: List[str], 
@@ -159,37 +242,198 @@ class DatabaseManager:
                 """,
                 title, authors, abstract, doi, file_path, content_hash, is_preset
             )
-            return str(paper_id)
+        await self.cache.invalidate("paper", str(paper_id))
+        return str(paper_id)
+    
+    async def create_papers(self, papers: List[Dict[str, Any]]) -> List[Dict]:
+        """批量创建论文记录
+        
+        整批记录序列化为一个 JSON 参数，由 jsonb_to_recordset 展开后一条 INSERT 写入；
+        DOI 或内容哈希已存在的记录被 ON CONFLICT DO NOTHING 跳过，空字符串按 NULL 处理。
+        
+        Args:
+            papers: 论文字典列表，字段同 create_paper 的参数
+            
+        Returns:
+            实际插入的记录 [{"id", "doi", "content_hash"}]，已存在而被跳过的不在其中
+        """
+        if not papers:
+            return []
+        
+        records = [
+            {
+                "title": paper.get("title") or "",
+                "authors": list(paper.get("authors") or []),
+                "abstract": paper.get("abstract"),
+                "doi": paper.get("doi"),
+                "file_path": paper.get("file_path"),
+                "content_hash": paper.get("content_hash"),
+                "is_preset": bool(paper.get("is_preset", False))
+            }
+            for paper in papers
+        ]
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                INSERT INTO papers (title, authors, abstract, doi, file_path, content_hash, is_preset)
+                SELECT r.title, r.authors, r.abstract, NULLIF(r.doi, ''), NULLIF(r.file_path, ''),
+                       NULLIF(r.content_hash, ''), r.is_preset
+                FROM jsonb_to_recordset($1::jsonb) AS r(
+                    title TEXT, authors TEXT[], abstract TEXT, doi VARCHAR(255),
+                    file_path TEXT, content_hash VARCHAR(64), is_preset BOOLEAN
+                )
+                ON CONFLICT DO NOTHING
+                RETURNING id, doi, content_hash
+                """,
+                json.dumps(records, ensure_ascii=False)
+            )
+        for row in rows:
+            await self.cache.invalidate("paper", str(row["id"]))
+        return [{"id": str(row["id"]), "doi": row["doi"], "content_hash": row["content_hash"]} for row in rows]
     
     async def get_paper(self, paper_id: str) -> Optional[Dict]:
-        """获取论文信息"""
+        """获取论文信息（读穿透缓存）"""
+        return await self.cache.get_or_load("paper", str(paper_id), lambda: self._fetch_paper(paper_id))
+    
+    async def _fetch_paper(self, paper_id: str) -> Optional[Dict]:
         async with self.get_connection() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM papers WHERE id = $1", paper_id
+                f"SELECT {paper_columns()} FROM papers WHERE id = $1", paper_id
             )
             return dict(row) if row else None
     
+    async def get_papers(self, paper_ids: List[str]) -> Dict[str, Dict]:
+        """批量获取论文信息，一次查询取回全部记录
+        
+        不是合法 UUID 的 ID（如外部导入的 arXiv ID）直接跳过。
+        
+        Returns:
+            {论文ID: 论文信息}，不存在的 ID 不出现在结果中
+        """
+        valid_ids = []
+        for paper_id in dict.fromkeys(str(paper_id) for paper_id in paper_ids if paper_id):
+            try:
+                valid_ids.append(uuid.UUID(paper_id))
+            except ValueError:
+                continue
+        if not valid_ids:
+            return {}
+        
+        papers = await self.cache.get_many_or_load(
+            "paper", [str(paper_id) for paper_id in valid_ids], self._fetch_papers
+        )
+        return {paper_id: paper for paper_id, paper in papers.items() if paper}
+    
+    async def _fetch_papers(self, paper_ids: List[str]) -> Dict[str, Dict]:
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(
+                f"SELECT {paper_columns()} FROM papers WHERE id = ANY($1::uuid[])", paper_ids
+            )
+            return {str(row["id"]): dict(row) for row in rows}
+    
     async def get_paper_by_hash(self, content_hash: str) -> Optional[Dict]:
         """根据内容哈希获取论文"""
         async with self.get_connection() as conn:
             row = await conn.fetchrow(
-                "SELECT * FROM papers WHERE content_hash = $1", content_hash
+                f"SELECT {paper_columns()} FROM papers WHERE content_hash = $1", content_hash
             )
             return dict(row) if row else None
     
-    async def search_papers(self, query: str, limit: int = 10, offset: int = 0) -> List[Dict]:
-        """搜索论文"""
+    def _search_modes(self, query: str, tsquery: str) -> List[str]:
+        """按可用能力和查询文本决定依次尝试的检索方式"""
+        if self.fulltext_enabled and tsquery and not _CJK_PATTERN.search(query):
+            return ["fulltext", "fuzzy" if self.trigram_enabled else "substring"]
+        return ["substring"]
+    
+    def _search_clause(self, mode: str, query: str, tsquery: str):
+        """返回某种检索方式的 (FROM 子句, WHERE 条件, 排序分数表达式, 参数)"""
+        if mode == "fulltext":
+            return (
+                f"papers, to_tsquery('{TEXT_SEARCH_CONFIG}', $1) AS q",
+                "search_vector @@ q", "ts_rank(search_vector, q)", [tsquery]
+            )
+        if mode == "fuzzy":
+            return "papers", "title % $1", "similarity(title, $1)", [query]
+        # 子串匹配：标题命中优先，其次按标题相似度
+        pattern = f"%{escape_like(query)}%"
+        if self.trigram_enabled:
+            return (
+                "papers", "(title ILIKE $1 OR abstract ILIKE $1)",
+                "((title ILIKE $1)::int + similarity(title, $2))::real", [pattern, query]
+            )
+        return "papers", "(title ILIKE $1 OR abstract ILIKE $1)", "(title ILIKE $1)::int::real", [pattern]
+    
+    async def get_papers_by_hashes(self, content_hashes: List[str]) -> Dict[str, Dict]:
+        """根据内容哈希批量获取论文，返回 {内容哈希: 论文信息}"""
+        content_hashes = list(dict.fromkeys(h for h in content_hashes if h))
+        if not content_hashes:
+            return {}
+        
         async with self.get_connection() as conn:
             rows = await conn.fetch(
-                """
-                SELECT * FROM papers 
-                WHERE title ILIKE $1 OR abstract ILIKE $1
-                ORDER BY created_at DESC
-                LIMIT $2 OFFSET $3
-                """,
-                f"%{query}%", limit, offset
+                f"SELECT {paper_columns()} FROM papers WHERE content_hash = ANY($1::varchar[])",
+                content_hashes
             )
-            return [dict(row) for row in rows]
+            return {row["content_hash"]: dict(row) for row in rows}
+    
+    async def search_papers(self, query: str, limit: int = 10, offset: int = 0) -> List[Dict]:
+        """搜索论文（偏移分页，深翻页请使用 search_papers_page 的游标）"""
+        page = await self.search_papers_page(query, limit, offset=offset)
+        return page["items"]
+    
+    async def search_papers_page(self, query: str, limit: int = 10, cursor: str = None,
+                                 offset: int = 0) -> Dict[str, Any]:
+        """搜索论文，按 (rank, created_at, id) 键集分页
+        
+        英文等按空白分词的查询走 search_vector 全文检索：每个词做前缀匹配，按 ts_rank 排序；
+        全文检索没有任何命中时（拼写错误、词干不匹配等）退回标题三元组模糊匹配。
+        含 CJK 字符的查询默认文本检索配置无法切词，改用 ILIKE 子串匹配（由三元组索引加速）。
+        游标记录所用的检索方式，后续页不再重新判断。
+        
+        Returns:
+            {"items": [...], "next_cursor": str 或 None, "has_more": bool}
+        """
+        query = " ".join(str(query).split())
+        if not query:
+            return make_page([], limit, ())
+        
+        tsquery = build_prefix_tsquery(query)
+        keyset = None
+        if cursor:
+            state = decode_cursor(cursor, size=3)
+            modes, keyset, offset = [state["mode"]], state["values"], 0
+            if state["mode"] not in ("fulltext", "fuzzy", "substring"):
+                raise ValidationException("无效的分页游标: 未知的检索方式")
+        else:
+            modes = self._search_modes(query, tsquery)
+        
+        async with self.get_connection() as conn:
+            for index, mode in enumerate(modes):
+                from_clause, where, rank, args = self._search_clause(mode, query, tsquery)
+                conditions = [where]
+                if keyset:
+                    n = len(args)
+                    conditions.append(f"({rank}, created_at, id) < (${n + 1}::real, ${n + 2}, ${n + 3})")
+                    args = args + keyset
+                n = len(args)
+                rows = await conn.fetch(
+                    f"""
+                    SELECT {paper_columns()}, {rank} AS rank
+                    FROM {from_clause}
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY rank DESC, created_at DESC, id DESC
+                    LIMIT ${n + 1} OFFSET ${n + 2}
+                    """,
+                    *args, limit + 1, offset
+                )
+                if rows or index == len(modes) - 1:
+                    break
+                # 偏移越界和完全无命中都会得到空页，只有后者需要换下一种检索方式
+                if offset > 0 and await conn.fetchval(
+                    f"SELECT EXISTS (SELECT 1 FROM {from_clause} WHERE {where})", *args
+                ):
+                    break
+            return make_page([dict(row) for row in rows], limit, ("rank", "created_at", "id"), mode)
     
     # 用户论文关系操作
     async def add_paper_to_user(self, user_id: str, paper_id: str, 
@@ -213,20 +457,39 @@ class DatabaseManager:
                 return False
     
     async def get_user_papers(self, user_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
-        """获取用户的论文列表"""
+        """获取用户的论文列表（偏移分页，深翻页请使用 get_user_papers_page 的游标）"""
+        page = await self.get_user_papers_page(user_id, limit, offset=offset)
+        return page["items"]
+    
+    async def get_user_papers_page(self, user_id: str, limit: int = 50, cursor: str = None,
+                                   offset: int = 0) -> Dict[str, Any]:
+        """获取用户的论文列表，按 (added_at, id) 键集分页
+        
+        由 (user_id, added_at, paper_id) 复合索引支持，任意一页都只需从索引位置读取 limit 行。
+        
+        Returns:
+            {"items": [...], "next_cursor": str 或 None, "has_more": bool}
+        """
+        keyset = ""
+        args = [user_id, limit + 1, offset]
+        if cursor:
+            args[2] = 0
+            args.extend(decode_cursor(cursor, size=2)["values"])
+            keyset = "AND (upr.added_at, upr.paper_id) < ($4, $5)"
+        
         async with self.get_connection() as conn:
             rows = await conn.fetch(
-                """
-                SELECT p.*, upr.tags, upr.rating, upr.is_read, upr.added_at
+                f"""
+                SELECT {paper_columns("p")}, upr.tags, upr.rating, upr.is_read, upr.added_at
                 FROM papers p
                 JOIN user_paper_relations upr ON p.id = upr.paper_id
-                WHERE upr.user_id = $1
-                ORDER BY upr.added_at DESC
+                WHERE upr.user_id = $1 {keyset}
+                ORDER BY upr.added_at DESC, upr.paper_id DESC
                 LIMIT $2 OFFSET $3
                 """,
-                user_id, limit, offset
+                *args
             )
-            return [dict(row) for row in rows]
+            return make_page([dict(row) for row in rows], limit, ("added_at", "id"))
     
     # 分析报告操作
     async def create_analysis_report(self, paper_id: str, summary: str,
@@ -245,10 +508,18 @@ class DatabaseManager:
                 paper_id, user_id, summary, innovation_point, 
                 limitation, future_idea, json.dumps(vector_ids or {})
             )
-            return str(report_id)
+        # 公共报告对所有用户可见，因此整篇论文的报告缓存一起失效
+        await self.cache.invalidate("report", str(paper_id))
+        return str(report_id)
     
     async def get_analysis_report(self, paper_id: str, user_id: str = None) -> Optional[Dict]:
-        """获取分析报告"""
+        """获取分析报告（读穿透缓存，以论文ID为键、用户ID为字段）"""
+        return await self.cache.get_or_load(
+            "report", str(paper_id), lambda: self._fetch_analysis_report(paper_id, user_id),
+            field=str(user_id) if user_id else ""
+        )
+    
+    async def _fetch_analysis_report(self, paper_id: str, user_id: str = None) -> Optional[Dict]:
         async with self.get_connection() as conn:
             if user_id:
                 row = await conn.fetchrow(
@@ -294,10 +565,15 @@ class DatabaseManager:
             )
             return dict(row) if row else None
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取读穿透缓存统计信息"""
+        return self.cache.get_stats()
+    
     async def close(self):
         """关闭数据库连接池"""
         if self.pool:
             await self.pool.close()
+        await self.cache.close()
 
 # 全局数据库管理器实例
 db_manager = DatabaseManager()
\ No newline at end of file
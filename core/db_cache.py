@@ -0,0 +1,255 @@
+"""
+InnoCore AI 数据库读穿透缓存
+进程内 LRU + 可选 Redis 两级缓存，用于论文、用户和分析报告等每个请求都会读取的热点记录
+"""
+
+import copy
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from .cache import TTLLRUCache
+from .config import get_config
+from .redis_client import WatchError
+from .state_backend import cache_invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"__uuid__": str(value)}
+    return str(value)
+
+def _json_object_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+        if "__uuid__" in obj:
+            return uuid.UUID(obj["__uuid__"])
+    return obj
+
+def encode_value(value: Any) -> str:
+    """序列化数据库记录，datetime 和 UUID 读回后类型不变"""
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+def decode_value(raw: str) -> Any:
+    return json.loads(raw, object_hook=_json_object_hook)
+
+class ReadThroughCache:
+    """读穿透缓存
+    
+    条目按 (命名空间, 键, 字段) 组织，失效以键为单位，同一个键下的所有字段一起清除。
+    例如分析报告以论文ID为键、用户ID为字段，新报告生成后该论文所有用户的视图同时失效。
+    
+    - 内存层：TTLLRUCache，每个键对应一个 {字段: 值} 字典，读取时返回副本；
+    - Redis 层（可选）：每个键对应一个哈希，跨进程共享，EXPIRE 设置过期时间。
+      每个键另有一个版本号，失效时 INCR；回源前读取版本号，写回时 WATCH 版本号做
+      check-and-set，回源期间任何 worker 的失效都会使写回放弃，旧值不会留在 Redis 里。
+      Redis 出错时只计数并记录警告，请求直接回源数据库。
+    失效会通过 cache_invalidation_bus 广播给其他 worker；广播是尽力而为的，
+    因此挂接 Redis 后内存层仍改用较短的 db_cache_local_ttl 作为兜底。
+    不缓存 None，避免"查询不存在 → 随后创建"的记录被旧的空结果遮住。
+    回源期间发生的任何失效都会使本次结果不写回缓存，防止旧值覆盖刚失效的键。
+    """
+    
+    def __init__(self, redis=None, ttl: int = None, max_entries: int = None,
+                 key_prefix: str = None, enabled: bool = None, name: str = None):
+        config = get_config()
+        self.ttl = ttl if ttl is not None else config.cache_ttl
+        self.enabled = config.db_cache_enabled if enabled is None else enabled
+        self.local_ttl = min(self.ttl, config.db_cache_local_ttl) if self.ttl else config.db_cache_local_ttl
+        self.memory = TTLLRUCache(max_entries=max_entries or config.db_cache_max_entries, ttl=self.ttl)
+        self.redis = None
+        self.attach_redis(redis)
+        self.key_prefix = (key_prefix if key_prefix is not None else config.redis.key_prefix) + "db:"
+        
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+        
+        # name 用于跨 worker 失效广播，未命名的缓存只在本进程内失效
+        self.name = name
+        if name:
+            cache_invalidation_bus.register(
+                name, lambda message: self.invalidate_local(message["namespace"], message["key"])
+            )
+    
+    def attach_redis(self, redis):
+        """挂接（或以 None 卸下）Redis 层"""
+        self.redis = redis
+        self.memory.ttl = self.local_ttl if redis is not None else self.ttl
+    
+    def _redis_key(self, namespace: str, key: Hashable) -> str:
+        return f"{self.key_prefix}{namespace}:{key}"
+    
+    def _redis_failed(self, action: str, error: Exception):
+        self.redis_errors += 1
+        logger.warning(f"Redis 缓存{action}失败，回退到数据库: {str(error)}")
+    
+    def _get_memory(self, namespace: str, key: Hashable, field: str) -> Any:
+        fields = self.memory.get((namespace, key))
+        if fields is None or field not in fields:
+            return _MISSING
+        return copy.deepcopy(fields[field])
+    
+    def _set_memory(self, namespace: str, key: Hashable, field: str, value: Any):
+        fields = dict(self.memory.get((namespace, key)) or {})
+        fields[field] = copy.deepcopy(value)
+        self.memory.set((namespace, key), fields)
+    
+    async def get_or_load(self, namespace: str, key: Hashable,
+                          loader: Callable[[], Awaitable[Any]], field: str = "") -> Any:
+        """依次查内存、Redis，都未命中时调用 loader 回源并写回两层缓存"""
+        if not self.enabled:
+            return await loader()
+        
+        value = self._get_memory(namespace, key, field)
+        if value is not _MISSING:
+            self.memory_hits += 1
+            return value
+        
+        if self.redis is not None:
+            try:
+                raw = await self.redis.hget(self._redis_key(namespace, key), field)
+                if raw is not None:
+                    value = decode_value(raw)
+                    self._set_memory(namespace, key, field, value)
+                    self.redis_hits += 1
+                    return value
+            except Exception as e:
+                self._redis_failed("读取", e)
+        
+        self.misses += 1
+        invalidations = self.invalidations
+        version = await self._get_version(namespace, key)
+        value = await loader()
+        if value is not None and invalidations == self.invalidations:
+            self._set_memory(namespace, key, field, value)
+            if version is not _MISSING:
+                await self._set_redis(namespace, key, field, value, version)
+        return value
+    
+    async def get_many_or_load(self, namespace: str, keys: List[Hashable],
+                               loader: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+                               ) -> Dict[Hashable, Any]:
+        """批量读取：内存命中的直接返回，其余键用一次 loader 调用批量回源
+        
+        批量路径只查内存层，避免每个键一次 Redis 往返抵消批量查询的收益。
+        """
+        if not self.enabled:
+            return await loader(keys)
+        
+        results, missing = {}, []
+        for key in keys:
+            value = self._get_memory(namespace, key, "")
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                results[key] = value
+        self.memory_hits += len(results)
+        self.misses += len(missing)
+        
+        if missing:
+            invalidations = self.invalidations
+            loaded = await loader(missing)
+            if invalidations == self.invalidations:
+                for key, value in loaded.items():
+                    if value is not None:
+                        self._set_memory(namespace, key, "", value)
+            results.update(loaded)
+        return results
+    
+    def _version_key(self, namespace: str, key: Hashable) -> str:
+        return f"{self.key_prefix}ver:{namespace}:{key}"
+    
+    async def _get_version(self, namespace: str, key: Hashable) -> Any:
+        """回源前读取键的版本号；未挂接 Redis 或读取失败时返回 _MISSING（不写回 Redis）"""
+        if self.redis is None:
+            return _MISSING
+        try:
+            return await self.redis.get(self._version_key(namespace, key))
+        except Exception as e:
+            self._redis_failed("读取版本", e)
+            return _MISSING
+    
+    async def _set_redis(self, namespace: str, key: Hashable, field: str, value: Any,
+                         version: Optional[str]):
+        """版本号仍为 version 时才写回（WATCH/MULTI check-and-set）"""
+        redis_key = self._redis_key(namespace, key)
+        version_key = self._version_key(namespace, key)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) != version:
+                    return
+                pipe.multi()
+                pipe.hset(redis_key, field, encode_value(value))
+                if self.ttl:
+                    pipe.expire(redis_key, self.ttl)
+                await pipe.execute()
+        except WatchError:
+            # 回源期间其他 worker 使该键失效，放弃写回
+            pass
+        except Exception as e:
+            self._redis_failed("写入", e)
+    
+    def invalidate_local(self, namespace: str, key: Hashable):
+        """只清除本进程内存层中的键（处理其他 worker 的失效广播）"""
+        self.invalidations += 1
+        self.memory.delete((namespace, key))
+    
+    async def invalidate(self, namespace: str, key: Hashable):
+        """使某个键下的全部字段失效"""
+        self.invalidate_local(namespace, key)
+        if self.name:
+            cache_invalidation_bus.publish(self.name, namespace=namespace, key=key)
+        if self.redis is not None:
+            version_key = self._version_key(namespace, key)
+            try:
+                # 先递增版本号再删除，正在回源的写回都会因版本变化而放弃
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.incr(version_key)
+                    pipe.expire(version_key, self.ttl or self.local_ttl)
+                    pipe.delete(self._redis_key(namespace, key))
+                    await pipe.execute()
+            except Exception as e:
+                self._redis_failed("失效", e)
+    
+    def clear(self):
+        self.memory.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        hits = self.memory_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "redis_enabled": self.redis is not None,
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors,
+            "hit_rate": hits / total if total else 0.0
+        }
+    
+    async def close(self):
+        if self.redis is not None:
+            try:
+                await self.redis.aclose()
+            except Exception:
+                pass
+            self.redis = None
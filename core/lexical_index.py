@@ -0,0 +1,272 @@
+"""
+InnoCore AI 词法索引
+基于 SQLite 的磁盘倒排索引与 BM25 检索，支持增量更新和中日韩文本分词
+"""
+
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .text import CJK_RANGES
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(rf"[{CJK_RANGES}]+|[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_CJK_PATTERN = re.compile(rf"[{CJK_RANGES}]")
+
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have',
+    'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should',
+    'this', 'that', 'these', 'those', 'it', 'its', 'we', 'our', 'from', 'as'
+}
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：英文按单词切分并去停用词，CJK 文本切分为相邻字二元组
+    
+    CJK 二元组无需词典即可覆盖大多数中文词语，单字片段保留为单字。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer((text or "").lower()):
+        token = match.group(0)
+        if _CJK_PATTERN.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif token not in STOP_WORDS and len(token) > 1:
+            tokens.append(token)
+    return tokens
+
+def reciprocal_rank_fusion(ranked_lists: Iterable[Tuple[List[str], float]],
+                           k: int = 60) -> Dict[str, float]:
+    """
+    加权倒数排名融合 (RRF)
+    
+    Args:
+        ranked_lists: (按相关性降序的 ID 列表, 权重)
+        k: 平滑常数，越大排名靠后的结果贡献越平缓
+    
+    Returns:
+        ID -> 融合分数
+    """
+    scores: Dict[str, float] = {}
+    for ids, weight in ranked_lists:
+        for rank, doc_id in enumerate(ids, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return scores
+
+class LexicalIndex:
+    """BM25 倒排索引
+    
+    每个文档保存词频倒排表、文档长度和可选的 user_id（用于 L2 过滤）；
+    文档频率和语料统计随增删增量维护，检索时无需扫描全量文档。
+    """
+    
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_user ON documents (user_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS corpus_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO corpus_stats (id, doc_count, total_length) VALUES (0, 0, 0);
+            """
+        )
+        self._conn.commit()
+    
+    def _remove(self, doc_ids: List[str]):
+        """删除文档并回退统计（调用方持有锁并负责提交）"""
+        for doc_id in doc_ids:
+            row = self._conn.execute(
+                "SELECT length FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            
+            terms = [term for (term,) in self._conn.execute(
+                "SELECT term FROM postings WHERE doc_id = ?", (doc_id,)
+            )]
+            self._conn.executemany(
+                "UPDATE terms SET df = df - 1 WHERE term = ?", [(term,) for term in terms]
+            )
+            self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            self._conn.execute(
+                "UPDATE corpus_stats SET doc_count = doc_count - 1, total_length = total_length - ? WHERE id = 0",
+                (row[0],)
+            )
+        self._conn.execute("DELETE FROM terms WHERE df <= 0")
+    
+    def add_many(self, documents: Iterable[Tuple[str, str, Optional[str]]]):
+        """
+        批量写入或更新文档（同一事务）
+        
+        Args:
+            documents: (doc_id, 文本, user_id) 的可迭代对象；已存在的 doc_id 会被替换
+        """
+        # 同一批次内重复的 doc_id 只保留最后一条
+        documents = list({doc_id: (doc_id, text, user_id) for doc_id, text, user_id in documents}.values())
+        if not documents:
+            return
+        
+        with self._lock:
+            try:
+                self._remove([doc_id for doc_id, _, _ in documents])
+                
+                added_length = 0
+                df_updates: Counter = Counter()
+                for doc_id, text, user_id in documents:
+                    term_counts = Counter(tokenize(text))
+                    length = sum(term_counts.values())
+                    added_length += length
+                    df_updates.update(term_counts.keys())
+                    
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO documents (doc_id, user_id, length) VALUES (?, ?, ?)",
+                        (doc_id, user_id, length)
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                        [(term, doc_id, tf) for term, tf in term_counts.items()]
+                    )
+                
+                self._conn.executemany(
+                    "INSERT INTO terms (term, df) VALUES (?, ?) "
+                    "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                    list(df_updates.items())
+                )
+                self._conn.execute(
+                    "UPDATE corpus_stats SET doc_count = doc_count + ?, total_length = total_length + ? WHERE id = 0",
+                    (len(documents), added_length)
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+    
+    def add(self, doc_id: str, text: str, user_id: str = None):
+        """写入或更新单个文档"""
+        self.add_many([(doc_id, text, user_id)])
+    
+    def delete(self, doc_ids: Iterable[str]):
+        """删除文档"""
+        with self._lock:
+            self._remove(list(doc_ids))
+            self._conn.commit()
+    
+    def delete_user(self, user_id: str):
+        """删除某个用户的全部文档"""
+        with self._lock:
+            doc_ids = [doc_id for (doc_id,) in self._conn.execute(
+                "SELECT doc_id FROM documents WHERE user_id = ?", (user_id,)
+            )]
+            self._remove(doc_ids)
+            self._conn.commit()
+    
+    def search(self, query: str, top_k: int = 10,
+               user_id: str = None) -> List[Tuple[str, float]]:
+        """
+        BM25 检索
+        
+        Args:
+            query: 查询文本
+            top_k: 返回数量
+            user_id: 只检索该用户的文档
+        
+        Returns:
+            [(doc_id, BM25 分数), ...]，按分数降序
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        
+        with self._lock:
+            doc_count, total_length = self._conn.execute(
+                "SELECT doc_count, total_length FROM corpus_stats WHERE id = 0"
+            ).fetchone()
+            if doc_count == 0:
+                return []
+            average_length = total_length / doc_count
+            
+            placeholders = ",".join("?" * len(terms))
+            idf = {
+                term: math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                for term, df in self._conn.execute(
+                    f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms
+                )
+            }
+            if not idf:
+                return []
+            
+            sql = (
+                "SELECT p.term, p.doc_id, p.tf, d.length FROM postings p "
+                "JOIN documents d ON d.doc_id = p.doc_id "
+                f"WHERE p.term IN ({','.join('?' * len(idf))})"
+            )
+            params: List = list(idf.keys())
+            if user_id is not None:
+                sql += " AND d.user_id = ?"
+                params.append(user_id)
+            rows = self._conn.execute(sql, params).fetchall()
+        
+        scores: Dict[str, float] = {}
+        for term, doc_id, tf, length in rows:
+            norm = self.k1 * (1.0 - self.b + self.b * length / average_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf[term] * tf * (self.k1 + 1.0) / (tf + norm)
+        
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    
+    def get_stats(self) -> Dict[str, object]:
+        """获取索引统计"""
+        with self._lock:
+            doc_count, total_length = self._conn.execute(
+                "SELECT doc_count, total_length FROM corpus_stats WHERE id = 0"
+            ).fetchone()
+            term_count = self._conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+        return {
+            "path": self.path,
+            "documents": doc_count,
+            "terms": term_count,
+            "average_length": total_length / doc_count if doc_count else 0.0
+        }
+    
+    def close(self):
+        """关闭索引"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -2,12 +2,61 @@
 LLM 适配器 - 基于 HelloAgent 框架
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from core.config import get_config
+import threading
+from typing import Dict, Any, Optional, AsyncIterator
+from core.config import get_config, LLMProvider
+from core.exceptions import LLMException
+from core.llm_cache import LLMResponseCache, make_cache_key
+from core.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# 支持 OpenAI 兼容接口、可以走原生异步调用的提供商
+ASYNC_COMPATIBLE_PROVIDERS = {
+    LLMProvider.OPENAI,
+    LLMProvider.MODELSCOPE,
+    LLMProvider.OLLAMA,
+    LLMProvider.DASHSCOPE,
+}
+
+# 按提供商共享的 keep-alive HTTP 连接池
+_provider_http_clients: Dict[LLMProvider, Any] = {}
+
+def get_provider_http_client(provider: LLMProvider):
+    """
+    获取指定提供商共享的异步 HTTP 连接池
+    
+    同一提供商的所有 LLM 调用复用同一个 httpx.AsyncClient，
+    避免每次请求重新建立 TCP/TLS 连接。
+    """
+    client = _provider_http_clients.get(provider)
+    if client is None or client.is_closed:
+        import httpx
+        
+        llm_config = get_config().llm
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=llm_config.max_connections,
+                max_keepalive_connections=llm_config.max_keepalive_connections,
+                keepalive_expiry=llm_config.keepalive_expiry
+            ),
+            timeout=httpx.Timeout(llm_config.timeout, connect=10.0)
+        )
+        _provider_http_clients[provider] = client
+        logger.info(f"已创建 {provider.value} 异步连接池")
+    return client
+
+async def close_provider_http_clients():
+    """关闭所有提供商的连接池"""
+    for provider, client in list(_provider_http_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭 {provider.value} 连接池失败: {str(e)}")
+    _provider_http_clients.clear()
+
 class LLMAdapter:
     """LLM 适配器，基于 HelloAgent 框架"""
     
@@ -15,7 +64,35 @@ class LLMAdapter:
         """初始化 LLM 适配器"""
         self.config = get_config()
         self.llm = None
+        self.async_client = None
+        self.cache = None
+        self.singleflight = SingleFlight("llm")
+        self._initialize_async_client()
         self._initialize_llm()
+        self._initialize_cache()
+    
+    def _initialize_async_client(self):
+        """初始化原生异步客户端（失败时回退到同步路径）"""
+        llm_config = self.config.llm
+        if not llm_config.use_async_client:
+            return
+        if llm_config.provider not in ASYNC_COMPATIBLE_PROVIDERS:
+            logger.info(f"{llm_config.provider.value} 不支持原生异步调用，使用同步回退路径")
+            return
+        
+        try:
+            from openai import AsyncOpenAI
+            
+            self.async_client = AsyncOpenAI(
+                api_key=llm_config.api_key,
+                base_url=llm_config.base_url,
+                timeout=llm_config.timeout,
+                http_client=get_provider_http_client(llm_config.provider)
+            )
+            logger.info(f"异步 LLM 客户端初始化成功: {llm_config.model_name}")
+        except Exception as e:
+            logger.warning(f"异步 LLM 客户端初始化失败，使用同步回退路径: {str(e)}")
+            self.async_client = None
     
     def _initialize_llm(self):
         """初始化 HelloAgent LLM"""
@@ -33,19 +110,35 @@ class LLMAdapter:
             )
             logger.info(f"HelloAgent LLM 初始化成功: {self.config.llm.model_name}")
         except ImportError as e:
+            if self.async_client is not None:
+                logger.warning(f"hello-agents 未安装，仅使用异步客户端: {str(e)}")
+                return
             logger.error(f"hello-agents 未安装: {str(e)}")
             raise ImportError("请安装 hello-agents: pip install 'hello-agents[all]>=0.2.7'")
         except Exception as e:
+            if self.async_client is not None:
+                logger.warning(f"HelloAgent LLM 初始化失败，仅使用异步客户端: {str(e)}")
+                return
             logger.error(f"HelloAgent LLM 初始化失败: {str(e)}")
             raise
     
+    def _initialize_cache(self):
+        """初始化响应缓存"""
+        if not self.config.llm_cache_enabled:
+            return
+        try:
+            self.cache = LLMResponseCache()
+        except Exception as e:
+            logger.warning(f"LLM 响应缓存初始化失败: {str(e)}")
+            self.cache = None
+    
     def _format_messages(self, prompt: str) -> list:
         """
         将提示词格式化为消息列表
         
         Args:
             prompt: 提示词字符串
-            
+        
         Returns:
             消息列表，格式为 [{"role": "user", "content": "..."}]
         """
@@ -56,12 +149,64 @@ class LLMAdapter:
         else:
             return [{"role": "user", "content": str(prompt)}]
     
-    async def ainvoke(self, prompt: str, **kwargs) -> str:
+    def _extract_text(self, response: Any) -> str:
+        """从响应对象中提取文本内容"""
+        if isinstance(response, str):
+            return response
+        elif hasattr(response, 'content'):
+            return response.content
+        elif hasattr(response, 'text'):
+            return response.text
+        else:
+            return str(response)
+    
+    def _build_request_params(self, messages: list, **kwargs) -> Dict[str, Any]:
+        """构建 OpenAI 兼容接口的请求参数"""
+        params = {
+            "model": kwargs.pop("model", self.config.llm.model_name),
+            "messages": messages,
+            "temperature": kwargs.pop("temperature", self.config.llm.temperature),
+            "max_tokens": kwargs.pop("max_tokens", self.config.llm.max_tokens),
+        }
+        params.update(kwargs)
+        return params
+    
+    async def _ainvoke_native(self, messages: list, **kwargs) -> str:
+        """通过共享连接池原生异步调用 LLM"""
+        completion = await self.async_client.chat.completions.create(
+            **self._build_request_params(messages, **kwargs)
+        )
+        return completion.choices[0].message.content or ""
+    
+    def _make_request_key(self, messages: list, kwargs: Dict[str, Any]) -> str:
+        """生成请求键（用于缓存和请求合并），模型名和采样参数都参与计算，避免跨模型命中"""
+        params = dict(kwargs)
+        model = params.pop("model", self.config.llm.model_name)
+        temperature = params.pop("temperature", self.config.llm.temperature)
+        max_tokens = params.pop("max_tokens", self.config.llm.max_tokens)
+        return make_cache_key(messages, model, temperature, max_tokens, **params)
+    
+    async def _acall(self, messages: list, **kwargs) -> str:
+        """实际调用 LLM（不经过缓存）"""
+        if self.async_client is not None:
+            return await self._ainvoke_native(messages, **kwargs)
+        
+        if self.llm is None:
+            raise LLMException("没有可用的 LLM 客户端")
+        
+        # 回退路径：HelloAgent 使用同步 invoke，在线程池中调用
+        response = await asyncio.to_thread(self.llm.invoke, messages, **kwargs)
+        return self._extract_text(response)
+    
+    async def ainvoke(self, prompt: str, use_cache: bool = True, **kwargs) -> str:
         """
         异步调用 LLM
         
+        优先使用原生异步客户端；不可用时回退到在线程中执行 HelloAgent 同步调用。
+        
         Args:
             prompt: 提示词（字符串或消息列表）
+            use_cache: 是否使用响应缓存，传 False 时强制调用 LLM
             **kwargs: 额外参数
             
         Returns:
@@ -71,23 +216,118 @@ class LLMAdapter:
             # 格式化消息
             messages = self._format_messages(prompt)
             
-            # HelloAgent 使用同步 invoke，在异步上下文中调用
-            import asyncio
-            response = await asyncio.to_thread(self.llm.invoke, messages, **kwargs)
+            request_key = self._make_request_key(messages, kwargs)
+            use_cache = use_cache and self.cache is not None
+            if use_cache:
+                cached = await self.cache.get(request_key)
+                if cached is not None:
+                    return cached
+            
+            async def call_llm() -> str:
+                response_text = await self._acall(messages, **kwargs)
+                if use_cache and response_text:
+                    await self.cache.set(
+                        request_key, response_text,
+                        model=kwargs.get("model", self.config.llm.model_name)
+                    )
+                return response_text
             
-            # 提取文本内容
-            if isinstance(response, str):
-                return response
-            elif hasattr(response, 'content'):
-                return response.content
-            elif hasattr(response, 'text'):
-                return response.text
-            else:
-                return str(response)
+            # 相同请求并发进行时只调用一次上游
+            return await self.singleflight.do(request_key, call_llm)
         except Exception as e:
             logger.error(f"LLM 异步调用失败: {str(e)}")
             raise
     
+    async def _astream_native(self, messages: list, **kwargs) -> AsyncIterator[str]:
+        """通过共享连接池原生流式调用 LLM"""
+        stream = await self.async_client.chat.completions.create(
+            stream=True,
+            **self._build_request_params(messages, **kwargs)
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    
+    async def _astream_fallback(self, messages: list, **kwargs) -> AsyncIterator[str]:
+        """回退路径：在线程中消费 HelloAgent 的同步流式迭代器"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stopped = threading.Event()
+        
+        def produce():
+            try:
+                for chunk in self.llm.stream_invoke(messages, **kwargs):
+                    if stopped.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    yield item
+        finally:
+            # 客户端提前断开时通知生产线程停止
+            stopped.set()
+    
+    async def astream(self, prompt: str, use_cache: bool = True, **kwargs) -> AsyncIterator[str]:
+        """
+        流式异步调用 LLM，逐段产出生成的文本
+        
+        命中响应缓存时一次性产出完整结果；流式结束后完整结果写入缓存。
+        
+        Args:
+            prompt: 提示词（字符串或消息列表）
+            use_cache: 是否使用响应缓存
+            **kwargs: 额外参数
+            
+        Yields:
+            文本片段
+        """
+        messages = self._format_messages(prompt)
+        use_cache = use_cache and self.cache is not None
+        request_key = self._make_request_key(messages, kwargs)
+        
+        if use_cache:
+            cached = await self.cache.get(request_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        if self.async_client is not None:
+            stream = self._astream_native(messages, **kwargs)
+        elif self.llm is not None:
+            stream = self._astream_fallback(messages, **kwargs)
+        else:
+            raise LLMException("没有可用的 LLM 客户端")
+        
+        chunks = []
+        try:
+            async for delta in stream:
+                chunks.append(delta)
+                yield delta
+        except Exception as e:
+            logger.error(f"LLM 流式调用失败: {str(e)}")
+            raise
+        
+        if use_cache and chunks:
+            await self.cache.set(
+                request_key, "".join(chunks),
+                model=kwargs.get("model", self.config.llm.model_name)
+            )
+    
     def invoke(self, prompt: str, **kwargs) -> str:
         """
         同步调用 LLM
@@ -95,29 +335,32 @@ class LLMAdapter:
         Args:
             prompt: 提示词（字符串或消息列表）
             **kwargs: 额外参数
-            
+        
         Returns:
             LLM 响应文本
         """
         try:
+            if self.llm is None:
+                raise LLMException("同步 LLM 客户端不可用，请使用 ainvoke")
+            
             # 格式化消息
             messages = self._format_messages(prompt)
             
             # HelloAgent 的同步调用
             response = self.llm.invoke(messages, **kwargs)
-            
-            # 提取文本内容
-            if isinstance(response, str):
-                return response
-            elif hasattr(response, 'content'):
-                return response.content
-            elif hasattr(response, 'text'):
-                return response.text
-            else:
-                return str(response)
+            return self._extract_text(response)
         except Exception as e:
             logger.error(f"LLM 同步调用失败: {str(e)}")
             raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取 LLM 调用统计信息"""
+        return {
+            "async_client": self.async_client is not None,
+            "sync_fallback": self.llm is not None,
+            "cache": self.cache.get_stats() if self.cache else {"enabled": False},
+            "singleflight": self.singleflight.get_stats()
+        }
 
 # 全局 LLM 适配器实例
 _llm_adapter = None
@@ -128,3 +371,9 @@ def get_llm_adapter() -> LLMAdapter:
     if _llm_adapter is None:
         _llm_adapter = LLMAdapter()
     return _llm_adapter
+
+def get_llm_stats() -> Dict[str, Any]:
+    """获取全局 LLM 适配器的统计信息（未初始化时返回空字典）"""
+    if _llm_adapter is None:
+        return {}
+    return _llm_adapter.get_stats()
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+InnoCore AI LLM 响应缓存
+内存 LRU + 磁盘 SQLite 两级缓存，键包含规范化提示词、模型名和采样参数
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.cache import TTLLRUCache
+from core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+def _normalize_text(text: str) -> str:
+    """规范化文本：折叠空白字符，避免缩进差异导致缓存未命中"""
+    return " ".join(str(text).split())
+
+def make_cache_key(messages: List[Dict[str, Any]], model: str,
+                   temperature: float, max_tokens: Optional[int] = None,
+                   **params) -> str:
+    """根据规范化后的消息、模型和参数生成请求键"""
+    normalized_messages = [
+        {
+            "role": message.get("role", "user"),
+            "content": _normalize_text(message.get("content", ""))
+        }
+        for message in messages
+    ]
+    key_material = {
+        "messages": normalized_messages,
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "params": params
+    }
+    raw = json.dumps(key_material, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """LLM 响应缓存"""
+    
+    def __init__(self, cache_dir: str = None, ttl: int = None, max_entries: int = None):
+        config = get_config()
+        self.ttl = ttl if ttl is not None else config.cache_ttl
+        self.memory = TTLLRUCache(
+            max_entries=max_entries or config.llm_cache_max_entries,
+            ttl=self.ttl
+        )
+        
+        cache_dir = cache_dir or config.cache_dir
+        self.db_path = os.path.join(cache_dir, "llm_responses.sqlite3")
+        self._conn = None
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_errors = 0
+        
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"LLM 磁盘缓存不可用，仅使用内存缓存: {str(e)}")
+            self._conn = None
+    
+    def make_key(self, messages: List[Dict[str, Any]], model: str,
+                 temperature: float, max_tokens: Optional[int] = None,
+                 **params) -> str:
+        """生成缓存键"""
+        return make_cache_key(messages, model, temperature, max_tokens, **params)
+    
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+    
+    def _disk_set(self, key: str, model: str, response: str):
+        with self._lock:
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, expires_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, now + self.ttl)
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """读取缓存，内存未命中时回查磁盘"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        
+        if self._conn is None:
+            return None
+        
+        try:
+            value = await asyncio.to_thread(self._disk_get, key)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning(f"读取 LLM 磁盘缓存失败: {str(e)}")
+            return None
+        
+        if value is not None:
+            self.disk_hits += 1
+            self.memory.set(key, value)
+        return value
+    
+    async def set(self, key: str, response: str, model: str = None):
+        """写入缓存"""
+        self.memory.set(key, response)
+        
+        if self._conn is None:
+            return
+        
+        try:
+            await asyncio.to_thread(self._disk_set, key, model, response)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning(f"写入 LLM 磁盘缓存失败: {str(e)}")
+    
+    def clear(self):
+        """清空所有缓存"""
+        self.memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        memory_stats = self.memory.get_stats()
+        hits = memory_stats["hits"] + self.disk_hits
+        misses = memory_stats["misses"] - self.disk_hits
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_hits": memory_stats["hits"],
+            "disk_hits": self.disk_hits,
+            "disk_errors": self.disk_errors,
+            "memory_size": memory_stats["size"],
+            "disk_enabled": self._conn is not None,
+            "ttl": self.ttl
+        }
+    
+    def close(self):
+        """关闭磁盘缓存连接"""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
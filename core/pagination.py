@@ -0,0 +1,70 @@
+"""
+InnoCore AI 游标分页
+键集分页（keyset pagination）：按 (排序键..., id) 降序翻页，游标记录上一页最后一行的排序键，
+下一页用行比较 (排序键..., id) < (游标值...) 从索引位置直接继续，翻到第 N 页的代价与第 1 页相同
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from .exceptions import ValidationException
+
+CURSOR_VERSION = 1
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    # UUID 等其他类型统一按字符串存储，数据库端会按列类型转换
+    return str(value)
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+def encode_cursor(values: Sequence[Any], mode: str = None) -> str:
+    """把排序键编码为不透明游标（URL 安全的 base64）
+    
+    mode 记录生成游标时的查询方式（例如全文检索或模糊匹配），翻页时沿用同一方式。
+    """
+    data = {"v": CURSOR_VERSION, "k": [_encode_value(value) for value in values]}
+    if mode:
+        data["m"] = mode
+    raw = json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int = None) -> Dict[str, Any]:
+    """解析游标，返回 {"values": [...], "mode": ...}，游标无效时抛出 ValidationException"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw.decode("utf-8"))
+        if data.get("v") != CURSOR_VERSION:
+            raise ValueError("游标版本不匹配")
+        values = [_decode_value(value) for value in data["k"]]
+    except Exception as e:
+        raise ValidationException(f"无效的分页游标: {e}")
+    if size is not None and len(values) != size:
+        raise ValidationException("无效的分页游标: 排序键数量不匹配")
+    return {"values": values, "mode": data.get("m")}
+
+def make_page(rows: List[Dict[str, Any]], limit: int, keys: Sequence[str],
+              mode: str = None) -> Dict[str, Any]:
+    """把多取一行（limit + 1）的查询结果整理为一页
+    
+    多出的一行只用于判断是否还有下一页；next_cursor 由本页最后一行的排序键生成。
+    """
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor([items[-1][key] for key in keys], mode)
+    return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
@@ -0,0 +1,338 @@
+"""
+InnoCore AI Redis 客户端
+按 RedisConfig 创建 redis.asyncio 客户端；host 为 "memory" 时返回进程内替身，
+用于单机开发和测试，接口与 redis.asyncio.Redis（decode_responses=True）保持一致
+"""
+
+import asyncio
+import copy
+import fnmatch
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import RedisConfig, get_config
+
+logger = logging.getLogger(__name__)
+
+MEMORY_HOST = "memory"
+
+try:
+    from redis.exceptions import WatchError
+except ImportError:
+    class WatchError(Exception):
+        """事务执行前被 WATCH 的键已被修改"""
+
+class InMemoryRedis:
+    """进程内 Redis 替身
+    
+    只实现项目用到的字符串、哈希、集合、有序集合、列表、发布/订阅、WATCH/MULTI 事务命令和过期时间，
+    值统一按字符串存储。
+    """
+    
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._subscribers: Dict[str, List["InMemoryPubSub"]] = {}
+    
+    def _alive(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+    
+    def _container(self, key: str, factory):
+        if not self._alive(key):
+            self._data[key] = factory()
+        return self._data[key]
+    
+    async def ping(self) -> bool:
+        return True
+    
+    async def get(self, key: str) -> Optional[str]:
+        return self._data[key] if self._alive(key) else None
+    
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._alive(key):
+            return None
+        self._data[key] = str(value)
+        self._expires.pop(key, None)
+        if ex:
+            self._expires[key] = time.time() + ex
+        return True
+    
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+    
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(await self.get(key) or 0) + amount
+        self._data[key] = str(value)
+        return value
+    
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                deleted += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return deleted
+    
+    async def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._alive(key))
+    
+    async def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._expires[key] = time.time() + seconds
+        return True
+    
+    async def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+    
+    async def hget(self, key: str, field: str) -> Optional[str]:
+        return self._data[key].get(field) if self._alive(key) else None
+    
+    async def hset(self, key: str, field: str = None, value: Any = None,
+                   mapping: Dict[str, Any] = None) -> int:
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        container = self._container(key, dict)
+        added = sum(1 for name in items if name not in container)
+        container.update({name: str(item) for name, item in items.items()})
+        return added
+    
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return dict(self._data[key]) if self._alive(key) else {}
+    
+    async def hdel(self, key: str, *fields: str) -> int:
+        if not self._alive(key):
+            return 0
+        container = self._data[key]
+        deleted = sum(1 for field in fields if container.pop(field, None) is not None)
+        if not container:
+            await self.delete(key)
+        return deleted
+    
+    async def hlen(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+    
+    async def sadd(self, key: str, *members: str) -> int:
+        container = self._container(key, set)
+        added = sum(1 for member in members if str(member) not in container)
+        container.update(str(member) for member in members)
+        return added
+    
+    async def srem(self, key: str, *members: str) -> int:
+        if not self._alive(key):
+            return 0
+        container = self._data[key]
+        removed = sum(1 for member in members if str(member) in container)
+        container.difference_update(str(member) for member in members)
+        if not container:
+            await self.delete(key)
+        return removed
+    
+    async def smembers(self, key: str) -> set:
+        return set(self._data[key]) if self._alive(key) else set()
+    
+    async def scard(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+    
+    async def zadd(self, key: str, mapping: Dict[str, float], nx: bool = False) -> int:
+        container = self._container(key, dict)
+        added = sum(1 for member in mapping if str(member) not in container)
+        for member, score in mapping.items():
+            if not (nx and str(member) in container):
+                container[str(member)] = float(score)
+        return added
+    
+    async def zrem(self, key: str, *members: str) -> int:
+        if not self._alive(key):
+            return 0
+        container = self._data[key]
+        removed = sum(1 for member in members if container.pop(str(member), None) is not None)
+        if not container:
+            await self.delete(key)
+        return removed
+    
+    async def zcard(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+    
+    async def zpopmin(self, key: str, count: int = None) -> List[tuple]:
+        """按分数（相同分数按成员）从小到大弹出，返回 [(member, score), ...]"""
+        if not self._alive(key):
+            return []
+        container = self._data[key]
+        popped = sorted(container.items(), key=lambda item: (item[1], item[0]))[:count or 1]
+        await self.zrem(key, *(member for member, _ in popped))
+        return popped
+    
+    async def lpush(self, key: str, *values: Any) -> int:
+        container = self._container(key, list)
+        for value in values:
+            container.insert(0, str(value))
+        return len(container)
+    
+    async def llen(self, key: str) -> int:
+        return len(self._data[key]) if self._alive(key) else 0
+    
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
+        if not self._alive(key):
+            return []
+        container = self._data[key]
+        return container[start:] if end == -1 else container[start:end + 1]
+    
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
+        if self._alive(key):
+            self._data[key] = await self.lrange(key, start, end)
+        return True
+    
+    async def lrem(self, key: str, count: int, value: Any) -> int:
+        if not self._alive(key):
+            return 0
+        container = self._data[key]
+        removed = container.count(str(value)) if count == 0 else min(abs(count), container.count(str(value)))
+        for _ in range(removed):
+            container.remove(str(value))
+        return removed
+    
+    async def publish(self, channel: str, message: Any) -> int:
+        subscribers = list(self._subscribers.get(channel, []))
+        for pubsub in subscribers:
+            pubsub._queue.put_nowait({"type": "message", "channel": channel, "data": str(message)})
+        return len(subscribers)
+    
+    def pubsub(self) -> "InMemoryPubSub":
+        return InMemoryPubSub(self)
+    
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+    
+    async def flushdb(self) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        return True
+    
+    async def aclose(self):
+        pass
+
+class InMemoryPubSub:
+    """InMemoryRedis 的订阅对象，接口同 redis.asyncio.client.PubSub"""
+    
+    def __init__(self, redis: InMemoryRedis):
+        self._redis = redis
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: List[str] = []
+    
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            if channel not in self._channels:
+                self._channels.append(channel)
+                self._redis._subscribers.setdefault(channel, []).append(self)
+    
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or list(self._channels):
+            if channel in self._channels:
+                self._channels.remove(channel)
+                self._redis._subscribers[channel].remove(self)
+    
+    async def get_message(self, ignore_subscribe_messages: bool = False,
+                          timeout: Optional[float] = 0.0) -> Optional[Dict[str, Any]]:
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout or 0.001)
+        except asyncio.TimeoutError:
+            return None
+    
+    async def aclose(self):
+        await self.unsubscribe()
+
+class InMemoryPipeline:
+    """InMemoryRedis 的事务管道，接口同 redis.asyncio.client.Pipeline
+    
+    WATCH 之后、MULTI 之前的命令立即执行；其余命令缓存到 execute() 时依次执行。
+    WATCH 记录键的当前值快照，execute() 时任一快照变化则抛出 WatchError。
+    """
+    
+    def __init__(self, redis: InMemoryRedis):
+        self._redis = redis
+        self._watched: Dict[str, Any] = {}
+        self._commands: List[tuple] = []
+        self._explicit_transaction = False
+    
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.reset()
+    
+    def _snapshot(self, key: str) -> Any:
+        return copy.deepcopy(self._redis._data[key]) if self._redis._alive(key) else None
+    
+    async def watch(self, *keys: str) -> bool:
+        for key in keys:
+            self._watched[key] = self._snapshot(key)
+        return True
+    
+    def multi(self):
+        self._explicit_transaction = True
+    
+    def __getattr__(self, name: str):
+        command = getattr(self._redis, name)
+        if self._watched and not self._explicit_transaction:
+            return command
+        
+        def buffer(*args, **kwargs) -> "InMemoryPipeline":
+            self._commands.append((command, args, kwargs))
+            return self
+        return buffer
+    
+    async def execute(self) -> List[Any]:
+        try:
+            for key, snapshot in self._watched.items():
+                if self._snapshot(key) != snapshot:
+                    raise WatchError("Watched variable changed.")
+            return [await command(*args, **kwargs) for command, args, kwargs in self._commands]
+        finally:
+            await self.reset()
+    
+    async def reset(self):
+        self._watched.clear()
+        self._commands.clear()
+        self._explicit_transaction = False
+
+async def create_redis_client(config: RedisConfig = None, force: bool = False):
+    """创建并验证 Redis 客户端；未启用（force 为 False 时）或连接失败时返回 None"""
+    config = config or get_config().redis
+    if not config.enabled and not force:
+        return None
+    if config.host == MEMORY_HOST:
+        return InMemoryRedis()
+    
+    try:
+        import redis.asyncio as aioredis
+    except ImportError:
+        logger.warning("未安装 redis，Redis 缓存层已禁用")
+        return None
+    
+    client = aioredis.Redis(
+        host=config.host,
+        port=config.port,
+        db=config.db,
+        password=config.password,
+        max_connections=config.max_connections,
+        socket_timeout=config.socket_timeout,
+        socket_connect_timeout=config.socket_timeout,
+        decode_responses=True
+    )
+    try:
+        await client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis 连接失败，Redis 缓存层已禁用: {str(e)}")
+        await client.aclose()
+        return None
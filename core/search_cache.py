@@ -0,0 +1,104 @@
+"""
+InnoCore AI 混合搜索结果缓存
+按集合分路缓存向量和 BM25 候选，L1 结果跨用户共享；写入时通过版本号精确失效
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from core.cache import TTLLRUCache
+from core.config import get_config
+from core.state_backend import cache_invalidation_bus
+
+def normalize_query(query: str) -> str:
+    """规范化查询：折叠空白字符，避免换行和缩进差异导致缓存未命中"""
+    return " ".join(str(query).split())
+
+class SearchResultCache:
+    """混合搜索分路结果缓存
+    
+    缓存键包含集合类型、规范化查询、候选数、payload 选择和版本号：
+    - L1 只有全局版本，所有用户共享同一份结果；
+    - L2 由集合版本和用户版本共同决定，写入某个用户的数据只使该用户的条目失效。
+    失效只递增版本号，旧条目不再被命中，随 LRU/TTL 自然淘汰；
+    多个 worker 时失效通过 cache_invalidation_bus 广播，其他 worker 同样递增本地版本号。
+    检索开始前取得的键在检索完成后写入，期间发生的写入会递增版本号，
+    因此不会把旧结果写到新版本下。
+    用户版本号最多保留与结果条目数相同的用户数（LRU），被淘汰用户的版本号并入版本下限，
+    没有记录的用户使用该下限：版本号全局单调递增，淘汰后旧条目仍不会被重新命中。
+    """
+    
+    def __init__(self, max_entries: int = None, ttl: int = None):
+        config = get_config().vector_db
+        self.memory = TTLLRUCache(
+            max_entries=max_entries or config.search_cache_max_entries,
+            ttl=ttl if ttl is not None else config.search_cache_ttl
+        )
+        self._lock = threading.Lock()
+        self._collection_versions: Dict[str, int] = {"l1": 0, "l2": 0}
+        self._user_versions: "OrderedDict[str, int]" = OrderedDict()
+        self._user_version_floor = 0
+        self._next_version = 1
+        self.invalidations = 0
+        cache_invalidation_bus.register("search", self._apply_remote_invalidation)
+    
+    def make_key(self, collection_type: str, query: str, user_id: Optional[str],
+                 limit: int, with_payload: Any) -> Hashable:
+        """生成某个集合检索的缓存键"""
+        payload_key = tuple(with_payload) if isinstance(with_payload, list) else with_payload
+        with self._lock:
+            if collection_type == "l1":
+                version = (self._collection_versions["l1"],)
+                user_id = None
+            else:
+                version = (
+                    self._collection_versions["l2"],
+                    self._user_versions.get(user_id, self._user_version_floor)
+                )
+        return (collection_type, normalize_query(query), user_id, limit, payload_key, version)
+    
+    def get(self, key: Hashable) -> Any:
+        return self.memory.get(key)
+    
+    def set(self, key: Hashable, value: Any):
+        self.memory.set(key, value)
+    
+    def _bump(self) -> int:
+        version = self._next_version
+        self._next_version += 1
+        self.invalidations += 1
+        return version
+    
+    def invalidate_collection(self, collection_type: str, broadcast: bool = True):
+        """使整个集合的缓存失效（L1 写入、重建索引等）"""
+        with self._lock:
+            self._collection_versions[collection_type] = self._bump()
+        if broadcast:
+            cache_invalidation_bus.publish("search", collection_type=collection_type)
+    
+    def invalidate_user(self, user_id: str, broadcast: bool = True):
+        """使某个用户的 L2 缓存失效"""
+        with self._lock:
+            self._user_versions[user_id] = self._bump()
+            self._user_versions.move_to_end(user_id)
+            while len(self._user_versions) > self.memory.max_entries:
+                _, version = self._user_versions.popitem(last=False)
+                self._user_version_floor = max(self._user_version_floor, version)
+        if broadcast:
+            cache_invalidation_bus.publish("search", user_id=user_id)
+    
+    def _apply_remote_invalidation(self, message: Dict[str, Any]):
+        if message.get("user_id") is not None:
+            self.invalidate_user(message["user_id"], broadcast=False)
+        elif message.get("collection_type"):
+            self.invalidate_collection(message["collection_type"], broadcast=False)
+    
+    def clear(self):
+        self.memory.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        stats = self.memory.get_stats()
+        stats["invalidations"] = self.invalidations
+        return stats
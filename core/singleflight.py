@@ -0,0 +1,65 @@
+"""
+InnoCore AI 请求合并 (Single-flight)
+相同键的并发请求只执行一次上游调用，其余调用方共享结果
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """合并相同键的并发异步调用"""
+    
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行调用，若相同键的调用正在进行则等待其结果
+        
+        Args:
+            key: 请求合并键
+            func: 无参协程工厂，仅在没有进行中的相同请求时被调用
+        
+        Returns:
+            上游调用结果（所有合并的调用方拿到同一个结果或同一个异常）
+        """
+        self.calls += 1
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.collapsed += 1
+            logger.debug(f"[{self.name}] 合并重复请求: {key}")
+        else:
+            # 上游调用由合并组自己的任务持有，与发起它的调用方生命周期无关
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        
+        # shield 保证任何调用方（包括首个调用方）被取消或超时都不会取消共享的上游调用
+        return await asyncio.shield(task)
+    
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已离开时避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计信息"""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "inflight": len(self._inflight),
+            "collapse_rate": self.collapsed / self.calls if self.calls else 0.0
+        }
@@ -0,0 +1,503 @@
+"""
+InnoCore AI 共享状态后端
+任务状态、任务事件和缓存失效广播的存储接口：单进程使用内存实现，
+多个 API worker（多核或多节点）使用 Redis 实现共享同一份状态
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import get_config
+from .exceptions import ConfigurationException
+from .redis_client import WatchError, create_redis_client
+
+logger = logging.getLogger(__name__)
+
+# 当前 worker 的标识，用于任务归属和过滤自己发出的广播
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+TASK_EVENTS_CHANNEL = "task_events"
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+BROADCAST_CHANNEL = "ws_broadcast"
+
+# 任务队列为空时的轮询间隔（秒）
+QUEUE_POLL_INTERVAL = 0.2
+
+# 订阅单次读取的最长等待（秒），须小于 Redis 客户端的 socket_timeout
+SUBSCRIPTION_POLL_INTERVAL = 0.5
+
+def _queue_score(priority: int) -> float:
+    """任务队列的排序分数：优先级高的先出队，同优先级按任务ID（以提交时间开头）排序"""
+    return -float(priority or 0)
+
+class Subscription(ABC):
+    """频道订阅，作为异步上下文管理器使用
+    
+    进入上下文时即完成订阅，之后发布的消息都不会丢失，
+    因此可以先订阅、再读取当前状态、最后等待变化，避免竞态。
+    """
+    
+    async def __aenter__(self) -> "Subscription":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> Dict[str, Any]:
+        while True:
+            message = await self.get(timeout=SUBSCRIPTION_POLL_INTERVAL)
+            if message is not None:
+                return message
+    
+    @abstractmethod
+    async def start(self):
+        pass
+    
+    @abstractmethod
+    async def stop(self):
+        pass
+    
+    @abstractmethod
+    async def get(self, timeout: Optional[float] = 1.0) -> Optional[Dict[str, Any]]:
+        """等待下一条消息，超时返回 None；timeout 为 None 时一直等待"""
+        pass
+
+class StateBackend(ABC):
+    """共享状态后端
+    
+    任务记录是可 JSON 序列化的字典，必须包含 id 和 status 字段。
+    等待执行的任务ID放在共享的任务队列中，任何 worker 都可以取出执行；
+    执行前先认领任务，认领带过期时间，执行期间由执行者定期续期（心跳），
+    执行者退出后认领过期，其他 worker 据此发现并回收无主任务。
+    """
+    
+    # 状态是否在多个进程间共享（决定是否需要广播缓存失效）
+    shared = False
+    
+    @abstractmethod
+    async def save_task(self, record: Dict[str, Any]):
+        """保存活跃任务的最新状态"""
+        pass
+    
+    @abstractmethod
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务记录（活跃任务或历史任务）"""
+        pass
+    
+    @abstractmethod
+    async def archive_task(self, record: Dict[str, Any]):
+        """保存任务的最终状态并移入历史记录"""
+        pass
+    
+    @abstractmethod
+    async def list_active_tasks(self) -> List[Dict[str, Any]]:
+        pass
+    
+    @abstractmethod
+    async def list_task_history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """最近 limit 个历史任务，按结束先后排列"""
+        pass
+    
+    @abstractmethod
+    async def count_tasks(self) -> Dict[str, int]:
+        """返回 {"active": 活跃任务数, "history": 历史任务数, "queued": 队列中等待的任务数}"""
+        pass
+    
+    @abstractmethod
+    async def enqueue_task(self, task_id: str, priority: int = 0):
+        """把任务放入共享任务队列（已在队列中时不重复放入）"""
+        pass
+    
+    @abstractmethod
+    async def _pop_queued(self) -> Optional[str]:
+        """立即取出队首任务ID，队列为空时返回 None"""
+        pass
+    
+    async def dequeue_task(self, timeout: float = 1.0) -> Optional[str]:
+        """从共享任务队列取出优先级最高的任务ID，等待 timeout 秒仍为空时返回 None
+        
+        取出不等于认领：执行前仍需 claim_task，取出后未认领就退出的任务由回收流程重新入队。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            task_id = await self._pop_queued()
+            remaining = deadline - loop.time()
+            if task_id is not None or remaining <= 0:
+                return task_id
+            await asyncio.sleep(min(QUEUE_POLL_INTERVAL, remaining))
+    
+    @abstractmethod
+    async def claim_task(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        """原子地认领任务，只有第一个认领者返回 True（执行或取消前调用）
+        
+        认领成功的任务同时移出任务队列；认领在 task_claim_ttl 秒后过期，执行期间需调用 refresh_claim 续期。
+        """
+        pass
+    
+    @abstractmethod
+    async def refresh_claim(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        """续期认领；认领已过期或属于其他 worker 时返回 False"""
+        pass
+    
+    @abstractmethod
+    async def get_claim_owner(self, task_id: str) -> Optional[str]:
+        """当前持有认领的 worker，未认领或认领已过期时返回 None"""
+        pass
+    
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        pass
+    
+    @abstractmethod
+    def subscribe(self, channel: str) -> Subscription:
+        pass
+    
+    async def close(self):
+        pass
+
+class _MemorySubscription(Subscription):
+    def __init__(self, backend: "InMemoryStateBackend", channel: str):
+        self._backend = backend
+        self._channel = channel
+        self._queue: asyncio.Queue = asyncio.Queue()
+    
+    async def start(self):
+        self._backend._subscribers.setdefault(self._channel, set()).add(self._queue)
+    
+    async def stop(self):
+        self._backend._subscribers.get(self._channel, set()).discard(self._queue)
+    
+    async def get(self, timeout: Optional[float] = 1.0) -> Optional[Dict[str, Any]]:
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class InMemoryStateBackend(StateBackend):
+    """进程内状态后端（单 worker）"""
+    
+    def __init__(self, history_limit: int = None, claim_ttl: int = None):
+        config = get_config()
+        self.history_limit = history_limit or config.task_history_limit
+        self.claim_ttl = claim_ttl or config.task_claim_ttl
+        self._active: Dict[str, Dict[str, Any]] = {}
+        self._history: deque = deque(maxlen=self.history_limit)
+        self._claims: Dict[str, tuple] = {}  # 任务ID -> (认领者, 过期时间)
+        self._queue: Dict[str, float] = {}  # 等待执行的任务ID -> 排序分数
+        self._subscribers: Dict[str, set] = {}
+    
+    async def save_task(self, record: Dict[str, Any]):
+        self._active[record["id"]] = copy.deepcopy(record)
+    
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        record = self._active.get(task_id)
+        if record is None:
+            record = next((task for task in reversed(self._history) if task["id"] == task_id), None)
+        return copy.deepcopy(record) if record else None
+    
+    async def archive_task(self, record: Dict[str, Any]):
+        self._active.pop(record["id"], None)
+        self._claims.pop(record["id"], None)
+        self._queue.pop(record["id"], None)
+        self._history.append(copy.deepcopy(record))
+    
+    async def list_active_tasks(self) -> List[Dict[str, Any]]:
+        return [copy.deepcopy(record) for record in self._active.values()]
+    
+    async def list_task_history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return [copy.deepcopy(record) for record in list(self._history)[-limit:]]
+    
+    async def count_tasks(self) -> Dict[str, int]:
+        return {"active": len(self._active), "history": len(self._history), "queued": len(self._queue)}
+    
+    async def enqueue_task(self, task_id: str, priority: int = 0):
+        self._queue.setdefault(task_id, _queue_score(priority))
+    
+    async def _pop_queued(self) -> Optional[str]:
+        if not self._queue:
+            return None
+        task_id = min(self._queue, key=lambda queued: (self._queue[queued], queued))
+        del self._queue[task_id]
+        return task_id
+    
+    async def claim_task(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        if await self.get_claim_owner(task_id) is not None:
+            return False
+        self._claims[task_id] = (owner, time.time() + self.claim_ttl)
+        self._queue.pop(task_id, None)
+        return True
+    
+    async def refresh_claim(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        if await self.get_claim_owner(task_id) != owner:
+            return False
+        self._claims[task_id] = (owner, time.time() + self.claim_ttl)
+        return True
+    
+    async def get_claim_owner(self, task_id: str) -> Optional[str]:
+        claim = self._claims.get(task_id)
+        if claim is not None and claim[1] <= time.time():
+            del self._claims[task_id]
+            claim = None
+        return claim[0] if claim else None
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        for queue in list(self._subscribers.get(channel, ())):
+            queue.put_nowait(copy.deepcopy(message))
+    
+    def subscribe(self, channel: str) -> Subscription:
+        return _MemorySubscription(self, channel)
+
+class _RedisSubscription(Subscription):
+    def __init__(self, backend: "RedisStateBackend", channel: str):
+        self._backend = backend
+        self._channel = backend._key(channel)
+        self._pubsub = None
+        socket_timeout = get_config().redis.socket_timeout
+        self._poll_interval = (
+            min(SUBSCRIPTION_POLL_INTERVAL, socket_timeout / 2) if socket_timeout else SUBSCRIPTION_POLL_INTERVAL
+        )
+    
+    async def start(self):
+        self._pubsub = self._backend.redis.pubsub()
+        await self._pubsub.subscribe(self._channel)
+    
+    async def stop(self):
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+    
+    async def get(self, timeout: Optional[float] = 1.0) -> Optional[Dict[str, Any]]:
+        # 单次读取超过客户端 socket_timeout 时 redis-py 会断开重连并重新订阅，重连期间发布的消息丢失，
+        # 因此较长（或不限时）的等待拆成多次短读取
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            wait = self._poll_interval
+            if deadline is not None:
+                wait = min(wait, max(deadline - loop.time(), 0))
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=wait)
+            if message and message.get("type") == "message":
+                return json.loads(message["data"])
+            if deadline is not None and loop.time() >= deadline:
+                return None
+
+class RedisStateBackend(StateBackend):
+    """Redis 状态后端（多 worker / 多节点共享）
+    
+    - task:{id}：任务记录 JSON，结束后按 task_history_ttl 过期；
+    - tasks:active：活跃任务ID集合；tasks:history：历史任务ID列表（最新在前，按上限截断）；
+    - tasks:queue：等待执行的任务ID有序集合，分数由优先级决定，各 worker 用 ZPOPMIN 取任务；
+    - task_claim:{id}：SET NX EX 认领标记，保证同一任务只被一个 worker 执行或取消，执行者按心跳续期；
+    - 事件和广播使用 Redis 发布/订阅。
+    """
+    
+    shared = True
+    
+    def __init__(self, redis, key_prefix: str = None, history_limit: int = None,
+                 history_ttl: int = None, claim_ttl: int = None):
+        config = get_config()
+        self.redis = redis
+        self.key_prefix = (key_prefix if key_prefix is not None else config.redis.key_prefix) + "state:"
+        self.history_limit = history_limit or config.task_history_limit
+        self.history_ttl = history_ttl or config.task_history_ttl
+        self.claim_ttl = claim_ttl or config.task_claim_ttl
+    
+    def _key(self, name: str) -> str:
+        return self.key_prefix + name
+    
+    @staticmethod
+    def _dumps(record: Dict[str, Any]) -> str:
+        return json.dumps(record, ensure_ascii=False, default=str)
+    
+    async def _load_many(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        if not task_ids:
+            return []
+        raws = await self.redis.mget([self._key(f"task:{task_id}") for task_id in task_ids])
+        return [json.loads(raw) for raw in raws if raw]
+    
+    async def save_task(self, record: Dict[str, Any]):
+        await self.redis.set(self._key(f"task:{record['id']}"), self._dumps(record))
+        await self.redis.sadd(self._key("tasks:active"), record["id"])
+    
+    async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self._key(f"task:{task_id}"))
+        return json.loads(raw) if raw else None
+    
+    async def archive_task(self, record: Dict[str, Any]):
+        task_id = record["id"]
+        await self.redis.set(self._key(f"task:{task_id}"), self._dumps(record), ex=self.history_ttl)
+        await self.redis.srem(self._key("tasks:active"), task_id)
+        await self.redis.lpush(self._key("tasks:history"), task_id)
+        await self.redis.ltrim(self._key("tasks:history"), 0, self.history_limit - 1)
+        await self.redis.zrem(self._key("tasks:queue"), task_id)
+        await self.redis.delete(self._key(f"task_claim:{task_id}"))
+    
+    async def list_active_tasks(self) -> List[Dict[str, Any]]:
+        return await self._load_many(sorted(await self.redis.smembers(self._key("tasks:active"))))
+    
+    async def list_task_history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        task_ids = await self.redis.lrange(self._key("tasks:history"), 0, limit - 1)
+        return list(reversed(await self._load_many(task_ids)))
+    
+    async def count_tasks(self) -> Dict[str, int]:
+        return {
+            "active": await self.redis.scard(self._key("tasks:active")),
+            "history": await self.redis.llen(self._key("tasks:history")),
+            "queued": await self.redis.zcard(self._key("tasks:queue"))
+        }
+    
+    async def enqueue_task(self, task_id: str, priority: int = 0):
+        await self.redis.zadd(self._key("tasks:queue"), {task_id: _queue_score(priority)}, nx=True)
+    
+    async def _pop_queued(self) -> Optional[str]:
+        # 客户端 socket_timeout 很短（缓存层需要快速回退），不用 BZPOPMIN 长时间阻塞，由 dequeue_task 轮询
+        popped = await self.redis.zpopmin(self._key("tasks:queue"))
+        return popped[0][0] if popped else None
+    
+    async def claim_task(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        claimed = await self.redis.set(
+            self._key(f"task_claim:{task_id}"), owner, ex=self.claim_ttl, nx=True
+        )
+        if claimed:
+            await self.redis.zrem(self._key("tasks:queue"), task_id)
+        return bool(claimed)
+    
+    async def refresh_claim(self, task_id: str, owner: str = WORKER_ID) -> bool:
+        claim_key = self._key(f"task_claim:{task_id}")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                # WATCH 保证检查归属和续期之间认领没有过期后被其他 worker 重新认领
+                await pipe.watch(claim_key)
+                if await pipe.get(claim_key) != owner:
+                    return False
+                pipe.multi()
+                pipe.expire(claim_key, self.claim_ttl)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+    
+    async def get_claim_owner(self, task_id: str) -> Optional[str]:
+        return await self.redis.get(self._key(f"task_claim:{task_id}"))
+    
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.redis.publish(self._key(channel), self._dumps(message))
+    
+    def subscribe(self, channel: str) -> Subscription:
+        return _RedisSubscription(self, channel)
+    
+    async def close(self):
+        await self.redis.aclose()
+
+_backend: Optional[StateBackend] = None
+
+def get_state_backend() -> StateBackend:
+    """获取全局状态后端；init_state_backend 之前使用进程内实现"""
+    global _backend
+    if _backend is None:
+        _backend = InMemoryStateBackend()
+    return _backend
+
+async def init_state_backend() -> StateBackend:
+    """按 state_backend 配置创建全局状态后端，Redis 不可用时直接报错而不是静默退回单进程"""
+    global _backend
+    config = get_config()
+    if config.state_backend == "redis":
+        redis = await create_redis_client(config.redis, force=True)
+        if redis is None:
+            raise ConfigurationException("state_backend 为 redis，但无法连接 Redis")
+        _backend = RedisStateBackend(redis)
+    elif config.state_backend == "memory":
+        _backend = InMemoryStateBackend()
+    else:
+        raise ConfigurationException(f"未知的状态后端: {config.state_backend}，可选: memory、redis")
+    logger.info(f"共享状态后端: {config.state_backend}（worker {WORKER_ID}）")
+    return _backend
+
+async def close_state_backend():
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+class CacheInvalidationBus:
+    """缓存失效广播
+    
+    各 worker 的进程内缓存在本地失效后调用 publish，其他 worker 的监听任务收到后
+    调用对应缓存注册的处理函数；自己发出的消息按 origin 过滤。状态后端不共享时不广播。
+    """
+    
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._pending: set = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(self, cache_name: str, handler: Callable[[Dict[str, Any]], None]):
+        self._handlers[cache_name] = handler
+    
+    def publish(self, cache_name: str, **payload):
+        """广播一次失效（不等待发送完成，可在同步代码中调用）"""
+        backend = get_state_backend()
+        if not backend.shared:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        message = {"cache": cache_name, "origin": WORKER_ID, **payload}
+        task = loop.create_task(backend.publish(CACHE_INVALIDATION_CHANNEL, message))
+        self._pending.add(task)
+        task.add_done_callback(self._publish_done)
+    
+    def _publish_done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"缓存失效广播失败: {task.exception()}")
+    
+    async def run(self):
+        """监听其他 worker 的失效消息"""
+        while True:
+            try:
+                async with get_state_backend().subscribe(CACHE_INVALIDATION_CHANNEL) as subscription:
+                    async for message in subscription:
+                        if message.get("origin") == WORKER_ID:
+                            continue
+                        handler = self._handlers.get(message.get("cache"))
+                        if handler:
+                            handler(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"缓存失效监听中断，稍后重连: {str(e)}")
+                await asyncio.sleep(1)
+    
+    def start(self):
+        if get_state_backend().shared and self._task is None:
+            self._task = asyncio.create_task(self.run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# 全局缓存失效广播实例
+cache_invalidation_bus = CacheInvalidationBus()
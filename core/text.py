@@ -0,0 +1,8 @@
+"""
+InnoCore AI 文本字符类常量
+分词、词法索引、全文检索和 token 估算共用
+"""
+
+# CJK 字符的正则字符类范围（中日韩统一表意文字及扩展 A、兼容表意文字、假名、韩文音节），
+# 用法：re.compile(rf"[{CJK_RANGES}]")
+CJK_RANGES = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af"
@@ -0,0 +1,203 @@
+"""
+InnoCore AI 向量集合快照
+紧凑的快照格式：连续存放的 float32/int8 向量文件 + 按块列式存储的 payload 文件 + 清单，
+导出和导入均为流式，导入时直接写入已有向量，无需重新生成
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+PAYLOAD_FILE = "payloads.jsonl.gz"
+SCALES_FILE = "scales.f32"
+VECTOR_FILES = {"float32": "vectors.f32", "int8": "vectors.i8"}
+
+def snapshot_checksum(embedding_model: str, dimension: int, dtype: str, count: int,
+                      digests: Dict[str, str]) -> str:
+    """快照校验和：绑定向量模型、维度、点数和各数据文件的 SHA-256"""
+    material = json.dumps({
+        "embedding_model": embedding_model,
+        "dimension": dimension,
+        "dtype": dtype,
+        "count": count,
+        "digests": digests
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def _file_digest(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SnapshotWriter:
+    """快照写入器
+    
+    每次写入一块点：向量按行追加到向量文件，payload 按列写成 payload 文件中的一行
+    （{"id": [...], "title": [...], ...}），同一块内字段名只出现一次。
+    int8 格式按行对称量化，每行的缩放系数写入 scales.f32。
+    """
+    
+    def __init__(self, path: str, embedding_model: str, dimension: int,
+                 dtype: str = "float32", metadata: Dict[str, Any] = None):
+        if dtype not in VECTOR_FILES:
+            raise ValueError(f"不支持的向量格式: {dtype}，可选: {', '.join(VECTOR_FILES)}")
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise ValueError(f"快照目录已存在: {path}")
+        
+        self.path = path
+        self.embedding_model = embedding_model
+        self.dimension = dimension
+        self.dtype = dtype
+        self.metadata = metadata or {}
+        self.count = 0
+        
+        self._vectors = open(os.path.join(path, VECTOR_FILES[dtype]), "wb")
+        self._scales = open(os.path.join(path, SCALES_FILE), "wb") if dtype == "int8" else None
+        self._payloads = gzip.open(os.path.join(path, PAYLOAD_FILE), "wb")
+        # payload 摘要按解压后的内容计算，与 gzip 压缩参数无关
+        self._payload_digest = hashlib.sha256()
+    
+    def write_block(self, ids: List[Any], vectors: Any, payloads: List[Dict[str, Any]]):
+        """写入一块点"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"向量维度不一致: {vectors.shape[1]} != {self.dimension}")
+        
+        if self.dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            self._vectors.write(codes.tobytes())
+            self._scales.write(scales.astype(np.float32).tobytes())
+        else:
+            self._vectors.write(vectors.tobytes())
+        
+        fields = list(dict.fromkeys(field for payload in payloads for field in payload))
+        columns = {"id": [str(point_id) for point_id in ids]}
+        for field in fields:
+            columns[field] = [payload.get(field) for payload in payloads]
+        line = (json.dumps(columns, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        self._payloads.write(line)
+        self._payload_digest.update(line)
+        self.count += len(ids)
+    
+    def _close_files(self):
+        for f in (self._vectors, self._scales, self._payloads):
+            if f is not None and not f.closed:
+                f.close()
+    
+    def close(self) -> Dict[str, Any]:
+        """完成写入并生成清单"""
+        self._close_files()
+        digests = {VECTOR_FILES[self.dtype]: _file_digest(os.path.join(self.path, VECTOR_FILES[self.dtype]))}
+        if self.dtype == "int8":
+            digests[SCALES_FILE] = _file_digest(os.path.join(self.path, SCALES_FILE))
+        digests[PAYLOAD_FILE] = self._payload_digest.hexdigest()
+        
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "embedding_model": self.embedding_model,
+            "dimension": self.dimension,
+            "dtype": self.dtype,
+            "count": self.count,
+            "digests": digests,
+            "checksum": snapshot_checksum(
+                self.embedding_model, self.dimension, self.dtype, self.count, digests
+            ),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "metadata": self.metadata
+        }
+        with open(os.path.join(self.path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+    
+    def abort(self):
+        """放弃写入（不生成清单，目录不会被当作有效快照）"""
+        self._close_files()
+
+class SnapshotReader:
+    """快照读取器"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise ValueError(f"不是有效的快照目录（缺少 {MANIFEST_FILE}）: {path}")
+        with open(manifest_path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"不支持的快照格式版本: {self.manifest.get('format_version')}")
+    
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest["embedding_model"]
+    
+    @property
+    def dimension(self) -> int:
+        return self.manifest["dimension"]
+    
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+    
+    def verify(self):
+        """流式重新计算各文件摘要并核对清单校验和，不一致时抛出 ValueError"""
+        manifest = self.manifest
+        expected = snapshot_checksum(
+            manifest["embedding_model"], manifest["dimension"], manifest["dtype"],
+            manifest["count"], manifest["digests"]
+        )
+        if expected != manifest["checksum"]:
+            raise ValueError("快照清单校验和不匹配（清单被修改）")
+        
+        for name, digest in manifest["digests"].items():
+            if name == PAYLOAD_FILE:
+                actual = hashlib.sha256()
+                with gzip.open(os.path.join(self.path, name), "rb") as f:
+                    for chunk in iter(lambda: f.read(8 * 1024 * 1024), b""):
+                        actual.update(chunk)
+                actual = actual.hexdigest()
+            else:
+                actual = _file_digest(os.path.join(self.path, name))
+            if actual != digest:
+                raise ValueError(f"快照文件 {name} 已损坏（SHA-256 不匹配）")
+    
+    def iter_blocks(self) -> Iterator[Tuple[List[str], np.ndarray, List[Dict[str, Any]]]]:
+        """按写入时的分块逐块读取 (点ID列表, float32 向量矩阵, payload 列表)"""
+        dtype = self.manifest["dtype"]
+        count, dimension = self.count, self.dimension
+        if count == 0:
+            return
+        
+        vectors = np.memmap(
+            os.path.join(self.path, VECTOR_FILES[dtype]),
+            dtype=np.int8 if dtype == "int8" else np.float32, mode="r", shape=(count, dimension)
+        )
+        scales: Optional[np.ndarray] = None
+        if dtype == "int8":
+            scales = np.fromfile(os.path.join(self.path, SCALES_FILE), dtype=np.float32)
+        
+        offset = 0
+        with gzip.open(os.path.join(self.path, PAYLOAD_FILE), "rt", encoding="utf-8") as f:
+            for line in f:
+                columns = json.loads(line)
+                ids = columns.pop("id")
+                payloads = [
+                    {field: values[i] for field, values in columns.items() if values[i] is not None}
+                    for i in range(len(ids))
+                ]
+                block = np.asarray(vectors[offset:offset + len(ids)], dtype=np.float32)
+                if scales is not None:
+                    block = block * scales[offset:offset + len(ids), None]
+                offset += len(ids)
+                yield ids, block, payloads
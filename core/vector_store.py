@@ -3,16 +3,33 @@ InnoCore AI 向量存储管理模块
 """
 
 import asyncio
-from typing import List, Dict, Optional, Any, Tuple
+import logging
+from typing import List, Dict, Optional, Any, Set, Tuple, Iterable, Callable, AsyncIterator
 import numpy as np
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    PointStruct, Filter, FieldCondition, MatchValue, QueryRequest,
+    PayloadSchemaType, KeywordIndexParams
+)
 from qdrant_client.http.models import CollectionInfo
 import hashlib
 import json
+import os
+import re
+import uuid
 
-from .config import get_config
+from .cache import TTLLRUCache
+from .collection_profiles import get_collection_profile
+from .config import get_config, VectorDBType
 from .exceptions import VectorStoreException
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .local_vector_index import LocalVectorClient
+from .search_cache import SearchResultCache, normalize_query
+from .vector_snapshot import SnapshotReader, SnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+_YEAR_PATTERN = re.compile(r"(?<!\d)(1[89]\d{2}|2\d{3})(?!\d)")
 
 class VectorStoreManager:
     """向量存储管理器"""
@@ -20,73 +37,279 @@ class VectorStoreManager:
     def __init__(self):
         self.config = get_config().vector_db
         self.client = None
+        self.embedder = None
+        self.lexical_indexes: Dict[str, LexicalIndex] = {}
         self.l1_collection = f"{self.config.collection_name_prefix}_l1_preset"
         self.l2_collection = f"{self.config.collection_name_prefix}_l2_user"
+        self.profiles = {
+            "l1": get_collection_profile(self.config.l1_collection_profile),
+            "l2": get_collection_profile(self.config.l2_collection_profile)
+        }
+        
+        self.search_cache: Optional[SearchResultCache] = None
+        self.query_embedding_cache: Optional[TTLLRUCache] = None
+        if self.config.search_cache_enabled:
+            self.search_cache = SearchResultCache()
+            self.query_embedding_cache = TTLLRUCache(
+                max_entries=self.config.search_cache_max_entries,
+                ttl=self.config.search_cache_ttl
+            )
     
     async def initialize(self):
         """初始化向量数据库连接"""
         try:
-            self.client = QdrantClient(
-                host=self.config.host,
-                port=self.config.port,
-                api_key=self.config.api_key
-            )
+            # 延迟导入：utils.embedding 依赖 core 包，模块级导入会形成循环
+            from utils.embedding import EmbeddingGenerator
+            
+            self.embedder = EmbeddingGenerator()
+            await self.embedder.initialize()
+            
+            if self.config.db_type == VectorDBType.LOCAL:
+                self.client = LocalVectorClient(
+                    self.config.local_path,
+                    hnsw_m=self.config.hnsw_m,
+                    hnsw_ef_construction=self.config.hnsw_ef_construction,
+                    hnsw_ef_search=self.config.hnsw_ef_search,
+                    exact_search_threshold=self.config.local_exact_search_threshold
+                )
+            else:
+                self.client = AsyncQdrantClient(
+                    host=self.config.host,
+                    port=self.config.port,
+                    api_key=self.config.api_key,
+                    prefer_grpc=self.config.prefer_grpc,
+                    timeout=self.config.timeout,
+                    pool_size=self.config.pool_size
+                )
             await self._create_collections()
+            self._open_lexical_indexes()
         except Exception as e:
             raise VectorStoreException(f"向量数据库初始化失败: {str(e)}")
     
+    def _open_lexical_indexes(self):
+        """打开 L1/L2 的 BM25 词法索引；不可用时混合搜索只使用向量检索"""
+        if not self.config.lexical_index_enabled:
+            return
+        
+        for collection_type, collection_name in (("l1", self.l1_collection), ("l2", self.l2_collection)):
+            try:
+                self.lexical_indexes[collection_type] = LexicalIndex(
+                    os.path.join(self.config.lexical_index_dir, f"{collection_name}.sqlite3")
+                )
+            except Exception as e:
+                logger.warning(f"{collection_type} 词法索引不可用，仅使用向量检索: {str(e)}")
+    
     async def _create_collections(self):
-        """创建向量集合"""
+        """创建向量集合（按 l1/l2_collection_profile 配置存储方案）"""
         collections = [
-            (self.l1_collection, "L1预置库"),
-            (self.l2_collection, "L2用户库")
+            (self.l1_collection, "l1", "L1预置库"),
+            (self.l2_collection, "l2", "L2用户库")
         ]
         
-        for collection_name, description in collections:
+        dimension = self.embedder.dimension  # 与向量后端的输出维度一致
+        
+        for collection_name, collection_type, description in collections:
+            profile = self.profiles[collection_type]
             try:
-                self.client.get_collection(collection_name)
+                info = await self.client.get_collection(collection_name)
             except Exception:
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=collection_name,
-                    vectors_config=VectorParams(
-                        size=1536,  # OpenAI embedding维度
-                        distance=Distance.COSINE
+                    vectors_config=profile.vectors_config(dimension),
+                    quantization_config=profile.quantization_config()
+                )
+                logger.info(f"已创建{description}集合 {collection_name}，存储方案: {profile.name}")
+            else:
+                existing_size = info.config.params.vectors.size
+                if existing_size != dimension:
+                    raise VectorStoreException(
+                        f"{description}集合 {collection_name} 的向量维度为 {existing_size}，"
+                        f"与当前向量后端 {self.embedder.embedding_model} 的维度 {dimension} 不一致，"
+                        f"请更换 collection_name_prefix 或重建集合"
+                    )
+                existing_quantization = getattr(info.config, "quantization_config", None)
+                if (existing_quantization is None) != (profile.quantization is None):
+                    logger.warning(
+                        f"{description}集合 {collection_name} 的量化配置与存储方案 {profile.name} 不一致，"
+                        f"已有集合不会自动迁移，请通过快照导出后重建"
                     )
+            
+            await self._create_payload_indexes(collection_name, collection_name == self.l2_collection)
+    
+    async def _create_payload_indexes(self, collection_name: str, is_user_collection: bool):
+        """为过滤字段建立 payload 索引（索引已存在时为空操作）"""
+        indexes = [
+            ("paper_id", PayloadSchemaType.KEYWORD),
+            ("year", PayloadSchemaType.INTEGER)
+        ]
+        if is_user_collection:
+            # 租户索引让 Qdrant 按用户组织存储，用户过滤检索不随用户数增长而退化
+            indexes.append(("user_id", KeywordIndexParams(type="keyword", is_tenant=True)))
+        
+        for field_name, field_schema in indexes:
+            try:
+                await self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                    wait=True
                 )
+            except Exception as e:
+                logger.warning(f"创建 {collection_name}.{field_name} payload 索引失败: {str(e)}")
     
     def _generate_point_id(self, content: str) -> str:
-        """生成向量点ID"""
-        return hashlib.md5(content.encode()).hexdigest()
+        """生成向量点ID（MD5 按 UUID 格式书写，与 Qdrant 返回的ID格式一致）"""
+        return str(uuid.UUID(hashlib.md5(content.encode()).hexdigest()))
+    
+    @staticmethod
+    def _normalize_point_id(point_id: Any) -> str:
+        """统一点ID格式（Qdrant 返回的 UUID 带连字符，写入时的 MD5 不带）"""
+        try:
+            return str(uuid.UUID(str(point_id)))
+        except ValueError:
+            return str(point_id)
+    
+    @staticmethod
+    def _lexical_text(paper: Dict[str, Any]) -> str:
+        """用于词法索引的论文文本"""
+        return f"{paper.get('title') or ''} {paper.get('abstract') or ''} {(paper.get('content') or '')[:1000]}"
+    
+    async def _index_lexical(self, points: List[PointStruct], papers: List[Dict[str, Any]]):
+        """把已写入的点同步写入对应集合的词法索引"""
+        if not points:
+            return
+        
+        collection_type = points[0].payload["collection_type"]
+        index = self.lexical_indexes.get(collection_type)
+        if index is None:
+            return
+        
+        documents = [
+            (self._normalize_point_id(point.id), self._lexical_text(paper), point.payload.get("user_id"))
+            for point, paper in zip(points, papers)
+        ]
+        try:
+            await asyncio.to_thread(index.add_many, documents)
+        except Exception as e:
+            logger.warning(f"更新 {collection_type} 词法索引失败: {str(e)}")
+    
+    @staticmethod
+    def _embedding_text(paper: Dict[str, Any]) -> str:
+        """用于生成向量的论文文本"""
+        return f"{paper.get('title', '')} {paper.get('abstract', '')} {paper.get('content', '')}"
+    
+    @staticmethod
+    def _paper_year(paper: Dict[str, Any]) -> Optional[int]:
+        """从论文元数据中提取发表年份（用于 year 索引过滤）"""
+        metadata = paper.get("metadata") or {}
+        for key in ("year", "published", "publication_date", "date"):
+            value = metadata.get(key) or paper.get(key)
+            if isinstance(value, int):
+                return value
+            match = _YEAR_PATTERN.search(str(value or ""))
+            if match:
+                return int(match.group(1))
+        return None
+    
+    def _build_payload(self, paper: Dict[str, Any], collection_type: str,
+                       user_id: str = None, slim: bool = False) -> Dict[str, Any]:
+        """
+        构建向量点的 payload
+        
+        精简模式只保存检索和过滤需要的字段（paper_id、title、year、user_id 等），
+        摘要和正文在检索时按需从 Postgres 回查，见 _hydrate_payloads。
+        调用方须先用 _slim_paper_ids 确认论文在 Postgres 中有记录，否则应保存完整 payload。
+        """
+        payload = {
+            "paper_id": paper["paper_id"],
+            "title": paper.get("title", ""),
+            "year": self._paper_year(paper),
+            "collection_type": collection_type,
+            "created_at": str(asyncio.get_event_loop().time())
+        }
+        if user_id is not None:
+            payload["user_id"] = user_id
+        
+        if not slim:
+            payload.update({
+                "abstract": paper.get("abstract", ""),
+                "content": (paper.get("content") or "")[:1000],  # 截取前1000字符
+                "metadata": paper.get("metadata") or {}
+            })
+        return payload
+    
+    def _build_l1_point(self, paper: Dict[str, Any], embedding: List[float],
+                        slim: bool = False) -> PointStruct:
+        """构建L1预置库的向量点"""
+        return PointStruct(
+            id=self._generate_point_id(f"{paper['paper_id']}_l1"),
+            vector=embedding,
+            payload=self._build_payload(paper, "l1", slim=slim)
+        )
+    
+    def _build_l2_point(self, user_id: str, paper: Dict[str, Any],
+                        embedding: List[float], slim: bool = False) -> PointStruct:
+        """构建L2用户库的向量点"""
+        return PointStruct(
+            id=self._generate_point_id(f"{user_id}_{paper['paper_id']}_l2"),
+            vector=embedding,
+            payload=self._build_payload(paper, "l2", user_id=user_id, slim=slim)
+        )
+    
+    async def _slim_paper_ids(self, papers: List[Dict[str, Any]], slim: bool = None) -> Set[str]:
+        """
+        返回可以使用精简 payload 的论文ID
+        
+        只有 Postgres 中存在同 ID 记录的论文才能在检索时回查摘要和正文；
+        预置库等外部导入的论文（如 arXiv ID）没有数据库记录，必须保存完整 payload，
+        否则文本会在回查、重建词法索引和导出快照时丢失。查询失败时全部按完整 payload 处理。
+        """
+        if not (self.config.slim_payloads if slim is None else slim):
+            return set()
+        stored = await self._load_papers([paper["paper_id"] for paper in papers])
+        return {
+            paper["paper_id"] for paper in papers
+            if self._normalize_paper_id(paper["paper_id"]) in stored
+        }
+    
+    @staticmethod
+    def _normalize_paper_id(paper_id: Any) -> str:
+        """统一 UUID 形式的论文ID（与 db_manager.get_papers 返回的键一致）"""
+        try:
+            return str(uuid.UUID(str(paper_id)))
+        except ValueError:
+            return str(paper_id)
+    
+    def _invalidate_search_cache(self, collection_type: str, user_id: str = None):
+        """写入后使相关的搜索缓存失效：L1 整体失效，L2 只失效对应用户"""
+        if self.search_cache is None:
+            return
+        if collection_type == "l2" and user_id is not None:
+            self.search_cache.invalidate_user(user_id)
+        else:
+            self.search_cache.invalidate_collection(collection_type)
     
     async def add_to_l1(self, paper_id: str, title: str, abstract: str, 
                        content: str, metadata: Dict = None) -> str:
         """添加到L1预置库"""
         try:
-            # 生成embedding (这里需要调用实际的embedding服务)
-            embedding = await self._generate_embedding(f"{title} {abstract} {content}")
+            paper = {"paper_id": paper_id, "title": title, "abstract": abstract,
+                     "content": content, "metadata": metadata}
+            embedding = await self._generate_embedding(self._embedding_text(paper))
+            slim_ids = await self._slim_paper_ids([paper])
+            point = self._build_l1_point(paper, embedding, slim=paper_id in slim_ids)
             
-            point_id = self._generate_point_id(f"{paper_id}_l1")
-            
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "paper_id": paper_id,
-                    "title": title,
-                    "abstract": abstract,
-                    "content": content[:1000],  # 截取前1000字符
-                    "metadata": metadata or {},
-                    "collection_type": "l1",
-                    "created_at": str(asyncio.get_event_loop().time())
-                }
-            )
-            
-            self.client.upsert(
-                collection_name=self.l1_collection,
-                points=[point]
+            await asyncio.wait_for(
+                self.client.upsert(
+                    collection_name=self.l1_collection,
+                    points=[point]
+                ),
+                timeout=self.config.write_timeout
             )
+            await self._index_lexical([point], [paper])
+            self._invalidate_search_cache("l1")
             
-            return point_id
+            return point.id
             
         except Exception as e:
             raise VectorStoreException(f"添加到L1库失败: {str(e)}")
@@ -95,187 +318,773 @@ class VectorStoreManager:
                        abstract: str, content: str, metadata: Dict = None) -> str:
         """添加到L2用户库"""
         try:
-            embedding = await self._generate_embedding(f"{title} {abstract} {content}")
-            
-            point_id = self._generate_point_id(f"{user_id}_{paper_id}_l2")
+            paper = {"paper_id": paper_id, "title": title, "abstract": abstract,
+                     "content": content, "metadata": metadata}
+            embedding = await self._generate_embedding(self._embedding_text(paper))
+            slim_ids = await self._slim_paper_ids([paper])
+            point = self._build_l2_point(user_id, paper, embedding, slim=paper_id in slim_ids)
             
-            point = PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "user_id": user_id,
-                    "paper_id": paper_id,
-                    "title": title,
-                    "abstract": abstract,
-                    "content": content[:1000],
-                    "metadata": metadata or {},
-                    "collection_type": "l2",
-                    "created_at": str(asyncio.get_event_loop().time())
-                }
-            )
-            
-            self.client.upsert(
-                collection_name=self.l2_collection,
-                points=[point]
+            await asyncio.wait_for(
+                self.client.upsert(
+                    collection_name=self.l2_collection,
+                    points=[point]
+                ),
+                timeout=self.config.write_timeout
             )
+            await self._index_lexical([point], [paper])
+            self._invalidate_search_cache("l2", user_id)
             
-            return point_id
+            return point.id
             
         except Exception as e:
             raise VectorStoreException(f"添加到L2库失败: {str(e)}")
     
-    async def hybrid_search(self, query: str, user_id: str = None, 
-                           top_k: int = 5, include_l1: bool = True,
-                           include_l2: bool = True) -> List[Dict]:
-        """混合搜索"""
+    async def _bulk_upsert(self, collection_name: str, papers: Iterable[Dict[str, Any]],
+                           build_point: Callable[[Dict[str, Any], List[float], bool], PointStruct],
+                           chunk_size: int = None,
+                           progress_callback: Callable[[Dict[str, int]], None] = None,
+                           slim_payload: bool = None) -> Dict[str, int]:
+        """
+        流式批量写入
+        
+        论文按块读取，每块一次批量生成向量、一次 upsert；最多 upsert_concurrency 个块
+        同时处理。点 ID 由论文 ID 决定，重复导入会覆盖而不会产生重复点。
+        每块用一次批量查询确认哪些论文在 Postgres 中有记录，只有这些论文使用精简 payload。
+        向量生成失败的论文不写入向量库和词法索引，计入 failed，重新导入时会再次尝试。
+        """
+        chunk_size = chunk_size or self.config.upsert_batch_size
+        semaphore = asyncio.Semaphore(self.config.upsert_concurrency)
+        progress = {"submitted": 0, "upserted": 0, "failed": 0, "skipped": 0}
+        
+        async def process_chunk(chunk: List[Dict[str, Any]]):
+            try:
+                # 同一块内重复的论文只保留最后一条
+                unique = list({paper["paper_id"]: paper for paper in chunk}.values())
+                (embeddings, failed_rows), slim_ids = await asyncio.gather(
+                    self.embedder.embed_texts(
+                        [self._embedding_text(paper) for paper in unique], return_failed=True
+                    ),
+                    self._slim_paper_ids(unique, slim_payload)
+                )
+                # 零向量没有方向，写入后既检索不到也会被当作成功，直接跳过
+                failed_rows = set(failed_rows)
+                embedded = [paper for row, paper in enumerate(unique) if row not in failed_rows]
+                points = [
+                    build_point(paper, embeddings[row].tolist(), paper["paper_id"] in slim_ids)
+                    for row, paper in enumerate(unique) if row not in failed_rows
+                ]
+                if failed_rows:
+                    logger.warning(
+                        f"{collection_name} 有 {len(failed_rows)} 篇论文向量生成失败，未写入: "
+                        f"{[unique[row]['paper_id'] for row in sorted(failed_rows)][:10]}"
+                    )
+                if points:
+                    await asyncio.wait_for(
+                        self.client.upsert(collection_name=collection_name, points=points),
+                        timeout=self.config.write_timeout
+                    )
+                    await self._index_lexical(points, embedded)
+                    self._invalidate_search_cache(
+                        points[0].payload["collection_type"], points[0].payload.get("user_id")
+                    )
+                progress["upserted"] += len(points)
+                progress["failed"] += len(failed_rows)
+                progress["skipped"] += len(chunk) - len(unique)
+            except Exception as e:
+                progress["failed"] += len(chunk)
+                logger.warning(f"批量写入 {collection_name} 失败（{len(chunk)} 条）: {str(e)}")
+            finally:
+                semaphore.release()
+                if progress_callback:
+                    progress_callback(dict(progress))
+        
+        tasks = set()
+        chunk = []
+        
+        async def submit(chunk: List[Dict[str, Any]]):
+            # 先占用并发名额再创建任务，避免一次性读入全部输入
+            await semaphore.acquire()
+            progress["submitted"] += len(chunk)
+            task = asyncio.create_task(process_chunk(chunk))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        for paper in papers:
+            if not paper.get("paper_id"):
+                progress["skipped"] += 1
+                continue
+            chunk.append(paper)
+            if len(chunk) >= chunk_size:
+                await submit(chunk)
+                chunk = []
+        if chunk:
+            await submit(chunk)
+        
+        if tasks:
+            await asyncio.gather(*tasks)
+        return progress
+    
+    async def add_many_to_l1(self, papers: Iterable[Dict[str, Any]], chunk_size: int = None,
+                             progress_callback: Callable[[Dict[str, int]], None] = None,
+                             slim_payload: bool = None) -> Dict[str, int]:
+        """
+        批量添加到L1预置库
+        
+        Args:
+            papers: 论文字典的可迭代对象，包含 paper_id、title、abstract，可选 content、metadata
+            chunk_size: 每次 upsert 的点数，默认取配置 upsert_batch_size
+            progress_callback: 每处理完一块调用一次，参数为累计统计
+            slim_payload: 是否允许精简 payload，默认取配置 slim_payloads；
+                即使允许，也只有在 Postgres 中有记录的论文才会精简
+        
+        Returns:
+            {"submitted", "upserted", "failed", "skipped"} 统计；向量生成失败的论文计入 failed
+        """
+        return await self._bulk_upsert(
+            self.l1_collection, papers,
+            lambda paper, embedding, slim: self._build_l1_point(paper, embedding, slim=slim),
+            chunk_size, progress_callback, slim_payload
+        )
+    
+    async def add_many_to_l2(self, user_id: str, papers: Iterable[Dict[str, Any]],
+                             chunk_size: int = None,
+                             progress_callback: Callable[[Dict[str, int]], None] = None,
+                             slim_payload: bool = None) -> Dict[str, int]:
+        """批量添加到L2用户库（参数与返回值同 add_many_to_l1）"""
+        return await self._bulk_upsert(
+            self.l2_collection, papers,
+            lambda paper, embedding, slim: self._build_l2_point(user_id, paper, embedding, slim=slim),
+            chunk_size, progress_callback, slim_payload
+        )
+    
+    @staticmethod
+    def _user_filter(user_id: str) -> Filter:
+        """构建用户过滤条件"""
+        return Filter(
+            must=[
+                FieldCondition(
+                    key="user_id",
+                    match=MatchValue(value=user_id)
+                )
+            ]
+        )
+    
+    def _search_legs(self, user_id: str = None, include_l1: bool = True,
+                     include_l2: bool = True) -> List[Tuple[str, str, Optional[Filter]]]:
+        """需要检索的集合：(集合名, 集合类型, 过滤条件)"""
+        legs = []
+        if include_l1:
+            legs.append((self.l1_collection, "l1", None))
+        if include_l2 and user_id:
+            legs.append((self.l2_collection, "l2", self._user_filter(user_id)))
+        return legs
+    
+    async def _lexical_search(self, query: str, collection_type: str,
+                              user_id: str, limit: int) -> List[Tuple[str, float]]:
+        """在某个集合的词法索引上执行 BM25 检索"""
+        index = self.lexical_indexes.get(collection_type)
+        if index is None:
+            return []
         try:
-            query_embedding = await self._generate_embedding(query)
-            results = []
-            
-            config = get_config()
-            vector_weight = config.hybrid_search_weights.get("vector", 0.7)
-            keyword_weight = config.hybrid_search_weights.get("keyword", 0.3)
-            
-            # L1库搜索
-            if include_l1:
-                l1_results = self.client.search(
-                    collection_name=self.l1_collection,
-                    query_vector=query_embedding,
-                    limit=top_k,
-                    with_payload=True
+            return await asyncio.to_thread(
+                index.search, query, limit, user_id if collection_type == "l2" else None
+            )
+        except Exception as e:
+            logger.warning(f"{collection_type} 词法检索失败: {str(e)}")
+            return []
+    
+    async def _query_embeddings(self, queries: List[str]) -> List[Optional[List[float]]]:
+        """
+        生成查询向量；规范化后相同的查询复用缓存的向量，不再调用 embedding 接口
+        
+        多个查询中部分生成失败时，失败查询的向量为 None（调用方只做词法检索）；
+        全部失败时抛出异常。
+        """
+        texts = [normalize_query(query) for query in queries]
+        cache = self.query_embedding_cache
+        keys = [(self.embedder.embedding_model, text) for text in texts]
+        embeddings = [cache.get(key) if cache is not None else None for key in keys]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if len(missing) == 1:
+            generated = [await self._generate_embedding(texts[missing[0]])]
+        elif missing:
+            matrix, failed = await self.embedder.embed_texts(
+                [texts[i] for i in missing], return_failed=True
+            )
+            failed = set(failed)
+            generated = [None if row in failed else embedding.tolist() for row, embedding in enumerate(matrix)]
+        else:
+            generated = []
+        
+        for i, embedding in zip(missing, generated):
+            embeddings[i] = embedding
+            if cache is not None and embedding is not None:
+                cache.set(keys[i], embedding)
+        return embeddings
+    
+    async def _run_legs(self, queries: List[str], legs: List[Tuple[str, str, Optional[Filter]]],
+                        user_id: str, limit: int,
+                        with_payload: Any) -> List[List[Tuple[List[Any], List[Tuple[str, float]]]]]:
+        """
+        执行各集合的向量检索和 BM25 检索
+        
+        命中结果缓存的 (查询, 集合) 直接复用；只有存在未命中集合的查询才生成向量，
+        每个集合的未命中查询合并为一次（批量）检索，各集合与词法检索并发执行。
+        
+        Returns:
+            results[查询下标][集合下标] = (向量命中的点, [(点ID, BM25 分数), ...])
+        """
+        cache = self.search_cache
+        results: List[List[Any]] = [[None] * len(legs) for _ in queries]
+        keys: Dict[Tuple[int, int], Any] = {}
+        if cache is not None:
+            for i, query in enumerate(queries):
+                for j, (_, collection_type, _) in enumerate(legs):
+                    keys[i, j] = cache.make_key(collection_type, query, user_id, limit, with_payload)
+                    results[i][j] = cache.get(keys[i, j])
+        
+        pending = [[i for i in range(len(queries)) if results[i][j] is None] for j in range(len(legs))]
+        query_indexes = sorted({i for leg_pending in pending for i in leg_pending})
+        if not query_indexes:
+            return results
+        embeddings = dict(zip(
+            query_indexes, await self._query_embeddings([queries[i] for i in query_indexes])
+        ))
+        
+        async def vector_leg(j: int) -> List[List[Any]]:
+            collection_name, collection_type, query_filter = legs[j]
+            # 向量生成失败的查询不做向量检索，只保留词法检索结果
+            searchable = [i for i in pending[j] if embeddings[i] is not None]
+            if not searchable:
+                return [[] for _ in pending[j]]
+            search_params = self.profiles[collection_type].search_params(
+                self.config.quantization_oversampling
+            )
+            if len(searchable) == 1:
+                response = await self.client.query_points(
+                    collection_name=collection_name,
+                    query=embeddings[searchable[0]],
+                    query_filter=query_filter,
+                    search_params=search_params,
+                    limit=limit,
+                    with_payload=with_payload,
+                    timeout=self.config.search_timeout
                 )
-                
-                for result in l1_results:
-                    results.append({
-                        "id": result.id,
-                        "score": result.score * vector_weight,
-                        "payload": result.payload,
-                        "collection_type": "l1"
-                    })
-            
-            # L2库搜索
-            if include_l2 and user_id:
-                # 构建用户过滤条件
-                user_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="user_id",
-                            match=MatchValue(value=user_id)
+                points_by_query = {searchable[0]: response.points}
+            else:
+                responses = await self.client.query_batch_points(
+                    collection_name=collection_name,
+                    requests=[
+                        QueryRequest(
+                            query=embeddings[i],
+                            filter=query_filter,
+                            params=search_params,
+                            limit=limit,
+                            with_payload=with_payload
                         )
-                    ]
+                        for i in searchable
+                    ],
+                    timeout=self.config.search_timeout
                 )
-                
-                l2_results = self.client.search(
-                    collection_name=self.l2_collection,
-                    query_vector=query_embedding,
-                    query_filter=user_filter,
-                    limit=top_k,
-                    with_payload=True
-                )
-                
-                for result in l2_results:
-                    results.append({
-                        "id": result.id,
-                        "score": result.score * vector_weight,
-                        "payload": result.payload,
-                        "collection_type": "l2"
-                    })
-            
-            # 关键词匹配加分
-            for result in results:
-                payload = result["payload"]
-                keyword_score = self._calculate_keyword_score(
-                    query, 
-                    f"{payload.get('title', '')} {payload.get('abstract', '')}"
+                points_by_query = {i: response.points for i, response in zip(searchable, responses)}
+            return [points_by_query.get(i, []) for i in pending[j]]
+        
+        vector_hits, lexical_hits = await asyncio.gather(
+            asyncio.gather(*(vector_leg(j) for j in range(len(legs)))),
+            asyncio.gather(*(
+                self._lexical_search(queries[i], legs[j][1], user_id, limit)
+                for j in range(len(legs)) for i in pending[j]
+            ))
+        )
+        
+        lexical_iter = iter(lexical_hits)
+        for j in range(len(legs)):
+            for i, points in zip(pending[j], vector_hits[j]):
+                results[i][j] = (points, next(lexical_iter))
+                # 只有词法结果的查询不缓存，向量生成恢复后重新检索
+                if cache is not None and embeddings[i] is not None:
+                    cache.set(keys[i, j], results[i][j])
+        return results
+    
+    async def _fuse_results(self, legs: List[Tuple[str, str, Optional[Filter]]],
+                            leg_results: List[Tuple[List[Any], List[Tuple[str, float]]]],
+                            top_k: int, with_payload: Any = True) -> List[Dict]:
+        """
+        用加权倒数排名融合 (RRF) 合并向量和 BM25 两路结果
+        
+        fused_score 是排名分数，按两路都排第一时的最大值归一化到 [0, 1]，只用于排序，
+        不是相似度；余弦相似度保留在 vector_score（只被词法检索命中的点为 None）。
+        只被词法检索命中的点会回查向量库补齐 payload。
+        """
+        config = get_config()
+        vector_weight = config.hybrid_search_weights.get("vector", 0.7)
+        keyword_weight = config.hybrid_search_weights.get("keyword", 0.3)
+        
+        collection_names = {collection_type: name for name, collection_type, _ in legs}
+        candidates: Dict[str, Dict[str, Any]] = {}
+        ranked_lists = []
+        
+        for (_, collection_type, _), (points, _) in zip(legs, leg_results):
+            ids = []
+            for point in points:
+                point_id = self._normalize_point_id(point.id)
+                ids.append(point_id)
+                candidates[point_id] = {
+                    "id": point.id,
+                    # 点可能来自结果缓存，复制 payload 避免回查补齐字段时修改缓存
+                    "payload": dict(point.payload or {}),
+                    "collection_type": collection_type,
+                    "vector_score": point.score,
+                    "keyword_score": 0.0
+                }
+            ranked_lists.append((ids, vector_weight))
+        
+        for (_, collection_type, _), (_, hits) in zip(legs, leg_results):
+            for point_id, bm25_score in hits:
+                candidate = candidates.setdefault(point_id, {
+                    "id": point_id,
+                    "payload": None,
+                    "collection_type": collection_type,
+                    "vector_score": None
+                })
+                candidate["keyword_score"] = bm25_score
+            ranked_lists.append(([point_id for point_id, _ in hits], keyword_weight))
+        
+        fused = reciprocal_rank_fusion(ranked_lists, k=self.config.rrf_k)
+        top_ids = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        
+        # 补齐只在词法索引中命中的点的 payload
+        missing: Dict[str, List[str]] = {}
+        for point_id in top_ids:
+            if candidates[point_id]["payload"] is None:
+                missing.setdefault(candidates[point_id]["collection_type"], []).append(point_id)
+        if missing:
+            records = await asyncio.gather(*(
+                self.client.retrieve(
+                    collection_name=collection_names[collection_type],
+                    ids=ids,
+                    with_payload=with_payload,
+                    timeout=self.config.search_timeout
                 )
-                result["score"] += keyword_score * keyword_weight
+                for collection_type, ids in missing.items()
+            ))
+            for record in (record for batch in records for record in batch):
+                candidates[self._normalize_point_id(record.id)]["payload"] = record.payload or {}
+        
+        max_score = (vector_weight + keyword_weight) / (self.config.rrf_k + 1)
+        results = []
+        for point_id in top_ids:
+            candidate = candidates[point_id]
+            if candidate["payload"] is None:
+                # 词法索引中残留的已删除点
+                continue
+            candidate["fused_score"] = fused[point_id] / max_score
+            results.append(candidate)
+        return results
+    
+    @staticmethod
+    def _payload_selector(payload_fields: Optional[List[str]]) -> Any:
+        """检索时的 payload 选择：None 返回全部已存字段，否则只取指定字段（及回查用的 paper_id）"""
+        if payload_fields is None:
+            return True
+        return list(dict.fromkeys(["paper_id", *payload_fields]))
+    
+    async def _load_papers(self, paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """从 Postgres 读取论文记录；不是数据库ID的 paper_id（如外部导入的 arXiv ID）直接跳过"""
+        # 延迟导入：只有精简 payload 需要回查时才依赖 Postgres
+        from .database import db_manager
+        
+        try:
+            return await db_manager.get_papers(paper_ids)
+        except Exception as e:
+            logger.warning(f"回查 {len(paper_ids)} 篇论文失败: {str(e)}")
+            return {}
+    
+    async def _hydrate_payloads(self, results: List[Dict], payload_fields: Optional[List[str]]) -> List[Dict]:
+        """
+        补齐结果 payload 中缺少的请求字段
+        
+        精简 payload 不含摘要等字段，按 paper_id 去重后从 Postgres 回查一次。
+        payload_fields 为 None 时原样返回已存字段，不做回查。
+        """
+        if payload_fields is None:
+            return results
+        
+        pending: Dict[str, List[Dict]] = {}
+        for result in results:
+            payload = result["payload"]
+            if payload.get("paper_id") and any(field not in payload for field in payload_fields):
+                pending.setdefault(str(payload["paper_id"]), []).append(result)
+        
+        papers = await self._load_papers(list(pending)) if pending else {}
+        for paper_id, paper in papers.items():
+            for result in pending[paper_id]:
+                for field in payload_fields:
+                    if field not in result["payload"] and field in paper:
+                        result["payload"][field] = paper[field]
+        
+        selected = self._payload_selector(payload_fields)
+        for result in results:
+            result["payload"] = {
+                field: result["payload"][field] for field in selected if field in result["payload"]
+            }
+        return results
+    
+    async def hybrid_search(self, query: str, user_id: str = None, 
+                           top_k: int = 5, include_l1: bool = True,
+                           include_l2: bool = True,
+                           payload_fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        混合搜索
+        
+        向量检索和 BM25 词法检索各取 top_k * hybrid_oversample 个候选，
+        L1、L2 两个集合并发检索，最后用 RRF 融合。各集合的候选和查询向量会被缓存，
+        L1 结果跨用户共享，写入对应集合或用户数据时失效。
+        
+        Args:
+            payload_fields: 只返回这些 payload 字段；向量库中没有的字段（如精简 payload
+                下的 abstract）会按 paper_id 从 Postgres 回查。None 时返回向量库中保存的全部字段
+        
+        Returns:
+            按 fused_score 降序的结果 [{"id", "payload", "collection_type", "fused_score",
+            "vector_score", "keyword_score"}]。fused_score 为 RRF 排名分数（首位通常接近 1），
+            需要相似度或按阈值过滤时使用 vector_score（余弦相似度，仅词法命中时为 None）
+        """
+        try:
+            legs = self._search_legs(user_id, include_l1, include_l2)
+            candidate_limit = top_k * self.config.hybrid_oversample
+            with_payload = self._payload_selector(payload_fields)
             
-            # 按分数排序并返回top_k
-            results.sort(key=lambda x: x["score"], reverse=True)
-            return results[:top_k]
+            leg_results = (await self._run_legs(
+                [query], legs, user_id, candidate_limit, with_payload
+            ))[0]
+            results = await self._fuse_results(legs, leg_results, top_k, with_payload)
+            return await self._hydrate_payloads(results, payload_fields)
             
         except Exception as e:
             raise VectorStoreException(f"混合搜索失败: {str(e)}")
     
-    def _calculate_keyword_score(self, query: str, content: str) -> float:
-        """计算关键词匹配分数"""
-        query_words = set(query.lower().split())
-        content_words = set(content.lower().split())
+    async def hybrid_search_many(self, queries: List[str], user_id: str = None,
+                                top_k: int = 5, include_l1: bool = True,
+                                include_l2: bool = True,
+                                payload_fields: Optional[List[str]] = None) -> List[List[Dict]]:
+        """
+        批量混合搜索
+        
+        未命中缓存的查询一次批量生成向量，每个集合一次批量检索请求，两个集合并发执行。
         
-        if not query_words:
-            return 0.0
+        Returns:
+            与 queries 一一对应的结果列表，每项格式同 hybrid_search
+        """
+        if not queries:
+            return []
         
-        intersection = query_words.intersection(content_words)
-        return len(intersection) / len(query_words)
+        try:
+            legs = self._search_legs(user_id, include_l1, include_l2)
+            candidate_limit = top_k * self.config.hybrid_oversample
+            with_payload = self._payload_selector(payload_fields)
+            
+            leg_results = await self._run_legs(queries, legs, user_id, candidate_limit, with_payload)
+            results = await asyncio.gather(*(
+                self._fuse_results(legs, query_leg_results, top_k, with_payload)
+                for query_leg_results in leg_results
+            ))
+            # 所有查询的结果合并后一次回查，重复命中的论文只读取一次
+            await self._hydrate_payloads([result for batch in results for result in batch], payload_fields)
+            return list(results)
+            
+        except Exception as e:
+            raise VectorStoreException(f"批量混合搜索失败: {str(e)}")
     
     async def _generate_embedding(self, text: str) -> List[float]:
         """生成文本向量"""
-        # 这里应该调用实际的embedding服务
-        # 暂时返回随机向量作为示例
-        import random
-        return [random.random() for _ in range(1536)]
+        return await self.embedder.generate_embedding(text)
     
-    async def get_user_vectors(self, user_id: str, limit: int = 100) -> List[Dict]:
-        """获取用户的向量数据"""
-        try:
-            user_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="user_id",
-                        match=MatchValue(value=user_id)
-                    )
-                ]
-            )
-            
-            results = self.client.scroll(
-                collection_name=self.l2_collection,
-                scroll_filter=user_filter,
-                limit=limit,
-                with_payload=True
+    async def _scroll_pages(self, collection_name: str, scroll_filter: Filter = None,
+                            page_size: int = 256, with_payload: Any = True,
+                            with_vectors: bool = False) -> AsyncIterator[List[Any]]:
+        """按 scroll 返回的偏移逐页遍历集合，每次只持有一页"""
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+                timeout=self.config.search_timeout
             )
-            
-            return [
-                {
-                    "id": point.id,
-                    "payload": point.payload
-                }
-                for point in results[0]
-            ]
-            
+            if points:
+                yield points
+            if offset is None:
+                return
+    
+    async def iter_user_vectors(self, user_id: str, page_size: int = 256,
+                                with_vectors: bool = False,
+                                payload_fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict]]:
+        """
+        分页遍历用户的全部向量数据
+        
+        沿 scroll 偏移逐页读取，内存占用与用户库大小无关，
+        适合导出、重新生成向量和聚类等需要遍历整个用户库的任务。
+        
+        Args:
+            user_id: 用户ID
+            page_size: 每页点数
+            with_vectors: 是否同时返回向量
+            payload_fields: 只返回这些 payload 字段（缺少的字段从 Postgres 回查），None 返回全部已存字段
+        
+        Yields:
+            每页 [{"id", "payload"[, "vector"]}, ...]
+        """
+        try:
+            async for points in self._scroll_pages(
+                self.l2_collection, self._user_filter(user_id), page_size,
+                self._payload_selector(payload_fields), with_vectors
+            ):
+                page = []
+                for point in points:
+                    item = {"id": point.id, "payload": point.payload or {}}
+                    if with_vectors:
+                        item["vector"] = point.vector
+                    page.append(item)
+                yield await self._hydrate_payloads(page, payload_fields)
         except Exception as e:
             raise VectorStoreException(f"获取用户向量失败: {str(e)}")
     
+    async def get_user_vectors(self, user_id: str, limit: Optional[int] = 100,
+                               with_vectors: bool = False) -> List[Dict]:
+        """
+        获取用户的向量数据
+        
+        Args:
+            limit: 最多返回的点数，None 返回全部（大型用户库请使用 iter_user_vectors）
+        """
+        page_size = min(limit, 256) if limit else 256
+        results = []
+        async for page in self.iter_user_vectors(user_id, page_size=page_size, with_vectors=with_vectors):
+            results.extend(page)
+            if limit and len(results) >= limit:
+                return results[:limit]
+        return results
+    
     async def delete_user_vectors(self, user_id: str) -> bool:
         """删除用户的所有向量数据"""
         try:
-            user_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="user_id",
-                        match=MatchValue(value=user_id)
-                    )
-                ]
-            )
+            user_filter = self._user_filter(user_id)
             
-            self.client.delete(
-                collection_name=self.l2_collection,
-                points_selector=user_filter
+            await asyncio.wait_for(
+                self.client.delete(
+                    collection_name=self.l2_collection,
+                    points_selector=user_filter
+                ),
+                timeout=self.config.write_timeout
             )
             
+            if "l2" in self.lexical_indexes:
+                await asyncio.to_thread(self.lexical_indexes["l2"].delete_user, user_id)
+            self._invalidate_search_cache("l2", user_id)
+            
             return True
             
         except Exception as e:
             raise VectorStoreException(f"删除用户向量失败: {str(e)}")
     
+    async def rebuild_lexical_index(self, collection_type: str = "l1",
+                                    batch_size: int = 512) -> int:
+        """从向量库全量重建词法索引（用于启用词法检索之前已导入的数据），返回文档数"""
+        index = self.lexical_indexes.get(collection_type)
+        if index is None:
+            raise VectorStoreException(f"{collection_type} 词法索引未启用")
+        
+        collection_name = self.l1_collection if collection_type == "l1" else self.l2_collection
+        total = 0
+        async for points in self._scroll_pages(collection_name, page_size=batch_size):
+            # 精简 payload 不含摘要，从 Postgres 补齐后再建索引
+            records = await self._hydrate_payloads(
+                [{"payload": dict(point.payload or {})} for point in points],
+                ["title", "abstract", "content", "user_id"]
+            )
+            await asyncio.to_thread(index.add_many, [
+                (self._normalize_point_id(point.id), self._lexical_text(record["payload"]),
+                 record["payload"].get("user_id"))
+                for point, record in zip(points, records)
+            ])
+            total += len(points)
+        
+        self._invalidate_search_cache(collection_type)
+        return total
+    
+    async def export_snapshot(self, path: str, collection_type: str = "l1", dtype: str = "float32",
+                              user_id: str = None, page_size: int = 1024,
+                              progress_callback: Callable[[int], None] = None) -> Dict[str, Any]:
+        """
+        把集合导出为快照
+        
+        沿 scroll 偏移逐页读取向量和 payload 并追加写入快照文件，内存占用与集合大小无关。
+        
+        Args:
+            path: 快照目录（不能是已有快照）
+            collection_type: "l1" 或 "l2"
+            dtype: 向量存储格式，"float32" 或 "int8"（体积约 1/4，按行量化，余弦检索几乎无损）
+            user_id: 只导出该用户的 L2 数据
+            page_size: 每页读取的点数，也是快照中 payload 的分块大小
+            progress_callback: 每写入一页调用一次，参数为累计点数
+        
+        Returns:
+            快照清单
+        """
+        collection_name = self.l1_collection if collection_type == "l1" else self.l2_collection
+        try:
+            writer = SnapshotWriter(
+                path, self.embedder.embedding_model, self.embedder.dimension, dtype,
+                metadata={
+                    "collection_type": collection_type,
+                    "collection_name": collection_name,
+                    "user_id": user_id
+                }
+            )
+        except ValueError as e:
+            raise VectorStoreException(f"导出快照失败: {str(e)}")
+        
+        try:
+            scroll_filter = self._user_filter(user_id) if user_id else None
+            async for points in self._scroll_pages(
+                collection_name, scroll_filter, page_size, with_payload=True, with_vectors=True
+            ):
+                await asyncio.to_thread(
+                    writer.write_block,
+                    [point.id for point in points],
+                    [point.vector for point in points],
+                    [point.payload or {} for point in points]
+                )
+                if progress_callback:
+                    progress_callback(writer.count)
+            return await asyncio.to_thread(writer.close)
+        except Exception as e:
+            writer.abort()
+            raise VectorStoreException(f"导出快照失败: {str(e)}")
+    
+    async def import_snapshot(self, path: str, collection_type: str = None, force: bool = False,
+                              progress_callback: Callable[[int], None] = None) -> int:
+        """
+        从快照批量导入，直接写入快照中的向量，不重新生成
+        
+        导入前流式校验文件摘要和清单校验和；快照的向量模型与当前向量后端不一致时拒绝导入
+        （force=True 可跳过模型名检查，维度必须一致）。点ID沿用快照中的ID，重复导入会覆盖。
+        
+        Args:
+            path: 快照目录
+            collection_type: 导入到的集合，默认使用导出时的集合
+            force: 忽略向量模型名不一致
+            progress_callback: 每写入一块调用一次，参数为累计点数
+        
+        Returns:
+            导入的点数
+        """
+        try:
+            reader = SnapshotReader(path)
+            if reader.dimension != self.embedder.dimension:
+                raise ValueError(
+                    f"快照向量维度 {reader.dimension} 与当前向量后端维度 {self.embedder.dimension} 不一致"
+                )
+            if reader.embedding_model != self.embedder.embedding_model and not force:
+                raise ValueError(
+                    f"快照向量模型 {reader.embedding_model} 与当前向量后端 "
+                    f"{self.embedder.embedding_model} 不一致"
+                )
+            await asyncio.to_thread(reader.verify)
+        except ValueError as e:
+            raise VectorStoreException(f"导入快照失败: {str(e)}")
+        
+        collection_type = collection_type or reader.manifest["metadata"].get("collection_type", "l1")
+        collection_name = self.l1_collection if collection_type == "l1" else self.l2_collection
+        semaphore = asyncio.Semaphore(self.config.upsert_concurrency)
+        tasks = set()
+        total = 0
+        failure: Optional[Exception] = None
+        
+        async def upsert_block(points: List[PointStruct]):
+            nonlocal total, failure
+            try:
+                await asyncio.wait_for(
+                    self.client.upsert(collection_name=collection_name, points=points),
+                    timeout=self.config.write_timeout
+                )
+                await self._index_lexical(points, [point.payload for point in points])
+                total += len(points)
+                if progress_callback:
+                    progress_callback(total)
+            except Exception as e:
+                # 记录第一个失败，主循环据此停止读取和提交后续块
+                if failure is None:
+                    failure = e
+            finally:
+                semaphore.release()
+        
+        try:
+            blocks = reader.iter_blocks()
+            while failure is None:
+                # 读取下一块在线程中进行，不阻塞事件循环
+                block = await asyncio.to_thread(next, blocks, None)
+                if block is None:
+                    break
+                ids, vectors, payloads = block
+                for payload in payloads:
+                    payload["collection_type"] = collection_type
+                points = [
+                    PointStruct(id=point_id, vector=vector.tolist(), payload=payload)
+                    for point_id, vector, payload in zip(ids, vectors, payloads)
+                ]
+                
+                await semaphore.acquire()
+                if failure is not None:
+                    semaphore.release()
+                    break
+                task = asyncio.create_task(upsert_block(points))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            
+            while tasks and failure is None:
+                await asyncio.wait(set(tasks), return_when=asyncio.FIRST_COMPLETED)
+            if failure is not None:
+                raise failure
+        except Exception as e:
+            raise VectorStoreException(f"导入快照失败（已确认写入 {total} 个点）: {str(e)}")
+        finally:
+            # 出错或被取消时取消仍在进行的块并等待其结束，total 只统计已确认写入的块
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._invalidate_search_cache(collection_type)
+        
+        return total
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取搜索结果缓存和查询向量缓存统计"""
+        if self.search_cache is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "results": self.search_cache.get_stats(),
+            "query_embeddings": self.query_embedding_cache.get_stats()
+        }
+    
     async def get_collection_info(self, collection_type: str = "l1") -> CollectionInfo:
         """获取集合信息"""
         collection_name = self.l1_collection if collection_type == "l1" else self.l2_collection
-        return self.client.get_collection(collection_name)
+        return await self.client.get_collection(collection_name)
     
     async def close(self):
         """关闭向量数据库连接"""
         if self.client:
-            self.client.close()
+            await self.client.close()
+        for index in self.lexical_indexes.values():
+            index.close()
+        self.lexical_indexes.clear()
 
 # 全局向量存储管理器实例
 vector_store_manager = VectorStoreManager()
\ No newline at end of file
@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -34,6 +34,11 @@ class PaperDB(Base):
     user_id = Column(Integer, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # 用户论文列表按 (created_at, id) 键集分页
+        Index("ix_papers_user_created_id", "user_id", "created_at", "id"),
+    )
 
 class Paper(BaseModel):
     """论文响应模型"""
@@ -85,6 +90,13 @@ class PaperSearch(BaseModel):
     sort_by: str = "relevance"
     limit: int = Field(default=20, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None  # 上一页返回的 next_cursor，提供时忽略 offset
+
+class PaperPage(BaseModel):
+    """论文分页结果"""
+    items: List[Paper]
+    next_cursor: Optional[str] = None  # 不透明游标，传回 cursor 获取下一页
+    has_more: bool = False
 
 class PaperAnalysis(BaseModel):
     """论文分析结果"""
@@ -4,15 +4,23 @@
 
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, func, tuple_
 from ..core.database import get_db
+from ..core.pagination import decode_cursor, encode_cursor
 from ..core.vector_store import VectorStore
-from ..models.paper import PaperDB, Paper, PaperCreate, PaperUpdate, PaperSearch
+from ..models.paper import PaperDB, Paper, PaperCreate, PaperUpdate, PaperSearch, PaperPage
 from ..core.exceptions import PaperNotFoundError, PaperAlreadyExistsError
 from ..utils.pdf_parser import PDFParser
 from ..utils.embedding import EmbeddingService
 import json
 
+# 排序方式对应的排序列；可为空的列用 -1 代替 NULL，保证键集比较不会漏掉行
+SORT_COLUMNS = {
+    "relevance": func.coalesce(PaperDB.relevance_score, -1.0),
+    "quality": func.coalesce(PaperDB.quality_score, -1.0),
+    "year": func.coalesce(PaperDB.publication_year, -1),
+}
+
 class PaperService:
     """论文服务类"""
     
@@ -29,12 +37,35 @@ class PaperService:
             raise PaperNotFoundError(f"Paper with id {paper_id} not found")
         return Paper.from_orm(paper_db)
     
-    def get_papers_by_user(self, user_id: int, skip: int = 0, limit: int = 20) -> List[Paper]:
-        """获取用户的论文列表"""
-        papers_db = self.db.query(PaperDB).filter(
-            PaperDB.user_id == user_id
-        ).offset(skip).limit(limit).all()
-        return [Paper.from_orm(paper) for paper in papers_db]
+    def _paginate(self, query, sort_column, limit: int, offset: int = 0,
+                  cursor: Optional[str] = None) -> PaperPage:
+        """按 (sort_column, id) 降序键集分页，多取一行判断是否还有下一页"""
+        if cursor:
+            sort_value, paper_id = decode_cursor(cursor, size=2)["values"]
+            query = query.filter(tuple_(sort_column, PaperDB.id) < tuple_(sort_value, paper_id))
+            offset = 0
+        
+        rows = query.add_columns(sort_column).order_by(
+            desc(sort_column), desc(PaperDB.id)
+        ).offset(offset).limit(limit + 1).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            last_paper, last_sort_value = rows[-1]
+            next_cursor = encode_cursor([last_sort_value, last_paper.id])
+        return PaperPage(
+            items=[Paper.from_orm(paper) for paper, _ in rows],
+            next_cursor=next_cursor,
+            has_more=has_more
+        )
+    
+    def get_papers_by_user(self, user_id: int, skip: int = 0, limit: int = 20,
+                           cursor: Optional[str] = None) -> PaperPage:
+        """获取用户的论文列表，按 (created_at, id) 键集分页"""
+        query = self.db.query(PaperDB).filter(PaperDB.user_id == user_id)
+        return self._paginate(query, PaperDB.created_at, limit, skip, cursor)
     
     def create_paper(self, paper_create: PaperCreate, user_id: int) -> Paper:
         """创建论文记录"""
@@ -107,8 +138,8 @@ class PaperService:
         
         return True
     
-    def search_papers(self, search: PaperSearch, user_id: int) -> List[Paper]:
-        """搜索论文"""
+    def search_papers(self, search: PaperSearch, user_id: int) -> PaperPage:
+        """搜索论文，按 (排序列, id) 键集分页"""
         query = self.db.query(PaperDB).filter(PaperDB.user_id == user_id)
         
         # 文本搜索
@@ -140,19 +171,9 @@ class PaperService:
             ])
             query = query.filter(author_filter)
         
-        # 排序
-        if search.sort_by == "relevance":
-            query = query.order_by(desc(PaperDB.relevance_score))
-        elif search.sort_by == "quality":
-            query = query.order_by(desc(PaperDB.quality_score))
-        elif search.sort_by == "year":
-            query = query.order_by(desc(PaperDB.publication_year))
-        else:
-            query = query.order_by(desc(PaperDB.created_at))
-        
-        # 分页
-        papers_db = query.offset(search.offset).limit(search.limit).all()
-        return [Paper.from_orm(paper) for paper in papers_db]
+        # 排序和分页
+        sort_column = SORT_COLUMNS.get(search.sort_by, PaperDB.created_at)
+        return self._paginate(query, sort_column, search.limit, search.offset, search.cursor)
     
     def semantic_search(self, query: str, user_id: int, limit: int = 10) -> List[Paper]:
         """语义搜索论文"""
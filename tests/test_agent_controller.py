@@ -0,0 +1,144 @@
+"""
+智能体控制器任务调度测试：认领、取消、事件转发和无主任务回收，
+分别使用内存状态后端和基于 InMemoryRedis 的 Redis 状态后端
+"""
+
+import asyncio
+
+import pytest
+
+from core import state_backend as sb
+from core.exceptions import AgentException
+from core.redis_client import InMemoryRedis
+from core.state_backend import InMemoryStateBackend, RedisStateBackend, TASK_EVENTS_CHANNEL
+
+controller_module = pytest.importorskip("agents.controller")
+TaskType = controller_module.TaskType
+
+CLAIM_TTL = 30
+
+class StubAgent:
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def get_status(self):
+        return {}
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch):
+    if request.param == "memory":
+        backend = InMemoryStateBackend(claim_ttl=CLAIM_TTL)
+    else:
+        backend = RedisStateBackend(InMemoryRedis(), key_prefix="test:", claim_ttl=CLAIM_TTL)
+    monkeypatch.setattr(sb, "_backend", backend)
+    return backend
+
+@pytest.fixture
+def make_controller(monkeypatch):
+    for name in ("HunterAgent", "MinerAgent", "CoachAgent", "ValidatorAgent"):
+        monkeypatch.setattr(controller_module, name, StubAgent)
+    
+    def factory(delay: float = 0.0):
+        controller = controller_module.AgentController()
+        controller.executions = []
+        
+        async def execute_paper_hunting(task):
+            controller.executions.append(task["id"])
+            await asyncio.sleep(delay)
+            return {"echo": task["input_data"]}
+        
+        controller._execute_paper_hunting = execute_paper_hunting
+        return controller
+    return factory
+
+async def test_concurrent_execute_runs_task_once(backend, make_controller):
+    controller = make_controller(delay=0.05)
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {"query": "rag"})
+    
+    first, second = await asyncio.gather(
+        controller.execute_task(task_id), controller.execute_task(task_id)
+    )
+    
+    assert first == second == {"echo": {"query": "rag"}}
+    assert controller.executions == [task_id]
+    assert (await controller.get_task_status(task_id))["status"] == "completed"
+    assert await controller.execute_task(task_id) == first
+    assert await backend.count_tasks() == {"active": 0, "history": 1, "queued": 0}
+
+async def test_processor_runs_task_submitted_by_another_worker(backend, make_controller):
+    submitter, worker = make_controller(), make_controller()
+    task_id = await submitter.submit_task(TaskType.PAPER_HUNTING, {"query": "rag"})
+    
+    processor = asyncio.create_task(worker.start_task_processor())
+    try:
+        result = await submitter.wait_for_task(task_id, timeout=2.0)
+    finally:
+        processor.cancel()
+    
+    assert result == {"echo": {"query": "rag"}}
+    assert submitter.executions == []
+    assert worker.executions == [task_id]
+
+async def test_task_events_are_published(backend, make_controller):
+    controller = make_controller()
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {})
+    
+    async with backend.subscribe(TASK_EVENTS_CHANNEL) as events:
+        await controller.execute_task(task_id)
+        received = [await events.get(timeout=1.0) for _ in range(2)]
+    
+    assert [event["event"] for event in received] == ["task_started", "task_completed"]
+    assert [event["task"]["status"] for event in received] == ["running", "completed"]
+    assert all(event["task"]["id"] == task_id for event in received)
+
+async def test_cancel_pending_task(backend, make_controller):
+    controller, other = make_controller(), make_controller()
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {})
+    
+    async with backend.subscribe(TASK_EVENTS_CHANNEL) as events:
+        assert await other.cancel_task(task_id)
+        assert (await events.get(timeout=1.0))["event"] == "task_cancelled"
+    
+    assert not await controller.cancel_task(task_id)
+    assert (await controller.get_task_status(task_id))["status"] == "cancelled"
+    assert await backend.count_tasks() == {"active": 0, "history": 1, "queued": 0}
+    with pytest.raises(AgentException, match="已取消"):
+        await controller.execute_task(task_id)
+    assert controller.executions == []
+
+async def test_cancel_refuses_claimed_task(backend, make_controller):
+    controller = make_controller()
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {})
+    assert await backend.claim_task(task_id, owner="other-worker")
+    
+    assert not await controller.cancel_task(task_id)
+    assert (await controller.get_task_status(task_id))["status"] == "pending"
+
+async def test_reap_requeues_pending_task_lost_before_claim(backend, make_controller):
+    controller = make_controller()
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {})
+    # 某个 worker 取出任务后、认领前退出
+    assert await backend.dequeue_task(timeout=0) == task_id
+    
+    assert await controller.reap_orphaned_tasks() == 0
+    assert await backend.dequeue_task(timeout=0) == task_id
+
+async def test_reap_fails_running_task_after_heartbeat_stops(backend, make_controller, clock):
+    controller = make_controller()
+    task_id = await controller.submit_task(TaskType.PAPER_HUNTING, {})
+    assert await backend.claim_task(task_id, owner="dead-worker")
+    record = await backend.get_task(task_id)
+    await backend.save_task(dict(record, status="running", worker="dead-worker"))
+    
+    assert await controller.reap_orphaned_tasks() == 0
+    clock.advance(CLAIM_TTL + 1)
+    
+    waiter = asyncio.create_task(controller.wait_for_task(task_id, timeout=2.0))
+    await asyncio.sleep(0.05)
+    assert await controller.reap_orphaned_tasks() == 1
+    with pytest.raises(AgentException, match="dead-worker"):
+        await waiter
+    
+    assert (await controller.get_task_status(task_id))["status"] == "failed"
+    assert await backend.count_tasks() == {"active": 0, "history": 1, "queued": 0}
+    assert await controller.reap_orphaned_tasks() == 0
@@ -0,0 +1,239 @@
+"""
+ReadThroughCache 与 DatabaseManager 缓存失效测试（使用 InMemoryRedis 替身，无需 Redis/PostgreSQL）
+"""
+
+import uuid
+from contextlib import asynccontextmanager
+
+from core.database import DatabaseManager
+from core.db_cache import ReadThroughCache
+from core.redis_client import InMemoryRedis
+
+class CountingLoader:
+    """记录回源次数的 loader"""
+    
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+    
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+class FailingRedis:
+    """所有命令都抛出连接错误的 Redis"""
+    
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis down")
+        return fail
+
+def make_cache(redis=None, **kwargs) -> ReadThroughCache:
+    kwargs.setdefault("enabled", True)
+    return ReadThroughCache(redis=redis, **kwargs)
+
+async def test_hit_and_miss():
+    cache = make_cache()
+    loader = CountingLoader({"id": "1", "title": "t"})
+    
+    assert await cache.get_or_load("paper", "1", loader) == {"id": "1", "title": "t"}
+    assert await cache.get_or_load("paper", "1", loader) == {"id": "1", "title": "t"}
+    assert loader.calls == 1
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["memory_hits"]) == (1, 1)
+
+async def test_returns_copies():
+    cache = make_cache()
+    value = await cache.get_or_load("paper", "1", CountingLoader({"authors": ["a"]}))
+    value["authors"].append("b")
+    assert await cache.get_or_load("paper", "1", CountingLoader(None)) == {"authors": ["a"]}
+
+async def test_redis_tier_shared_between_processes():
+    redis = InMemoryRedis()
+    loaded_at = uuid.uuid4()
+    first, second = make_cache(redis), make_cache(redis)
+    
+    await first.get_or_load("paper", "1", CountingLoader({"id": loaded_at}))
+    loader = CountingLoader({"id": "other"})
+    # datetime/UUID 经 Redis 往返后类型不变
+    assert await second.get_or_load("paper", "1", loader) == {"id": loaded_at}
+    assert loader.calls == 0
+    assert second.get_stats()["redis_hits"] == 1
+
+async def test_ttl_expiry(clock):
+    redis = InMemoryRedis()
+    cache = make_cache(redis, ttl=60)
+    loader = CountingLoader({"id": "1"})
+    
+    await cache.get_or_load("user", "1", loader)
+    clock.advance(cache.local_ttl + 1)
+    # 内存层先过期，Redis 层仍命中
+    await cache.get_or_load("user", "1", loader)
+    assert loader.calls == 1
+    assert cache.get_stats()["redis_hits"] == 1
+    
+    clock.advance(61)
+    await cache.get_or_load("user", "1", loader)
+    assert loader.calls == 2
+
+async def test_none_is_not_cached():
+    redis = InMemoryRedis()
+    cache = make_cache(redis)
+    loader = CountingLoader(None)
+    
+    assert await cache.get_or_load("user", "missing", loader) is None
+    assert await cache.get_or_load("user", "missing", loader) is None
+    assert loader.calls == 2
+    assert await redis.keys(f"{cache.key_prefix}user:*") == []
+
+async def test_invalidation_during_load_skips_write_back():
+    redis = InMemoryRedis()
+    worker_a, worker_b = make_cache(redis), make_cache(redis)
+    
+    async def stale_loader():
+        # 回源期间另一个 worker 更新并失效该键
+        await worker_b.invalidate("user", "1")
+        return {"name": "old"}
+    
+    assert await worker_a.get_or_load("user", "1", stale_loader) == {"name": "old"}
+    assert await redis.exists(f"{worker_a.key_prefix}user:1") == 0
+    assert await worker_b.get_or_load("user", "1", CountingLoader({"name": "new"})) == {"name": "new"}
+
+async def test_invalidate_clears_all_fields():
+    redis = InMemoryRedis()
+    cache = make_cache(redis)
+    await cache.get_or_load("report", "p1", CountingLoader({"summary": "public"}))
+    await cache.get_or_load("report", "p1", CountingLoader({"summary": "private"}), field="u1")
+    
+    await cache.invalidate("report", "p1")
+    loader = CountingLoader({"summary": "new"})
+    await cache.get_or_load("report", "p1", loader)
+    await cache.get_or_load("report", "p1", loader, field="u1")
+    assert loader.calls == 2
+
+async def test_redis_errors_fall_back_to_loader():
+    cache = make_cache(FailingRedis())
+    loader = CountingLoader({"id": "1"})
+    
+    assert await cache.get_or_load("paper", "1", loader) == {"id": "1"}
+    await cache.invalidate("paper", "1")
+    assert await cache.get_or_load("paper", "1", loader) == {"id": "1"}
+    assert loader.calls == 2
+    assert cache.get_stats()["redis_errors"] > 0
+
+async def test_get_many_loads_only_missing_keys():
+    cache = make_cache()
+    await cache.get_or_load("paper", "1", CountingLoader({"id": "1"}))
+    requested = []
+    
+    async def load_many(keys):
+        requested.extend(keys)
+        return {key: {"id": key} for key in keys}
+    
+    result = await cache.get_many_or_load("paper", ["1", "2", "3"], load_many)
+    assert requested == ["2", "3"]
+    assert set(result) == {"1", "2", "3"}
+
+async def test_disabled_cache_always_loads():
+    cache = make_cache(enabled=False)
+    loader = CountingLoader({"id": "1"})
+    await cache.get_or_load("paper", "1", loader)
+    await cache.get_or_load("paper", "1", loader)
+    assert loader.calls == 2
+
+class FakeConnection:
+    """按 SQL 前缀返回预设结果的 asyncpg 连接替身，数据保存在 FakeDatabase 中"""
+    
+    def __init__(self, database: "FakeDatabase"):
+        self.database = database
+    
+    async def fetchrow(self, sql, *args):
+        self.database.reads += 1
+        if "FROM users" in sql:
+            return self.database.users.get(args[0])
+        if "FROM papers" in sql:
+            return self.database.papers.get(args[0])
+        if "FROM analysis_reports" in sql:
+            return self.database.reports.get(args[0])
+        raise AssertionError(sql)
+    
+    async def fetchval(self, sql, *args):
+        if "INSERT INTO papers" in sql:
+            return self.database.next_paper_id
+        if "INSERT INTO analysis_reports" in sql:
+            self.database.reports[args[0]] = {"paper_id": args[0], "summary": args[2]}
+            return uuid.uuid4()
+        raise AssertionError(sql)
+    
+    async def fetch(self, sql, *args):
+        if "INSERT INTO papers" in sql:
+            return [{"id": self.database.next_paper_id, "doi": None, "content_hash": "h"}]
+        raise AssertionError(sql)
+    
+    async def execute(self, sql, *args):
+        if sql.startswith("UPDATE users"):
+            self.database.users[args[1]]["profile"] = args[0]
+            return "UPDATE 1"
+        raise AssertionError(sql)
+
+class FakeDatabase:
+    def __init__(self):
+        self.users = {}
+        self.papers = {}
+        self.reports = {}
+        self.next_paper_id = None
+        self.reads = 0
+    
+    @asynccontextmanager
+    async def acquire(self):
+        yield FakeConnection(self)
+
+def make_manager(redis=None):
+    manager = DatabaseManager()
+    manager.pool = FakeDatabase()
+    manager.cache = make_cache(redis)
+    return manager
+
+async def test_update_user_profile_invalidates_user():
+    manager = make_manager(InMemoryRedis())
+    manager.pool.users["u1"] = {"id": "u1", "profile": "{}"}
+    
+    assert (await manager.get_user("u1"))["profile"] == "{}"
+    assert (await manager.get_user("u1"))["profile"] == "{}"
+    assert manager.pool.reads == 1
+    
+    assert await manager.update_user_profile("u1", {"lang": "zh"})
+    assert (await manager.get_user("u1"))["profile"] == '{"lang": "zh"}'
+    assert manager.pool.reads == 2
+
+async def test_create_analysis_report_invalidates_paper_reports():
+    manager = make_manager(InMemoryRedis())
+    manager.pool.reports["p1"] = {"paper_id": "p1", "summary": "v1"}
+    
+    assert (await manager.get_analysis_report("p1"))["summary"] == "v1"
+    assert (await manager.get_analysis_report("p1", user_id="u1"))["summary"] == "v1"
+    await manager.create_analysis_report("p1", "v2", "", "", "")
+    assert (await manager.get_analysis_report("p1"))["summary"] == "v2"
+    assert (await manager.get_analysis_report("p1", user_id="u1"))["summary"] == "v2"
+
+async def test_create_paper_invalidates_cached_paper():
+    manager = make_manager(InMemoryRedis())
+    paper_id = uuid.uuid4()
+    manager.pool.next_paper_id = paper_id
+    
+    # 模拟创建前的一次读取留下的缓存（例如其他 worker 的旧记录）
+    await manager.cache.get_or_load("paper", str(paper_id), CountingLoader({"title": "stale"}))
+    manager.pool.papers[str(paper_id)] = {"id": paper_id, "title": "fresh"}
+    assert await manager.create_paper("fresh", []) == str(paper_id)
+    assert (await manager.get_paper(str(paper_id)))["title"] == "fresh"
+
+async def test_create_papers_invalidates_inserted_papers():
+    manager = make_manager(InMemoryRedis())
+    paper_id = uuid.uuid4()
+    manager.pool.next_paper_id = paper_id
+    
+    await manager.cache.get_or_load("paper", str(paper_id), CountingLoader({"title": "stale"}))
+    manager.pool.papers[str(paper_id)] = {"id": paper_id, "title": "fresh"}
+    inserted = await manager.create_papers([{"title": "fresh", "content_hash": "h"}])
+    assert inserted == [{"id": str(paper_id), "doi": None, "content_hash": "h"}]
+    assert (await manager.get_paper(str(paper_id)))["title"] == "fresh"
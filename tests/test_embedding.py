@@ -0,0 +1,66 @@
+"""
+批量向量生成测试：失败行必须能被调用方识别
+"""
+
+import numpy as np
+import pytest
+
+from core.config import get_config
+from core.exceptions import AgentException
+from utils.embedding import EmbeddingGenerator
+from utils.embedding_backends import EmbeddingBackend
+
+class FlakyBackend(EmbeddingBackend):
+    """包含 "bad" 的文本所在批次请求失败，其余文本返回按长度构造的向量"""
+    
+    def __init__(self, fail_all: bool = False):
+        self.fail_all = fail_all
+    
+    @property
+    def model_id(self) -> str:
+        return "flaky"
+    
+    @property
+    def dimension(self) -> int:
+        return 4
+    
+    async def embed(self, texts):
+        if self.fail_all or any("bad" in text for text in texts):
+            raise RuntimeError("upstream error")
+        return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+@pytest.fixture
+def make_generator(monkeypatch):
+    monkeypatch.setattr(get_config(), "embedding_cache_disk_enabled", False)
+    monkeypatch.setattr(get_config().vector_db, "embedding_max_retries", 0)
+    
+    def factory(backend: EmbeddingBackend) -> EmbeddingGenerator:
+        return EmbeddingGenerator(backend=backend)
+    return factory
+
+async def test_embed_texts_reports_failed_rows(make_generator):
+    backend = FlakyBackend()
+    generator = make_generator(backend)
+    texts = ["good one", "bad one", "", "good two", "good one"]
+    
+    matrix, failed = await generator.embed_texts(texts, return_failed=True)
+    
+    # 失败批次二分后只有含 "bad" 的文本失败；空文本没有向量，同样计入
+    assert failed == [1, 2]
+    assert not np.any(matrix[failed])
+    assert np.all(np.linalg.norm(matrix[[0, 3, 4]], axis=1) > 0)
+    assert np.array_equal(matrix[0], matrix[4])
+    
+    # 不需要区分失败行的调用方仍然只拿到矩阵
+    assert (await generator.embed_texts(["good one"])).shape == (1, 4)
+
+async def test_embed_texts_raises_when_every_text_fails(make_generator):
+    generator = make_generator(FlakyBackend(fail_all=True))
+    
+    with pytest.raises(AgentException):
+        await generator.embed_texts(["a", "b", "c"])
+    
+    # 只有空文本时没有需要请求的内容，不抛出异常
+    matrix, failed = await generator.embed_texts(["", ""], return_failed=True)
+    assert failed == [0, 1]
+    assert not np.any(matrix)
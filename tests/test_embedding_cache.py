@@ -0,0 +1,61 @@
+"""
+向量缓存测试
+"""
+
+import threading
+
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+def test_concurrent_writers_get_distinct_rows(tmp_path):
+    """多个实例（各自的 SQLite 连接，相当于多个 worker）同时追加，索引仍指向正确的向量"""
+    writers = [EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True) for _ in range(4)]
+    barrier = threading.Barrier(len(writers))
+    
+    def write(index: int, cache: EmbeddingCache):
+        barrier.wait()
+        for batch in range(20):
+            cache.put_many({
+                f"w{index}-{batch}-{i}": np.full(16, index * 1000 + batch * 10 + i, dtype=np.float32)
+                for i in range(5)
+            })
+    
+    threads = [threading.Thread(target=write, args=(i, cache)) for i, cache in enumerate(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    reader = EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True)
+    expected = {
+        f"w{index}-{batch}-{i}": index * 1000 + batch * 10 + i
+        for index in range(4) for batch in range(20) for i in range(5)
+    }
+    found = reader.get_many(expected)
+    assert len(found) == len(expected)
+    for content_hash, value in expected.items():
+        assert np.all(found[content_hash] == value), content_hash
+    assert reader.get_stats()["disk_hits"] == len(expected)
+
+def test_partial_row_is_padded(tmp_path):
+    cache = EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True)
+    cache.put("a", np.ones(4))
+    with open(cache._vectors_path(4), "ab") as f:
+        f.write(b"\0" * 6)  # 模拟中途失败的写入
+    cache.put("b", np.full(4, 2.0))
+    
+    reader = EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True)
+    assert reader.get("a").tolist() == [1.0] * 4
+    assert reader.get("b").tolist() == [2.0] * 4
+
+async def test_async_api_round_trip(tmp_path):
+    cache = EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True)
+    await cache.aput_many({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    
+    reader = EmbeddingCache("m", cache_dir=str(tmp_path), disk_enabled=True)
+    found = await reader.aget_many(["a", "b", "c"])
+    assert sorted(found) == ["a", "b"]
+    assert (await reader.aget("b")).tolist() == [3.0, 4.0]
+    stats = reader.get_stats()
+    assert (stats["disk_hits"], stats["misses"], stats["hits"]) == (2, 1, 1)
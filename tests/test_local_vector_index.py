@@ -0,0 +1,61 @@
+"""
+本地向量索引测试
+"""
+
+import numpy as np
+from qdrant_client.http.models import FieldCondition, Filter, MatchValue, PointIdsList, PointStruct
+
+from core.local_vector_index import LocalCollection
+
+def make_points(ids, dimension=8, seed=0, user_id="u1"):
+    rng = np.random.default_rng(seed)
+    return [
+        PointStruct(id=point_id, vector=rng.normal(size=dimension).tolist(), payload={"user_id": user_id})
+        for point_id in ids
+    ]
+
+def test_exact_search_skips_deleted_and_replaced_rows(tmp_path):
+    collection = LocalCollection(str(tmp_path), dimension=8)
+    points = make_points([f"p{i}" for i in range(20)])
+    collection.upsert(points)
+    query = points[3].vector
+    
+    assert collection.search(query, 1, with_payload=False)[0].id == "p3"
+    collection.delete(PointIdsList(points=["p3"]))
+    assert "p3" not in [hit.id for hit in collection.search(query, 20)]
+    
+    collection.upsert([PointStruct(id="p4", vector=query, payload={"user_id": "u1"})])
+    hits = collection.search(query, 20)
+    assert hits[0].id == "p4"
+    assert [hit.id for hit in hits].count("p4") == 1
+    assert len(hits) == collection.live_count == 19
+    assert hits[0].payload == {"user_id": "u1"}
+
+def test_filtered_and_reopened_search(tmp_path):
+    collection = LocalCollection(str(tmp_path), dimension=8)
+    collection.upsert(make_points(["a", "b"], user_id="u1") + make_points(["c"], seed=1, user_id="u2"))
+    collection.delete(PointIdsList(points=["a"]))
+    collection.close()
+    
+    reopened = LocalCollection(str(tmp_path))
+    assert reopened.live_count == 2
+    only_u2 = Filter(must=[FieldCondition(key="user_id", match=MatchValue(value="u2"))])
+    assert [hit.id for hit in reopened.search(np.ones(8), 10, only_u2)] == ["c"]
+    assert sorted(hit.id for hit in reopened.search(np.ones(8), 10)) == ["b", "c"]
+
+def test_scroll_cursor_survives_changes_between_pages(tmp_path):
+    collection = LocalCollection(str(tmp_path), dimension=8)
+    ids = [f"p{i}" for i in range(10)]
+    collection.upsert(make_points(ids))
+    
+    page, offset = collection.scroll(limit=4)
+    assert [record.id for record in page] == ids[:4]
+    # 下一页的第一个点在翻页期间被删除，另一个点被替换
+    collection.delete(PointIdsList(points=["p4"]))
+    collection.upsert(make_points(["p5"], seed=1))
+    
+    seen = [record.id for record in page]
+    while offset is not None:
+        page, offset = collection.scroll(limit=4, offset=offset)
+        seen.extend(record.id for record in page)
+    assert seen == ids[:4] + ["p6", "p7", "p8", "p9", "p5"]
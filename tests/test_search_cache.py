@@ -0,0 +1,34 @@
+"""
+混合搜索结果缓存测试
+"""
+
+from core.search_cache import SearchResultCache
+
+def make_key(cache: SearchResultCache, user_id: str, query: str = "rag"):
+    return cache.make_key("l2", query, user_id, 10, True)
+
+def test_invalidate_user_only_affects_that_user():
+    cache = SearchResultCache(max_entries=8, ttl=0)
+    cache.set(make_key(cache, "alice"), "alice-result")
+    cache.set(make_key(cache, "bob"), "bob-result")
+    
+    cache.invalidate_user("alice", broadcast=False)
+    
+    assert cache.get(make_key(cache, "alice")) is None
+    assert cache.get(make_key(cache, "bob")) == "bob-result"
+
+def test_user_versions_are_bounded_without_reviving_stale_entries():
+    cache = SearchResultCache(max_entries=4, ttl=0)
+    cache.set(make_key(cache, "alice"), "stale")
+    cache.invalidate_user("alice", broadcast=False)
+    cache.set(make_key(cache, "alice"), "fresh")
+    
+    for index in range(20):
+        cache.invalidate_user(f"user-{index}", broadcast=False)
+    
+    assert len(cache._user_versions) == 4
+    assert "alice" not in cache._user_versions
+    # 淘汰后 alice 回落到版本下限，失效前的旧条目不会重新命中
+    assert cache.get(make_key(cache, "alice")) is None
+    cache.set(make_key(cache, "alice"), "refetched")
+    assert cache.get(make_key(cache, "alice")) == "refetched"
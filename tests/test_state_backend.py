@@ -0,0 +1,156 @@
+"""
+共享状态后端测试：内存实现和基于 InMemoryRedis 的 Redis 实现跑同一组用例
+"""
+
+import asyncio
+
+import pytest
+
+from core import state_backend as sb
+from core.config import get_config
+from core.redis_client import InMemoryPubSub, InMemoryRedis
+from core.state_backend import (
+    CacheInvalidationBus,
+    InMemoryStateBackend,
+    RedisStateBackend,
+    TASK_EVENTS_CHANNEL,
+)
+
+CLAIM_TTL = 30
+
+def make_backend(kind: str):
+    if kind == "memory":
+        return InMemoryStateBackend(history_limit=10, claim_ttl=CLAIM_TTL)
+    return RedisStateBackend(InMemoryRedis(), key_prefix="test:", history_limit=10, claim_ttl=CLAIM_TTL)
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    return make_backend(request.param)
+
+class SocketTimeoutPubSub(InMemoryPubSub):
+    """模拟 redis-py：单次读取超过 socket_timeout 时断开重连，缓冲中的消息丢失"""
+    
+    def __init__(self, redis, socket_timeout: float):
+        super().__init__(redis)
+        self.socket_timeout = socket_timeout
+    
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout=0.0):
+        if timeout is None or timeout >= self.socket_timeout:
+            await asyncio.sleep(self.socket_timeout)
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return None
+        return await super().get_message(ignore_subscribe_messages, timeout)
+
+class SocketTimeoutRedis(InMemoryRedis):
+    def __init__(self, socket_timeout: float):
+        super().__init__()
+        self.socket_timeout = socket_timeout
+    
+    def pubsub(self):
+        return SocketTimeoutPubSub(self, self.socket_timeout)
+
+def make_record(task_id: str, status: str = "pending", priority: int = 0):
+    return {"id": task_id, "status": status, "priority": priority}
+
+async def test_claim_is_exclusive_and_expires_without_heartbeat(backend, clock):
+    assert await backend.claim_task("t1", owner="worker-a")
+    assert not await backend.claim_task("t1", owner="worker-b")
+    assert await backend.get_claim_owner("t1") == "worker-a"
+    
+    # 只有持有者能续期
+    assert not await backend.refresh_claim("t1", owner="worker-b")
+    clock.advance(CLAIM_TTL - 5)
+    assert await backend.refresh_claim("t1", owner="worker-a")
+    clock.advance(CLAIM_TTL - 5)
+    assert await backend.get_claim_owner("t1") == "worker-a"
+    
+    # 停止心跳后认领过期，其他 worker 可以重新认领
+    clock.advance(10)
+    assert await backend.get_claim_owner("t1") is None
+    assert not await backend.refresh_claim("t1", owner="worker-a")
+    assert await backend.claim_task("t1", owner="worker-b")
+
+async def test_queue_orders_by_priority_and_drops_claimed_tasks(backend):
+    await backend.enqueue_task("task_1", priority=0)
+    await backend.enqueue_task("task_2", priority=1)
+    await backend.enqueue_task("task_3", priority=0)
+    await backend.enqueue_task("task_1", priority=0)
+    assert (await backend.count_tasks())["queued"] == 3
+    
+    # 认领的任务（例如被 API 请求直接执行）移出队列
+    assert await backend.claim_task("task_3")
+    assert await backend.dequeue_task(timeout=0) == "task_2"
+    assert await backend.dequeue_task(timeout=0) == "task_1"
+    assert await backend.dequeue_task(timeout=0) is None
+
+async def test_dequeue_waits_for_task_enqueued_later(backend):
+    async def enqueue_later():
+        await asyncio.sleep(0.05)
+        await backend.enqueue_task("late")
+    
+    enqueue = asyncio.create_task(enqueue_later())
+    assert await backend.dequeue_task(timeout=2.0) == "late"
+    await enqueue
+
+async def test_archive_moves_task_to_history_and_releases_claim(backend):
+    await backend.save_task(make_record("t1"))
+    await backend.enqueue_task("t1")
+    assert await backend.claim_task("t1")
+    assert [record["id"] for record in await backend.list_active_tasks()] == ["t1"]
+    
+    await backend.archive_task(make_record("t1", status="completed"))
+    
+    assert await backend.list_active_tasks() == []
+    assert (await backend.get_task("t1"))["status"] == "completed"
+    assert [record["id"] for record in await backend.list_task_history()] == ["t1"]
+    assert await backend.count_tasks() == {"active": 0, "history": 1, "queued": 0}
+    assert await backend.get_claim_owner("t1") is None
+
+async def test_subscription_receives_messages_published_after_subscribe(backend):
+    async with backend.subscribe(TASK_EVENTS_CHANNEL) as events:
+        await backend.publish(TASK_EVENTS_CHANNEL, {"event": "task_started", "task": {"id": "t1"}})
+        message = await events.get(timeout=1.0)
+        assert message == {"event": "task_started", "task": {"id": "t1"}}
+        assert await events.get(timeout=0.01) is None
+
+async def test_subscription_survives_idle_longer_than_socket_timeout(monkeypatch):
+    socket_timeout = 0.2
+    monkeypatch.setattr(get_config().redis, "socket_timeout", socket_timeout)
+    backend = RedisStateBackend(SocketTimeoutRedis(socket_timeout), key_prefix="test:")
+    
+    async with backend.subscribe(TASK_EVENTS_CHANNEL) as events:
+        async def publish_after_idle():
+            await asyncio.sleep(socket_timeout * 2.5)
+            await backend.publish(TASK_EVENTS_CHANNEL, {"event": "late"})
+        
+        publisher = asyncio.create_task(publish_after_idle())
+        message = await asyncio.wait_for(events.__anext__(), timeout=socket_timeout * 10)
+        await publisher
+        assert message == {"event": "late"}
+        
+        # 限时读取同样按短间隔轮询
+        await backend.publish(TASK_EVENTS_CHANNEL, {"event": "again"})
+        assert await events.get(timeout=socket_timeout * 5) == {"event": "again"}
+
+async def test_cache_invalidation_bus_skips_own_messages(monkeypatch):
+    monkeypatch.setattr(sb, "_backend", make_backend("redis"))
+    bus = CacheInvalidationBus()
+    received = []
+    bus.register("papers", received.append)
+    bus.start()
+    await asyncio.sleep(0.05)
+    
+    bus.publish("papers", key="own")
+    bus.publish("papers", key="other", origin="other-worker")
+    bus.publish("unknown", key="ignored", origin="other-worker")
+    await asyncio.sleep(0.05)
+    await bus.stop()
+    
+    assert [message["key"] for message in received] == ["other"]
+
+def test_cache_invalidation_bus_is_idle_without_shared_backend(monkeypatch):
+    monkeypatch.setattr(sb, "_backend", make_backend("memory"))
+    bus = CacheInvalidationBus()
+    bus.start()
+    assert bus._task is None
@@ -6,10 +6,15 @@ from .pdf_parser import PDFParser
 from .embedding import EmbeddingGenerator
 from .text_processor import TextProcessor
 from .citation_formatter import CitationFormatter
+from .token_budget import TokenCounter, PromptBudget
+from .similarity import SimilarityIndex
 
 __all__ = [
     "PDFParser",
     "EmbeddingGenerator", 
     "TextProcessor",
-    "CitationFormatter"
+    "CitationFormatter",
+    "TokenCounter",
+    "PromptBudget",
+    "SimilarityIndex"
 ]
\ No newline at end of file
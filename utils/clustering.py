@@ -0,0 +1,186 @@
+"""
+InnoCore AI 向量聚类
+基于余弦距离的 mini-batch k-means（k-means++ 初始化），支持增量更新
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .similarity import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# 分配簇时每块的向量数，限制 (向量数 x 簇数) 得分矩阵的内存占用
+ASSIGN_CHUNK_SIZE = 8192
+
+class MiniBatchKMeans:
+    """球面 mini-batch k-means
+    
+    向量先归一化，簇中心也保持单位长度，相似度用点积计算。每次迭代只用一个小批次
+    更新簇中心（按簇累计样本数衰减学习率），整体复杂度与样本数线性相关。
+    已训练的模型可以继续调用 partial_fit 吸收新样本，无需重新训练。
+    """
+    
+    def __init__(self, num_clusters: int = 8, batch_size: int = 1024,
+                 max_iter: int = 100, tol: float = 1e-4,
+                 init_sample_size: int = 20000, reassignment_ratio: float = 0.01,
+                 random_state: Optional[int] = None):
+        if num_clusters <= 0:
+            raise ValueError("num_clusters 必须大于 0")
+        self.num_clusters = num_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.init_sample_size = init_sample_size
+        self.reassignment_ratio = reassignment_ratio
+        self._rng = np.random.default_rng(random_state)
+        
+        self.centroids: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None
+        self.n_iter = 0
+    
+    @property
+    def is_fitted(self) -> bool:
+        return self.centroids is not None
+    
+    def _init_centroids(self, X: np.ndarray):
+        """k-means++ 初始化（在抽样子集上进行）"""
+        if X.shape[0] > self.init_sample_size:
+            X = X[self._rng.choice(X.shape[0], self.init_sample_size, replace=False)]
+        
+        k = min(self.num_clusters, X.shape[0])
+        centroids = np.empty((k, X.shape[1]), dtype=np.float32)
+        centroids[0] = X[self._rng.integers(X.shape[0])]
+        # 余弦距离 1 - sim，下限截断到 0 避免浮点误差产生负概率
+        distances = np.maximum(1.0 - X @ centroids[0], 0.0)
+        
+        for i in range(1, k):
+            total = distances.sum()
+            if total <= 0:
+                index = self._rng.integers(X.shape[0])
+            else:
+                index = self._rng.choice(X.shape[0], p=distances / total)
+            centroids[i] = X[index]
+            distances = np.minimum(distances, np.maximum(1.0 - X @ centroids[i], 0.0))
+        
+        self.centroids = centroids
+        self.counts = np.zeros(k, dtype=np.float64)
+    
+    def _assign(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """返回每个向量最近的簇下标及其相似度"""
+        labels = np.empty(X.shape[0], dtype=np.int64)
+        similarities = np.empty(X.shape[0], dtype=np.float32)
+        for start in range(0, X.shape[0], ASSIGN_CHUNK_SIZE):
+            scores = X[start:start + ASSIGN_CHUNK_SIZE] @ self.centroids.T
+            chunk_labels = scores.argmax(axis=1)
+            labels[start:start + ASSIGN_CHUNK_SIZE] = chunk_labels
+            similarities[start:start + ASSIGN_CHUNK_SIZE] = scores[np.arange(len(chunk_labels)), chunk_labels]
+        return labels, similarities
+    
+    def _update(self, batch: np.ndarray) -> float:
+        """用一个批次更新簇中心，返回簇中心的最大位移"""
+        labels, _ = self._assign(batch)
+        k = self.centroids.shape[0]
+        
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, labels, batch)
+        
+        updated = batch_counts > 0
+        self.counts[updated] += batch_counts[updated]
+        # 学习率 = 本批样本数 / 累计样本数，等价于对该簇全部样本求滑动平均
+        rate = (batch_counts[updated] / self.counts[updated])[:, None]
+        means = sums[updated] / batch_counts[updated][:, None]
+        
+        previous = self.centroids.copy()
+        self.centroids[updated] = (1.0 - rate) * self.centroids[updated] + rate * means
+        
+        self.centroids = normalize_rows(self.centroids)
+        
+        # 样本数远少于其他簇的“死”簇重新放到本批中离现有中心最远的点上
+        small = np.flatnonzero(self.counts < self.reassignment_ratio * self.counts.max())
+        if len(small) and len(small) < k:
+            _, similarities = self._assign(batch)
+            farthest = np.argsort(similarities)[:len(small)]
+            self.centroids[small[:len(farthest)]] = batch[farthest]
+            self.counts[small] = np.min(np.delete(self.counts, small))
+        return float(np.max(np.linalg.norm(self.centroids - previous, axis=1)))
+    
+    def fit(self, vectors) -> "MiniBatchKMeans":
+        """从头训练"""
+        X = normalize_rows(vectors)
+        if X.shape[0] == 0:
+            raise ValueError("没有可聚类的向量")
+        
+        self._init_centroids(X)
+        self.n_iter = 0
+        
+        # 连续若干次位移都低于阈值才视为收敛，避免单个批次的偶然性
+        patience, stable = 5, 0
+        for self.n_iter in range(1, self.max_iter + 1):
+            if X.shape[0] > self.batch_size:
+                batch = X[self._rng.choice(X.shape[0], self.batch_size, replace=False)]
+            else:
+                batch = X
+            
+            shift = self._update(batch)
+            stable = stable + 1 if shift < self.tol else 0
+            if stable >= patience:
+                break
+        
+        logger.debug(f"k-means 在第 {self.n_iter} 轮结束，簇数 {self.centroids.shape[0]}")
+        return self
+    
+    def partial_fit(self, vectors) -> "MiniBatchKMeans":
+        """增量训练：用新向量更新簇中心，尚未训练时先初始化"""
+        X = normalize_rows(vectors)
+        if X.shape[0] == 0:
+            return self
+        
+        if not self.is_fitted:
+            self._init_centroids(X)
+        
+        for start in range(0, X.shape[0], self.batch_size):
+            self._update(X[start:start + self.batch_size])
+            self.n_iter += 1
+        return self
+    
+    def predict(self, vectors) -> np.ndarray:
+        """返回每个向量所属的簇下标"""
+        if not self.is_fitted:
+            raise ValueError("模型尚未训练")
+        labels, _ = self._assign(normalize_rows(vectors))
+        return labels
+    
+    def fit_predict(self, vectors) -> np.ndarray:
+        return self.fit(vectors).predict(vectors)
+    
+    def inertia(self, vectors) -> float:
+        """各向量到所属簇中心的余弦距离之和"""
+        _, similarities = self._assign(normalize_rows(vectors))
+        return float(np.sum(1.0 - similarities))
+
+def group_by_cluster(labels: np.ndarray, num_clusters: int) -> List[List[int]]:
+    """把簇下标转换为每个簇的成员下标列表"""
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.searchsorted(labels[order], np.arange(num_clusters + 1))
+    return [
+        order[boundaries[i]:boundaries[i + 1]].tolist()
+        for i in range(num_clusters)
+    ]
+
+def summarize_clusters(model: MiniBatchKMeans, vectors) -> Dict[str, Any]:
+    """
+    对向量分簇并汇总
+    
+    Returns:
+        {"labels": 每个向量的簇下标, "members": 每个簇的成员下标, "centroids": 簇中心}
+    """
+    labels = model.predict(vectors)
+    return {
+        "labels": labels,
+        "members": group_by_cluster(labels, model.centroids.shape[0]),
+        "centroids": model.centroids
+    }
@@ -3,98 +3,203 @@ InnoCore AI 向量生成工具
 """
 
 import asyncio
-from typing import List, Dict, Optional, Any
+import logging
+from typing import List, Dict, Optional, Any, Tuple, Union
 import numpy as np
-from openai import AsyncOpenAI
 import hashlib
 import json
 
-from ..core.config import get_config
-from ..core.exceptions import AgentException
+from core.config import get_config
+from core.exceptions import AgentException
+from .token_budget import truncate_to_tokens, get_token_counter
+from .embedding_cache import EmbeddingCache
+from .embedding_backends import EmbeddingBackend, LocalEmbeddingBackend, create_embedding_backend
+from .similarity import SimilarityIndex, cosine_similarity
+from .clustering import MiniBatchKMeans, summarize_clusters
+
+logger = logging.getLogger(__name__)
 
 class EmbeddingGenerator:
     """向量生成器"""
     
-    def __init__(self):
+    def __init__(self, backend: EmbeddingBackend = None):
         self.config = get_config()
-        self.client = None
-        self.embedding_model = self.config.vector_db.embedding_model
-        self.cache = {}  # 简单的内存缓存
+        self.backend = backend or create_embedding_backend(self.config.vector_db)
+        self.embedding_model = self.backend.model_id
+        self.cache = EmbeddingCache(self.embedding_model)
+        self.dimension = self.backend.dimension
+        self._request_semaphore = None
     
     async def initialize(self):
         """初始化向量生成器"""
-        try:
-            self.client = AsyncOpenAI(
-                api_key=self.config.llm.api_key,
-                base_url=self.config.llm.base_url
-            )
-        except Exception as e:
-            raise AgentException(f"向量生成器初始化失败: {str(e)}")
+        await self.backend.initialize()
+        self._reset_model_id()
+    
+    def _reset_model_id(self):
+        """后端的向量空间变化后（加载或训练了新投影），切换到对应的缓存命名空间"""
+        if self.backend.model_id != self.embedding_model:
+            self.cache.close()
+            self.embedding_model = self.backend.model_id
+            self.cache = EmbeddingCache(self.embedding_model)
+    
+    async def fit_backend(self, texts: List[str]):
+        """在语料上训练本地向量后端；训练后向量空间改变，已入库的向量需要重建"""
+        if not isinstance(self.backend, LocalEmbeddingBackend):
+            raise AgentException(f"{self.backend.provider} 向量后端不支持训练")
+        await asyncio.to_thread(self.backend.fit, texts)
+        self._reset_model_id()
     
     async def generate_embedding(self, text: str, use_cache: bool = True) -> List[float]:
         """生成文本向量"""
         if not text:
-            return [0.0] * 1536  # 返回零向量
+            return [0.0] * self.dimension  # 返回零向量
         
         # 检查缓存
         if use_cache:
-            cache_key = self._get_cache_key(text)
-            if cache_key in self.cache:
-                return self.cache[cache_key]
+            cached = await self.cache.aget(self._get_cache_key(text))
+            if cached is not None:
+                return cached.tolist()
         
         try:
             # 清理文本
             cleaned_text = self._clean_text(text)
             
-            # 调用OpenAI API
-            response = await self.client.embeddings.create(
-                model=self.embedding_model,
-                input=cleaned_text
-            )
-            
-            embedding = response.data[0].embedding
+            embedding = (await self._request_embeddings([cleaned_text]))[0]
             
             # 缓存结果
             if use_cache:
-                cache_key = self._get_cache_key(text)
-                self.cache[cache_key] = embedding
+                await self.cache.aput(self._get_cache_key(text), embedding)
             
             return embedding
             
         except Exception as e:
             raise AgentException(f"向量生成失败: {str(e)}")
     
-    async def generate_batch_embeddings(self, texts: List[str], 
-                                       batch_size: int = 10) -> List[List[float]]:
-        """批量生成向量"""
-        embeddings = []
+    def _pack_batches(self, texts: List[str], max_items: int) -> List[List[int]]:
+        """按 token 预算把文本打包成请求批次，返回每批的下标列表"""
+        counter = get_token_counter()
+        max_tokens = self.config.vector_db.embedding_batch_max_tokens
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
+        batches = []
+        current, current_tokens = [], 0
+        for index, text in enumerate(texts):
+            tokens = counter.count(text)
+            if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """向后端发送一次批量请求（受全局并发上限约束）"""
+        if self._request_semaphore is None:
+            self._request_semaphore = asyncio.Semaphore(self.config.vector_db.embedding_concurrency)
+        
+        async with self._request_semaphore:
+            return await self.backend.embed(texts)
+    
+    async def _embed_sub_batch(self, texts: List[str], indices: List[int],
+                               results: List[Optional[np.ndarray]]):
+        """
+        请求一个子批次；失败时先退避重试，仍失败则二分后只重试失败的一半
+        """
+        max_retries = self.config.vector_db.embedding_max_retries
+        batch_texts = [texts[i] for i in indices]
+        
+        for attempt in range(max_retries + 1):
             try:
-                # 批量调用API
-                cleaned_texts = [self._clean_text(text) for text in batch]
-                
-                response = await self.client.embeddings.create(
-                    model=self.embedding_model,
-                    input=cleaned_texts
-                )
-                
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
+                embeddings = await self._request_embeddings(batch_texts)
+                for index, embedding in zip(indices, embeddings):
+                    results[index] = np.asarray(embedding, dtype=np.float32)
+                return
             except Exception as e:
-                # 如果批量失败，逐个生成
-                for text in batch:
-                    try:
-                        embedding = await self.generate_embedding(text)
-                        embeddings.append(embedding)
-                    except Exception as single_error:
-                        print(f"单个向量生成失败: {str(single_error)}")
-                        embeddings.append([0.0] * 1536)  # 零向量
+                last_error = e
+                if attempt < max_retries:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+        
+        if len(indices) == 1:
+            logger.warning(f"单个向量生成失败: {str(last_error)}")
+            return
+        
+        middle = len(indices) // 2
+        await asyncio.gather(
+            self._embed_sub_batch(texts, indices[:middle], results),
+            self._embed_sub_batch(texts, indices[middle:], results)
+        )
+    
+    async def embed_texts(self, texts: List[str], batch_size: int = None,
+                          return_failed: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, List[int]]]:
+        """
+        批量生成向量，返回 float32 矩阵 (len(texts), dim)，保持输入顺序
+        
+        相同文本只请求一次，缓存命中的文本不请求上游；未命中的文本按 token 预算
+        打包成批次，多个批次在并发上限内同时请求。
+        
+        Args:
+            texts: 待生成向量的文本
+            batch_size: 每个请求的最大条数，默认取配置 embedding_batch_max_items
+            return_failed: 为 True 时同时返回没有得到向量的行下标
+        
+        Returns:
+            向量矩阵；return_failed 为 True 时返回 (向量矩阵, 失败行下标列表)。
+            空文本和重试后仍生成失败的文本对应零向量行，不能用于检索或入库，
+            需要区分时传 return_failed=True。
+        
+        Raises:
+            AgentException: 存在非空文本但没有任何一行生成成功（例如上游整体不可用）
+        """
+        keys = [self._get_cache_key(text) if text else None for text in texts]
+        found = await self.cache.aget_many(key for key in keys if key)
+        
+        # 去重后的未命中文本
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key and key not in found and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            missing_keys = list(missing.keys())
+            cleaned_texts = [self._clean_text(missing[key]) for key in missing_keys]
+            results: List[Optional[np.ndarray]] = [None] * len(missing_keys)
+            
+            max_items = batch_size or self.config.vector_db.embedding_batch_max_items
+            await asyncio.gather(*(
+                self._embed_sub_batch(cleaned_texts, indices, results)
+                for indices in self._pack_batches(cleaned_texts, max_items)
+            ))
+            
+            generated = {
+                key: embedding for key, embedding in zip(missing_keys, results)
+                if embedding is not None
+            }
+            await self.cache.aput_many(generated)
+            found.update(generated)
+        
+        if found:
+            self.dimension = next(iter(found.values())).shape[0]
+        
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        failed = []
+        for row, key in enumerate(keys):
+            if key and key in found:
+                matrix[row] = found[key]
+            else:
+                failed.append(row)
         
-        return embeddings
+        if any(keys) and len(failed) == len(texts):
+            raise AgentException(f"向量生成失败: {len(texts)} 条文本均未生成向量")
+        failed_texts = sum(1 for row in failed if keys[row])
+        if failed_texts:
+            logger.warning(f"{failed_texts}/{len(texts)} 条文本向量生成失败")
+        return (matrix, failed) if return_failed else matrix
+    
+    async def generate_batch_embeddings(self, texts: List[str], 
+                                       batch_size: int = None) -> List[List[float]]:
+        """批量生成向量"""
+        return (await self.embed_texts(texts, batch_size)).tolist()
     
     async def generate_paper_embedding(self, paper_info: Dict[str, Any]) -> List[float]:
         """为论文生成综合向量"""
@@ -116,18 +221,17 @@ class EmbeddingGenerator:
     
     async def generate_section_embeddings(self, sections: Dict[str, str]) -> Dict[str, List[float]]:
         """为各个章节生成向量"""
-        section_embeddings = {}
+        names = [name for name, content in sections.items() if content.strip()]
+        if not names:
+            return {}
         
-        for section_name, section_content in sections.items():
-            if section_content.strip():
-                try:
-                    embedding = await self.generate_embedding(section_content)
-                    section_embeddings[section_name] = embedding
-                except Exception as e:
-                    print(f"章节 {section_name} 向量生成失败: {str(e)}")
-                    section_embeddings[section_name] = [0.0] * 1536
+        try:
+            embeddings = await self.generate_batch_embeddings([sections[name] for name in names])
+        except Exception as e:
+            print(f"章节向量生成失败: {str(e)}")
+            embeddings = [[0.0] * self.dimension for _ in names]
         
-        return section_embeddings
+        return dict(zip(names, embeddings))
     
     def _clean_text(self, text: str) -> str:
         """清理文本"""
@@ -137,10 +241,8 @@ class EmbeddingGenerator:
         # 移除多余的空白字符
         text = ' '.join(text.split())
         
-        # 截断过长的文本（OpenAI有token限制）
-        max_length = 8000  # 保守估计
-        if len(text) > max_length:
-            text = text[:max_length]
+        # 按 embedding 模型的 token 上限截断（按 token 边界，中英文均准确）
+        text = truncate_to_tokens(text, self.config.vector_db.embedding_max_tokens)
         
         return text
     
@@ -148,21 +250,24 @@ class EmbeddingGenerator:
         """生成缓存键"""
         return hashlib.md5(text.encode()).hexdigest()
     
-    def clear_cache(self):
+    def clear_cache(self, include_disk: bool = False):
         """清空缓存"""
-        self.cache.clear()
+        self.cache.clear(include_disk=include_disk)
     
     def get_cache_size(self) -> int:
         """获取缓存大小"""
         return len(self.cache)
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        return self.cache.get_stats()
+    
     async def calculate_similarity(self, text1: str, text2: str) -> float:
         """计算两个文本的相似度"""
         try:
-            embedding1 = await self.generate_embedding(text1)
-            embedding2 = await self.generate_embedding(text2)
+            embeddings = await self.embed_texts([text1, text2])
             
-            return self._cosine_similarity(embedding1, embedding2)
+            return cosine_similarity(embeddings[0], embeddings[1])
             
         except Exception as e:
             print(f"相似度计算失败: {str(e)}")
@@ -170,94 +275,79 @@ class EmbeddingGenerator:
     
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """计算余弦相似度"""
-        if len(vec1) != len(vec2):
-            return 0.0
-        
-        try:
-            vec1_np = np.array(vec1)
-            vec2_np = np.array(vec2)
-            
-            dot_product = np.dot(vec1_np, vec2_np)
-            norm1 = np.linalg.norm(vec1_np)
-            norm2 = np.linalg.norm(vec2_np)
-            
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-            
-            return dot_product / (norm1 * norm2)
-            
-        except Exception:
-            return 0.0
+        return cosine_similarity(vec1, vec2)
     
     async def find_most_similar(self, query_text: str, 
                                candidate_texts: List[str],
                                top_k: int = 5) -> List[Dict[str, Any]]:
         """找到最相似的文本"""
-        if not candidate_texts:
+        results = await self.find_most_similar_many([query_text], candidate_texts, top_k)
+        return results[0] if results else []
+    
+    async def find_most_similar_many(self, query_texts: List[str],
+                                    candidate_texts: List[str],
+                                    top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """为多个查询同时查找最相似的候选文本（一次矩阵乘法）"""
+        if not query_texts:
             return []
+        if not candidate_texts:
+            return [[] for _ in query_texts]
         
         try:
-            # 生成查询向量
-            query_embedding = await self.generate_embedding(query_text)
-            
-            # 生成候选文本向量
-            candidate_embeddings = await self.generate_batch_embeddings(candidate_texts)
-            
-            # 计算相似度
-            similarities = []
-            for i, candidate_embedding in enumerate(candidate_embeddings):
-                similarity = self._cosine_similarity(query_embedding, candidate_embedding)
-                similarities.append({
-                    "text": candidate_texts[i],
-                    "similarity": similarity,
-                    "index": i
-                })
-            
-            # 按相似度排序
-            similarities.sort(key=lambda x: x["similarity"], reverse=True)
+            embeddings = await self.embed_texts(list(query_texts) + list(candidate_texts))
+            index = SimilarityIndex(embeddings[len(query_texts):])
             
-            return similarities[:top_k]
+            return [
+                [
+                    {
+                        "text": candidate_texts[i],
+                        "similarity": similarity,
+                        "index": i
+                    }
+                    for i, similarity in matches
+                ]
+                for matches in index.search_many(embeddings[:len(query_texts)], top_k)
+            ]
             
         except Exception as e:
             print(f"相似文本查找失败: {str(e)}")
-            return []
+            return [[] for _ in query_texts]
     
     async def cluster_texts(self, texts: List[str], 
-                          num_clusters: int = 3) -> Dict[str, Any]:
-        """文本聚类（简化实现）"""
+                          num_clusters: int = 3,
+                          clusterer: Optional[MiniBatchKMeans] = None) -> Dict[str, Any]:
+        """
+        文本聚类
+        
+        Args:
+            texts: 待聚类文本
+            num_clusters: 簇数（文本数更少时取文本数）
+            clusterer: 已训练的聚类模型；传入时用新文本增量更新该模型而不是重新训练
+        """
+        if not texts:
+            return {"clusters": {}, "num_clusters": 0, "total_texts": 0}
+        
         try:
             # 生成所有文本的向量
-            embeddings = await self.generate_batch_embeddings(texts)
+            embeddings = await self.embed_texts(texts)
             
-            # 简单的聚类逻辑（基于相似度阈值）
-            clusters = {}
-            cluster_id = 0
-            used_indices = set()
+            if clusterer is not None and clusterer.is_fitted:
+                clusterer.partial_fit(embeddings)
+            else:
+                clusterer = clusterer or MiniBatchKMeans(num_clusters=min(num_clusters, len(texts)))
+                clusterer.fit(embeddings)
+            
+            summary = summarize_clusters(clusterer, embeddings)
             
-            for i, embedding in enumerate(embeddings):
-                if i in used_indices:
+            clusters = {}
+            for cluster_id, members in enumerate(summary["members"]):
+                if not members:
                     continue
-                
-                # 创建新聚类
                 clusters[f"cluster_{cluster_id}"] = {
-                    "texts": [texts[i]],
-                    "indices": [i],
-                    "center": embedding
+                    "texts": [texts[i] for i in members],
+                    "indices": members,
+                    "center": summary["centroids"][cluster_id].tolist()
                 }
-                used_indices.add(i)
-                
-                # 查找相似文本加入同一聚类
-                for j, other_embedding in enumerate(embeddings):
-                    if j in used_indices:
-                        continue
-                    
-                    similarity = self._cosine_similarity(embedding, other_embedding)
-                    if similarity > 0.8:  # 相似度阈值
-                        clusters[f"cluster_{cluster_id}"]["texts"].append(texts[j])
-                        clusters[f"cluster_{cluster_id}"]["indices"].append(j)
-                        used_indices.add(j)
-                
-                cluster_id += 1
             
             return {
                 "clusters": clusters,
@@ -304,6 +394,6 @@ class EmbeddingGenerator:
         return {
             "model": self.embedding_model,
             "cache_size": len(self.cache),
-            "vector_dimension": 1536,  # OpenAI embedding维度
-            "provider": "openai"
+            "vector_dimension": self.dimension,
+            "provider": self.backend.provider
         }
\ No newline at end of file
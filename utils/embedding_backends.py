@@ -0,0 +1,271 @@
+"""
+InnoCore AI 向量生成后端
+OpenAI 接口后端与无需网络的本地哈希 TF-IDF 后端，通过 VectorDBConfig.embedding_model 选择
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import re
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.config import get_config, VectorDBConfig
+from core.exceptions import AgentException
+from core.text import CJK_RANGES
+
+logger = logging.getLogger(__name__)
+
+# 选择本地后端的模型名
+LOCAL_EMBEDDING_MODELS = {"local", "local-tfidf"}
+
+# OpenAI embedding 模型的输出维度
+OPENAI_EMBEDDING_DIMENSIONS: Dict[str, int] = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+class EmbeddingBackend(ABC):
+    """向量生成后端接口"""
+    
+    @property
+    @abstractmethod
+    def model_id(self) -> str:
+        """模型标识，向量空间变化时必须随之变化（用作缓存命名空间）"""
+    
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        """输出向量维度"""
+    
+    @property
+    def provider(self) -> str:
+        return "unknown"
+    
+    async def initialize(self):
+        """初始化后端（建立客户端、加载模型等）"""
+    
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """生成一批文本的向量，输出顺序与输入一致"""
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAI 兼容接口的 embedding 后端
+    
+    text-embedding-3 系列支持通过 dimensions 截短输出（Matryoshka 表示），
+    以少量召回损失换取更小的向量库。
+    """
+    
+    def __init__(self, model_name: str, dimensions: int = None):
+        native_dimension = OPENAI_EMBEDDING_DIMENSIONS.get(model_name, 1536)
+        if dimensions is not None:
+            if not model_name.startswith("text-embedding-3"):
+                raise ValueError(f"模型 {model_name} 不支持指定输出维度")
+            if not 0 < dimensions <= native_dimension:
+                raise ValueError(f"输出维度必须在 1 到 {native_dimension} 之间")
+        self.model_name = model_name
+        self.dimensions = dimensions
+        self.client = None
+    
+    @property
+    def model_id(self) -> str:
+        # 截短后的向量空间不同，缓存需按维度隔离
+        return f"{self.model_name}-{self.dimensions}" if self.dimensions else self.model_name
+    
+    @property
+    def dimension(self) -> int:
+        return self.dimensions or OPENAI_EMBEDDING_DIMENSIONS.get(self.model_name, 1536)
+    
+    @property
+    def provider(self) -> str:
+        return "openai"
+    
+    async def initialize(self):
+        try:
+            from openai import AsyncOpenAI
+            
+            llm_config = get_config().llm
+            self.client = AsyncOpenAI(
+                api_key=llm_config.api_key,
+                base_url=llm_config.base_url
+            )
+        except Exception as e:
+            raise AgentException(f"向量生成器初始化失败: {str(e)}")
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        params = {"dimensions": self.dimensions} if self.dimensions else {}
+        response = await self.client.embeddings.create(
+            model=self.model_name,
+            input=texts,
+            **params
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+_WORD_PATTERN = re.compile(rf"[{CJK_RANGES}]+|[a-z0-9]+")
+_CJK_RUN_PATTERN = re.compile(rf"[{CJK_RANGES}]")
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """本地哈希 n-gram TF-IDF 后端（纯 CPU，无需网络）
+    
+    文本切分为英文单词、相邻词二元组和 CJK 字二元组，用带符号的特征哈希映射到
+    固定维度的稀疏空间，经次线性 TF 和 IDF 加权后投影到输出维度：
+    - 未训练时使用固定种子的随机投影，结果可复现；
+    - 调用 fit 后使用语料 IDF 和截断 SVD（潜在语义分析）得到的投影，并持久化到磁盘。
+    两种投影的向量空间不同，model_id 会随之变化。
+    """
+    
+    def __init__(self, dimension: int = 384, hash_features: int = 2048,
+                 model_dir: str = None, seed: int = 42):
+        if dimension > hash_features:
+            raise ValueError("输出维度不能大于哈希特征维度")
+        self._dimension = dimension
+        self.hash_features = hash_features
+        self.seed = seed
+        self.model_dir = model_dir or os.path.join(get_config().cache_dir, "embedding_models")
+        
+        self.idf = np.ones(hash_features, dtype=np.float32)
+        self.projection = self._random_projection()
+        self.fitted_digest: Optional[str] = None
+    
+    @property
+    def model_id(self) -> str:
+        base = f"local-hash-tfidf-{self.hash_features}-{self._dimension}"
+        return f"{base}-svd-{self.fitted_digest}" if self.fitted_digest else base
+    
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+    
+    @property
+    def provider(self) -> str:
+        return "local"
+    
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, f"local_tfidf_{self.hash_features}_{self._dimension}.npz")
+    
+    def _random_projection(self) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        matrix = rng.standard_normal((self.hash_features, self._dimension), dtype=np.float32)
+        return matrix / math.sqrt(self._dimension)
+    
+    async def initialize(self):
+        """加载已训练的投影（如有）"""
+        if os.path.exists(self.model_path):
+            try:
+                self.load(self.model_path)
+            except Exception as e:
+                logger.warning(f"本地 embedding 模型加载失败，使用随机投影: {str(e)}")
+    
+    @staticmethod
+    def _features(text: str) -> Iterable[str]:
+        """生成文本的 n-gram 特征"""
+        previous = None
+        for match in _WORD_PATTERN.finditer(text.lower()):
+            token = match.group(0)
+            if _CJK_RUN_PATTERN.match(token):
+                # CJK 无空格分词，使用单字和相邻字二元组
+                yield from token
+                for i in range(len(token) - 1):
+                    yield token[i:i + 2]
+                previous = None
+            else:
+                yield token
+                if previous is not None:
+                    yield f"{previous} {token}"
+                previous = token
+    
+    def _hashed_tf(self, text: str) -> np.ndarray:
+        """带符号特征哈希 + 次线性 TF"""
+        vector = np.zeros(self.hash_features, dtype=np.float32)
+        for feature, count in Counter(self._features(text)).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.hash_features] += sign * (1.0 + math.log(count))
+        return vector
+    
+    def _tfidf_matrix(self, texts: List[str]) -> np.ndarray:
+        matrix = np.stack([self._hashed_tf(text or "") for text in texts]) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        """同步生成向量，返回 float32 矩阵"""
+        if not texts:
+            return np.zeros((0, self._dimension), dtype=np.float32)
+        projected = self._tfidf_matrix(texts) @ self.projection
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (projected / norms).astype(np.float32, copy=False)
+    
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return (await asyncio.to_thread(self.embed_sync, texts)).tolist()
+    
+    def fit(self, texts: List[str], max_documents: int = 20000, save: bool = True):
+        """
+        在语料上训练 IDF 和 SVD 投影
+        
+        Args:
+            texts: 训练语料（例如 L1 预置库的标题和摘要）
+            max_documents: 参与 SVD 的最大文档数，超过时均匀抽样
+            save: 是否持久化到 model_path
+        """
+        texts = [text for text in texts if text]
+        if len(texts) < self._dimension:
+            raise ValueError(f"训练语料至少需要 {self._dimension} 条文本")
+        
+        if len(texts) > max_documents:
+            rng = np.random.default_rng(self.seed)
+            texts = [texts[i] for i in rng.choice(len(texts), max_documents, replace=False)]
+        
+        # 两遍扫描：先统计文档频率，再分块累加特征协方差，内存占用与文档数无关
+        document_frequency = np.zeros(self.hash_features, dtype=np.int64)
+        for start in range(0, len(texts), 1024):
+            tf = np.stack([self._hashed_tf(text) for text in texts[start:start + 1024]])
+            document_frequency += np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        
+        gram = np.zeros((self.hash_features, self.hash_features), dtype=np.float64)
+        for start in range(0, len(texts), 1024):
+            matrix = self._tfidf_matrix(texts[start:start + 1024])
+            gram += matrix.T @ matrix
+        
+        # 截断 SVD：对 X^T X 做特征分解，取前 dimension 个右奇异向量
+        eigenvalues, eigenvectors = np.linalg.eigh(gram)
+        top = np.argsort(eigenvalues)[::-1][:self._dimension]
+        self.projection = eigenvectors[:, top].astype(np.float32)
+        
+        self.fitted_digest = hashlib.md5(self.projection.tobytes()).hexdigest()[:12]
+        logger.info(f"本地 embedding 模型训练完成: {len(texts)} 篇文档, {self.model_id}")
+        
+        if save:
+            self.save(self.model_path)
+    
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, idf=self.idf, projection=self.projection)
+    
+    def load(self, path: str):
+        data = np.load(path)
+        if data["projection"].shape != (self.hash_features, self._dimension):
+            raise ValueError(f"模型维度不匹配: {data['projection'].shape}")
+        self.idf = data["idf"].astype(np.float32)
+        self.projection = data["projection"].astype(np.float32)
+        self.fitted_digest = hashlib.md5(self.projection.tobytes()).hexdigest()[:12]
+
+def create_embedding_backend(vector_db_config: VectorDBConfig = None) -> EmbeddingBackend:
+    """按 embedding_model 配置创建后端：local 使用本地后端，其余视为 OpenAI 模型名"""
+    vector_db_config = vector_db_config or get_config().vector_db
+    if vector_db_config.embedding_model in LOCAL_EMBEDDING_MODELS:
+        return LocalEmbeddingBackend(dimension=vector_db_config.local_embedding_dim)
+    return OpenAIEmbeddingBackend(
+        vector_db_config.embedding_model, dimensions=vector_db_config.embedding_dimensions
+    )
@@ -0,0 +1,306 @@
+"""
+InnoCore AI 向量缓存
+内存层：float32 数组 + 字节预算 LRU；磁盘层：按模型分目录的内存映射向量文件
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """向量缓存，键为文本内容哈希，按 embedding 模型隔离
+    
+    磁盘层可被多个进程（API worker）共享：追加向量前先取得 SQLite 写锁（BEGIN IMMEDIATE），
+    行号在锁内按文件长度分配，哈希 -> 行号的索引与向量文件始终一致。
+    内存层和磁盘层使用各自的锁，异步代码通过 aget_many/aput_many 调用，
+    内存命中直接返回，磁盘读写在线程池中执行，不阻塞事件循环。
+    """
+    
+    def __init__(self, model_name: str, cache_dir: str = None,
+                 max_bytes: int = None, disk_enabled: bool = None):
+        config = get_config()
+        self.model_name = model_name
+        self.max_bytes = max_bytes if max_bytes is not None else config.embedding_cache_max_bytes
+        disk_enabled = config.embedding_cache_disk_enabled if disk_enabled is None else disk_enabled
+        
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._disk_lock = threading.Lock()
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._conn = None
+        self._mmaps: Dict[int, np.memmap] = {}
+        self.disk_dir = None
+        if disk_enabled:
+            model_slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            self.disk_dir = os.path.join(cache_dir or config.cache_dir, "embeddings", model_slug)
+            self._open_disk()
+    
+    def _open_disk(self):
+        """打开磁盘层索引"""
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._conn = sqlite3.connect(
+                os.path.join(self.disk_dir, "index.sqlite3"), timeout=30, check_same_thread=False
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_index (
+                    content_hash TEXT PRIMARY KEY,
+                    dim INTEGER NOT NULL,
+                    row INTEGER NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"向量磁盘缓存不可用，仅使用内存缓存: {str(e)}")
+            self._conn = None
+    
+    def _vectors_path(self, dim: int) -> str:
+        return os.path.join(self.disk_dir, f"vectors_{dim}.f32")
+    
+    def _get_mmap(self, dim: int, row: int) -> Optional[np.memmap]:
+        """获取覆盖指定行的内存映射，文件增长后重新映射"""
+        mmap = self._mmaps.get(dim)
+        if mmap is None or row >= mmap.shape[0]:
+            path = self._vectors_path(dim)
+            rows = os.path.getsize(path) // (dim * 4) if os.path.exists(path) else 0
+            if rows == 0:
+                return None
+            mmap = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+            self._mmaps[dim] = mmap
+        return mmap if row < mmap.shape[0] else None
+    
+    def _disk_get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        if self._conn is None or not hashes:
+            return found
+        
+        # SQLite 单条语句的参数数量有限，分块查询
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT content_hash, dim, row FROM embedding_index WHERE content_hash IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for content_hash, dim, row in rows:
+                mmap = self._get_mmap(dim, row)
+                if mmap is not None:
+                    found[content_hash] = np.array(mmap[row], dtype=np.float32)
+        return found
+    
+    def _disk_put_many(self, items: Dict[str, np.ndarray]):
+        if self._conn is None or not items:
+            return
+        
+        # 写锁跨进程串行化追加：锁内重新检查已存在的哈希并按文件长度分配行号
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._append_rows(items)
+        except BaseException:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+    
+    def _append_rows(self, items: Dict[str, np.ndarray]):
+        existing = set()
+        hashes = list(items.keys())
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            existing.update(
+                row[0] for row in self._conn.execute(
+                    f"SELECT content_hash FROM embedding_index WHERE content_hash IN ({placeholders})",
+                    chunk
+                )
+            )
+        
+        by_dim: Dict[int, List[str]] = {}
+        for content_hash, vector in items.items():
+            if content_hash not in existing:
+                by_dim.setdefault(vector.shape[0], []).append(content_hash)
+        
+        for dim, dim_hashes in by_dim.items():
+            path = self._vectors_path(dim)
+            block = np.stack([items[h] for h in dim_hashes]).astype(np.float32, copy=False)
+            row_bytes = dim * 4
+            with open(path, "ab") as f:
+                # 之前的写入若中途失败留下半行，先补齐到行边界
+                padding = -f.tell() % row_bytes
+                f.write(b"\0" * padding)
+                start_row = f.tell() // row_bytes
+                f.write(block.tobytes())
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding_index (content_hash, dim, row) VALUES (?, ?, ?)",
+                [(h, dim, start_row + i) for i, h in enumerate(dim_hashes)]
+            )
+    
+    def _memory_put(self, content_hash: str, vector: np.ndarray):
+        old = self._memory.pop(content_hash, None)
+        if old is not None:
+            self._memory_bytes -= old.nbytes
+        self._memory[content_hash] = vector
+        self._memory_bytes += vector.nbytes
+        
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.evictions += 1
+    
+    def get(self, content_hash: str) -> Optional[np.ndarray]:
+        """查询单条向量"""
+        return self.get_many([content_hash]).get(content_hash)
+    
+    def _memory_get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for content_hash in hashes:
+                vector = self._memory.get(content_hash)
+                if vector is not None:
+                    self._memory.move_to_end(content_hash)
+                    found[content_hash] = vector
+            self.hits += len(found)
+        return found
+    
+    def _load_from_disk(self, missing: List[str]) -> Dict[str, np.ndarray]:
+        """从磁盘层读取内存未命中的向量并回填内存层"""
+        disk_found = {}
+        if self._conn is not None:
+            try:
+                with self._disk_lock:
+                    disk_found = self._disk_get_many(missing)
+            except Exception as e:
+                logger.warning(f"读取向量磁盘缓存失败: {str(e)}")
+        with self._lock:
+            for content_hash, vector in disk_found.items():
+                self._memory_put(content_hash, vector)
+            self.disk_hits += len(disk_found)
+            self.misses += len(missing) - len(disk_found)
+        return disk_found
+    
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        批量查询向量
+        
+        Returns:
+            命中的 哈希 -> float32 向量；未命中的键不在结果中
+        """
+        hashes = list(dict.fromkeys(hashes))
+        found = self._memory_get_many(hashes)
+        missing = [content_hash for content_hash in hashes if content_hash not in found]
+        if missing:
+            found.update(self._load_from_disk(missing))
+        return found
+    
+    async def aget_many(self, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """get_many 的异步版本：内存层未命中时在线程池中读取磁盘层"""
+        hashes = list(dict.fromkeys(hashes))
+        found = self._memory_get_many(hashes)
+        missing = [content_hash for content_hash in hashes if content_hash not in found]
+        if missing:
+            if self._conn is None:
+                found.update(self._load_from_disk(missing))
+            else:
+                found.update(await asyncio.to_thread(self._load_from_disk, missing))
+        return found
+    
+    async def aget(self, content_hash: str) -> Optional[np.ndarray]:
+        return (await self.aget_many([content_hash])).get(content_hash)
+    
+    def put(self, content_hash: str, vector) -> None:
+        """写入单条向量"""
+        self.put_many({content_hash: vector})
+    
+    def _memory_put_many(self, items: Dict[str, object]) -> Dict[str, np.ndarray]:
+        arrays = {
+            content_hash: np.asarray(vector, dtype=np.float32)
+            for content_hash, vector in items.items()
+        }
+        with self._lock:
+            for content_hash, vector in arrays.items():
+                self._memory_put(content_hash, vector)
+        return arrays
+    
+    def _store_to_disk(self, arrays: Dict[str, np.ndarray]):
+        try:
+            with self._disk_lock:
+                self._disk_put_many(arrays)
+        except Exception as e:
+            logger.warning(f"写入向量磁盘缓存失败: {str(e)}")
+    
+    def put_many(self, items: Dict[str, object]) -> None:
+        """批量写入向量（同时写入内存层和磁盘层）"""
+        arrays = self._memory_put_many(items)
+        if self._conn is not None and arrays:
+            self._store_to_disk(arrays)
+    
+    async def aput_many(self, items: Dict[str, object]) -> None:
+        """put_many 的异步版本：磁盘层写入在线程池中执行"""
+        arrays = self._memory_put_many(items)
+        if self._conn is not None and arrays:
+            await asyncio.to_thread(self._store_to_disk, arrays)
+    
+    async def aput(self, content_hash: str, vector) -> None:
+        await self.aput_many({content_hash: vector})
+    
+    def clear(self, include_disk: bool = False):
+        """清空内存层，可选同时清空磁盘层"""
+        with self._lock, self._disk_lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if include_disk and self._conn is not None:
+                self._conn.execute("DELETE FROM embedding_index")
+                self._conn.commit()
+                self._mmaps.clear()
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".f32"):
+                        os.remove(os.path.join(self.disk_dir, name))
+    
+    def __len__(self) -> int:
+        return len(self._memory)
+    
+    def get_stats(self) -> Dict[str, object]:
+        """获取缓存统计"""
+        lookups = self.hits + self.disk_hits + self.misses
+        disk_entries = 0
+        if self._conn is not None:
+            with self._disk_lock:
+                disk_entries = self._conn.execute("SELECT COUNT(*) FROM embedding_index").fetchone()[0]
+        return {
+            "model": self.model_name,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "max_bytes": self.max_bytes,
+            "disk_entries": disk_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+    
+    def close(self):
+        """关闭磁盘层"""
+        with self._lock, self._disk_lock:
+            self._mmaps.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,169 @@
+"""
+InnoCore AI 向量相似度计算
+基于预归一化 float32 矩阵的批量余弦相似度与 top-k 检索
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 批量查询时每块的查询数，限制 (查询数 x 候选数) 得分矩阵的内存占用
+QUERY_CHUNK_SIZE = 256
+
+def normalize_rows(vectors) -> np.ndarray:
+    """把向量（或向量矩阵）按行归一化为单位长度，零向量保持为零"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def cosine_similarity(vec1, vec2) -> float:
+    """计算两个向量的余弦相似度，维度不一致或含零向量时返回 0"""
+    a = np.asarray(vec1, dtype=np.float32)
+    b = np.asarray(vec2, dtype=np.float32)
+    if a.shape != b.shape:
+        return 0.0
+    
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    if norm == 0:
+        return 0.0
+    return float(np.dot(a, b) / norm)
+
+def select_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按行取得分最高的 k 项
+    
+    先用 argpartition 在 O(n) 内选出前 k 项，再只对这 k 项排序。
+    
+    Args:
+        scores: 形状为 (n,) 或 (m, n) 的得分
+        k: 返回的数量
+    
+    Returns:
+        (下标, 得分)，形状与输入行数对应，每行按得分降序
+    """
+    scores = np.asarray(scores)
+    squeeze = scores.ndim == 1
+    if squeeze:
+        scores = scores.reshape(1, -1)
+    
+    k = max(0, min(k, scores.shape[1]))
+    if k < scores.shape[1]:
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        indices = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    top_scores = np.take_along_axis(scores, indices, axis=1)
+    
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    indices = np.take_along_axis(indices, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    
+    if squeeze:
+        return indices[0], top_scores[0]
+    return indices, top_scores
+
+class SimilarityIndex:
+    """内存向量索引
+    
+    候选向量在写入时归一化并存为连续的 float32 矩阵，一批查询只需一次矩阵乘法。
+    容量按倍数扩展，增量添加的均摊成本为 O(1)。
+    """
+    
+    def __init__(self, vectors=None, ids: Optional[Sequence[Any]] = None):
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._ids: List[Any] = []
+        if vectors is not None:
+            self.add(vectors, ids)
+    
+    @property
+    def dimension(self) -> Optional[int]:
+        """向量维度，空索引为 None"""
+        return None if self._matrix is None else self._matrix.shape[1]
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """已归一化的候选矩阵（只读视图）"""
+        if self._matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        view = self._matrix[:self._size]
+        view.flags.writeable = False
+        return view
+    
+    @property
+    def ids(self) -> List[Any]:
+        return list(self._ids)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, vectors, ids: Optional[Sequence[Any]] = None):
+        """添加候选向量；未提供 ids 时使用行号"""
+        block = normalize_rows(vectors)
+        if block.shape[0] == 0:
+            return
+        
+        if ids is None:
+            ids = range(self._size, self._size + block.shape[0])
+        ids = list(ids)
+        if len(ids) != block.shape[0]:
+            raise ValueError("ids 数量与向量数量不一致")
+        
+        if self._matrix is None:
+            self._matrix = np.empty((max(block.shape[0], 16), block.shape[1]), dtype=np.float32)
+        elif block.shape[1] != self._matrix.shape[1]:
+            raise ValueError(f"向量维度不一致: {block.shape[1]} != {self._matrix.shape[1]}")
+        
+        required = self._size + block.shape[0]
+        if required > self._matrix.shape[0]:
+            capacity = max(required, self._matrix.shape[0] * 2)
+            grown = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        
+        self._matrix[self._size:required] = block
+        self._size = required
+        self._ids.extend(ids)
+    
+    def scores(self, queries) -> np.ndarray:
+        """计算查询与全部候选的余弦相似度，返回 (查询数, 候选数)"""
+        if self._size == 0:
+            return np.zeros((normalize_rows(queries).shape[0], 0), dtype=np.float32)
+        return normalize_rows(queries) @ self._matrix[:self._size].T
+    
+    def search_many(self, queries, top_k: int = 5,
+                    min_score: Optional[float] = None) -> List[List[Tuple[Any, float]]]:
+        """
+        批量检索
+        
+        Args:
+            queries: 查询向量矩阵 (m, dim)
+            top_k: 每个查询返回的数量
+            min_score: 最低相似度，低于该值的结果被丢弃
+        
+        Returns:
+            每个查询一个 [(id, 相似度), ...] 列表，按相似度降序
+        """
+        queries = normalize_rows(queries)
+        if self._size == 0 or top_k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        
+        candidates = self._matrix[:self._size].T
+        results = []
+        for start in range(0, queries.shape[0], QUERY_CHUNK_SIZE):
+            chunk_scores = queries[start:start + QUERY_CHUNK_SIZE] @ candidates
+            indices, scores = select_top_k(chunk_scores, top_k)
+            for row_indices, row_scores in zip(indices, scores):
+                results.append([
+                    (self._ids[index], float(score))
+                    for index, score in zip(row_indices, row_scores)
+                    if min_score is None or score >= min_score
+                ])
+        return results
+    
+    def search(self, query, top_k: int = 5,
+               min_score: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """单个查询检索，返回 [(id, 相似度), ...]"""
+        return self.search_many(np.asarray(query).reshape(1, -1), top_k, min_score)[0]
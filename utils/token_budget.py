@@ -0,0 +1,235 @@
+"""
+InnoCore AI Token 预算工具
+基于 tokenizer 的提示词预算分配与按 token 边界截断，离线可用
+"""
+
+import hashlib
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from core.cache import TTLLRUCache
+from core.config import get_config, LLMConfig
+from core.text import CJK_RANGES
+
+logger = logging.getLogger(__name__)
+
+# 常见模型的上下文窗口大小（按模型名前缀匹配，越具体的前缀越靠前）
+MODEL_CONTEXT_WINDOWS: List[Tuple[str, int]] = [
+    ("gpt-4o", 128000),
+    ("gpt-4-turbo", 128000),
+    ("gpt-4-1106", 128000),
+    ("gpt-4-0125", 128000),
+    ("gpt-4-32k", 32768),
+    ("gpt-4", 8192),
+    ("gpt-3.5-turbo-instruct", 4096),
+    ("gpt-3.5-turbo", 16385),
+    ("qwen-turbo", 131072),
+    ("qwen-plus", 131072),
+    ("qwen-max", 32768),
+    ("qwen/qwen2.5", 32768),
+    ("claude", 200000),
+    ("deepseek", 65536),
+]
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# 离线启发式分词：CJK 单字、英文单词、数字、标点分别切分
+_HEURISTIC_PATTERN = re.compile(
+    rf"[{CJK_RANGES}]|[A-Za-z]+|\d+|[^\s{CJK_RANGES}A-Za-z\d]"
+)
+_CJK_PATTERN = re.compile(rf"[{CJK_RANGES}]")
+
+def get_context_window(llm_config: LLMConfig = None) -> int:
+    """获取模型的上下文窗口大小，优先使用配置中的显式值"""
+    llm_config = llm_config or get_config().llm
+    if llm_config.context_window:
+        return llm_config.context_window
+    
+    model_name = (llm_config.model_name or "").lower()
+    for prefix, window in MODEL_CONTEXT_WINDOWS:
+        if model_name.startswith(prefix):
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+class TokenCounter:
+    """Token 计数与截断
+    
+    优先使用 tiktoken（需要本地已有编码文件）；不可用时退化为离线启发式分词，
+    CJK 字符按单字计、英文单词按每 4 个字符约 1 个 token 计，估算偏保守。
+    """
+    
+    def __init__(self, encoding_name: str = "cl100k_base", mode: str = None,
+                 cache_size: int = 8192):
+        self.encoding_name = encoding_name
+        self.mode = mode or get_config().llm.tokenizer
+        self._encoding = None
+        self._count_cache = TTLLRUCache(max_entries=cache_size)
+        
+        if self.mode in ("auto", "tiktoken"):
+            self._encoding = self._load_tiktoken()
+            if self._encoding is None and self.mode == "tiktoken":
+                logger.warning("tiktoken 编码不可用，使用启发式分词")
+    
+    def _load_tiktoken(self):
+        """加载 tiktoken 编码；离线环境下未缓存编码文件时返回 None"""
+        try:
+            import tiktoken
+            return tiktoken.get_encoding(self.encoding_name)
+        except Exception as e:
+            logger.info(f"tiktoken 不可用，使用离线启发式分词: {str(e)}")
+            return None
+    
+    @property
+    def backend(self) -> str:
+        """当前使用的分词后端"""
+        return "tiktoken" if self._encoding is not None else "heuristic"
+    
+    @staticmethod
+    def _piece_cost(piece: str) -> float:
+        """启发式分词中单个片段的 token 成本"""
+        if _CJK_PATTERN.match(piece):
+            return 1.0
+        if piece[0].isalpha():
+            return max(1.0, math.ceil(len(piece) / 4))
+        if piece[0].isdigit():
+            return max(1.0, math.ceil(len(piece) / 3))
+        return 1.0
+    
+    def _heuristic_count(self, text: str) -> int:
+        return int(math.ceil(sum(self._piece_cost(m.group(0)) for m in _HEURISTIC_PATTERN.finditer(text))))
+    
+    def count(self, text: str) -> int:
+        """计算文本的 token 数（按文本哈希缓存）"""
+        if not text:
+            return 0
+        
+        cache_key = hashlib.md5(text.encode("utf-8")).hexdigest()
+        cached = self._count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        if self._encoding is not None:
+            count = len(self._encoding.encode(text, disallowed_special=()))
+        else:
+            count = self._heuristic_count(text)
+        
+        self._count_cache.set(cache_key, count)
+        return count
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """按 token 边界截断文本"""
+        if not text or max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            # 截断点可能落在多字节字符中间，去掉残缺的替换字符
+            return self._encoding.decode(tokens[:max_tokens]).rstrip("\ufffd")
+        
+        used = 0.0
+        for match in _HEURISTIC_PATTERN.finditer(text):
+            used += self._piece_cost(match.group(0))
+            if used > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+    
+    def get_stats(self) -> Dict[str, object]:
+        """获取计数缓存统计"""
+        stats = self._count_cache.get_stats()
+        stats["backend"] = self.backend
+        return stats
+
+class PromptBudget:
+    """提示词 token 预算
+    
+    总预算 = 上下文窗口 - 预留输出 token - 安全余量，再用 max_prompt_tokens（默认 8000）封顶。
+    各段按权重分配预算，用不完的份额按权重再分给仍需要更多 token 的段。
+    """
+    
+    def __init__(self, total_tokens: int = None, reserve_output: int = None,
+                 safety_margin: int = 64, counter: TokenCounter = None):
+        llm_config = get_config().llm
+        self.counter = counter or get_token_counter()
+        
+        if total_tokens is None:
+            reserve_output = llm_config.max_tokens if reserve_output is None else reserve_output
+            total_tokens = get_context_window(llm_config) - reserve_output - safety_margin
+            if llm_config.max_prompt_tokens:
+                total_tokens = min(total_tokens, llm_config.max_prompt_tokens)
+        self.total_tokens = max(0, total_tokens)
+    
+    def allocate(self, sections: Dict[str, str], weights: Dict[str, float] = None,
+                 limits: Dict[str, int] = None, overhead: str = "") -> Dict[str, int]:
+        """
+        计算各段可用的 token 数
+        
+        Args:
+            sections: 段名 -> 文本
+            weights: 段名 -> 权重（默认均为 1）
+            limits: 段名 -> 该段 token 上限
+            overhead: 提示词模板等固定部分，先从总预算中扣除
+        
+        Returns:
+            段名 -> 分配到的 token 数
+        """
+        weights = weights or {}
+        limits = limits or {}
+        available = max(0, self.total_tokens - self.counter.count(overhead))
+        
+        demands = {}
+        for name, text in sections.items():
+            demand = self.counter.count(text or "")
+            if name in limits:
+                demand = min(demand, limits[name])
+            demands[name] = demand
+        
+        allocation = {name: 0 for name in sections}
+        pending = {name for name, demand in demands.items() if demand > 0}
+        
+        # 水位填充：需求小于份额的段全部满足，剩余预算在其余段之间按权重再分配
+        while pending and available > 0:
+            total_weight = sum(weights.get(name, 1.0) for name in pending)
+            satisfied = set()
+            for name in pending:
+                share = available * weights.get(name, 1.0) / total_weight
+                if demands[name] - allocation[name] <= share:
+                    satisfied.add(name)
+            
+            if not satisfied:
+                for name in pending:
+                    allocation[name] += int(available * weights.get(name, 1.0) / total_weight)
+                break
+            
+            for name in satisfied:
+                available -= demands[name] - allocation[name]
+                allocation[name] = demands[name]
+            pending -= satisfied
+        
+        return allocation
+    
+    def fit(self, sections: Dict[str, str], weights: Dict[str, float] = None,
+            limits: Dict[str, int] = None, overhead: str = "") -> Dict[str, str]:
+        """按预算截断各段文本，返回段名 -> 截断后的文本"""
+        allocation = self.allocate(sections, weights, limits, overhead)
+        return {
+            name: self.counter.truncate(text or "", allocation[name])
+            for name, text in sections.items()
+        }
+
+# 全局 Token 计数器实例
+_token_counter = None
+
+def get_token_counter() -> TokenCounter:
+    """获取全局 Token 计数器实例"""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter()
+    return _token_counter
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """按 token 边界截断文本"""
+    return get_token_counter().truncate(text, max_tokens)
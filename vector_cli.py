@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+InnoCore AI 向量库命令行工具
+
+用法:
+    python vector_cli.py load-l1 papers.jsonl
+    python vector_cli.py load-l1 papers.parquet --chunk-size 512 --fit-local
+    python vector_cli.py load-l1 arxiv_dump.jsonl --full-payload
+    python vector_cli.py rebuild-lexical l1 l2
+    python vector_cli.py export-snapshot snapshots/l1 --collection l1 --dtype int8
+    python vector_cli.py import-snapshot snapshots/l1
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from core.vector_store import vector_store_manager
+
+def _normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """把导出记录转换为 add_many_to_l1 需要的论文字典"""
+    title = record.get("title") or ""
+    paper_id = (
+        record.get("paper_id") or record.get("id") or record.get("arxiv_id")
+        or record.get("doi") or hashlib.md5(title.encode()).hexdigest()
+    )
+    
+    known = {"paper_id", "id", "title", "abstract", "content", "full_text", "metadata"}
+    metadata = dict(record.get("metadata") or {})
+    metadata.update({key: value for key, value in record.items() if key not in known})
+    
+    return {
+        "paper_id": str(paper_id),
+        "title": title,
+        "abstract": record.get("abstract") or "",
+        "content": record.get("content") or record.get("full_text") or "",
+        "metadata": metadata
+    }
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _normalize_record(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"⚠️  第 {line_number} 行不是合法 JSON，已跳过: {e}", file=sys.stderr)
+
+def iter_parquet(path: Path, batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("读取 Parquet 需要安装 pyarrow: pip install pyarrow")
+    
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        for record in batch.to_pylist():
+            yield _normalize_record(record)
+
+def iter_papers(path: Path, file_format: str = None) -> Iterator[Dict[str, Any]]:
+    file_format = file_format or ("parquet" if path.suffix == ".parquet" else "jsonl")
+    if file_format == "parquet":
+        return iter_parquet(path)
+    return iter_jsonl(path)
+
+async def load_l1(args):
+    path = Path(args.path)
+    if not path.exists():
+        raise SystemExit(f"文件不存在: {path}")
+    
+    await vector_store_manager.initialize()
+    try:
+        if args.fit_local:
+            texts = [
+                f"{paper['title']} {paper['abstract']}"
+                for paper in iter_papers(path, args.format)
+            ]
+            print(f"训练本地向量模型（{len(texts)} 篇）...")
+            await vector_store_manager.embedder.fit_backend(texts)
+            print(f"✅ 模型: {vector_store_manager.embedder.embedding_model}")
+        
+        start = time.perf_counter()
+        
+        def report(progress: Dict[str, int]):
+            elapsed = time.perf_counter() - start
+            done = progress["upserted"] + progress["failed"]
+            rate = done / elapsed if elapsed else 0.0
+            print(
+                f"\r已写入 {progress['upserted']}，失败 {progress['failed']}，"
+                f"跳过 {progress['skipped']}（{rate:.0f} 篇/秒）",
+                end="", flush=True
+            )
+        
+        result = await vector_store_manager.add_many_to_l1(
+            iter_papers(path, args.format),
+            chunk_size=args.chunk_size,
+            progress_callback=report,
+            slim_payload=False if args.full_payload else None
+        )
+        print()
+        print(f"✅ 导入完成: {result}，耗时 {time.perf_counter() - start:.1f} 秒")
+    finally:
+        await vector_store_manager.close()
+
+async def rebuild_lexical(args):
+    await vector_store_manager.initialize()
+    try:
+        for collection_type in args.collections:
+            count = await vector_store_manager.rebuild_lexical_index(collection_type)
+            print(f"✅ {collection_type} 词法索引已重建: {count} 篇")
+    finally:
+        await vector_store_manager.close()
+
+async def export_snapshot(args):
+    await vector_store_manager.initialize()
+    try:
+        start = time.perf_counter()
+        manifest = await vector_store_manager.export_snapshot(
+            args.path, args.collection, dtype=args.dtype, user_id=args.user_id,
+            page_size=args.page_size,
+            progress_callback=lambda count: print(f"\r已导出 {count} 个点", end="", flush=True)
+        )
+        print()
+        print(
+            f"✅ 快照已写入 {args.path}: {manifest['count']} 个点，模型 {manifest['embedding_model']}，"
+            f"耗时 {time.perf_counter() - start:.1f} 秒"
+        )
+    finally:
+        await vector_store_manager.close()
+
+async def import_snapshot(args):
+    await vector_store_manager.initialize()
+    try:
+        start = time.perf_counter()
+        count = await vector_store_manager.import_snapshot(
+            args.path, args.collection, force=args.force,
+            progress_callback=lambda count: print(f"\r已导入 {count} 个点", end="", flush=True)
+        )
+        print()
+        print(f"✅ 快照导入完成: {count} 个点，耗时 {time.perf_counter() - start:.1f} 秒")
+    finally:
+        await vector_store_manager.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="InnoCore AI 向量库命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    load_parser = subparsers.add_parser("load-l1", help="批量导入论文到 L1 预置库")
+    load_parser.add_argument("path", help="JSONL 或 Parquet 文件")
+    load_parser.add_argument("--format", choices=["jsonl", "parquet"], help="默认按扩展名判断")
+    load_parser.add_argument("--chunk-size", type=int, default=None, help="每次 upsert 的点数")
+    load_parser.add_argument("--fit-local", action="store_true",
+                             help="导入前先在该数据上训练本地向量模型（仅 embedding_model=local）")
+    load_parser.add_argument("--full-payload", action="store_true",
+                             help="所有论文都保存摘要、正文片段和元数据（默认只有 Postgres 中有记录的论文才精简 payload）")
+    load_parser.set_defaults(func=load_l1)
+    
+    rebuild_parser = subparsers.add_parser("rebuild-lexical", help="从向量库重建 BM25 词法索引")
+    rebuild_parser.add_argument("collections", nargs="*", choices=["l1", "l2"], default=["l1", "l2"])
+    rebuild_parser.set_defaults(func=rebuild_lexical)
+    
+    export_parser = subparsers.add_parser("export-snapshot", help="把集合导出为快照（向量 + payload）")
+    export_parser.add_argument("path", help="快照目录")
+    export_parser.add_argument("--collection", choices=["l1", "l2"], default="l1")
+    export_parser.add_argument("--dtype", choices=["float32", "int8"], default="float32",
+                               help="int8 体积约为 float32 的 1/4")
+    export_parser.add_argument("--user-id", default=None, help="只导出该用户的 L2 数据")
+    export_parser.add_argument("--page-size", type=int, default=1024)
+    export_parser.set_defaults(func=export_snapshot)
+    
+    import_parser = subparsers.add_parser("import-snapshot", help="从快照导入，无需重新生成向量")
+    import_parser.add_argument("path", help="快照目录")
+    import_parser.add_argument("--collection", choices=["l1", "l2"], default=None,
+                               help="默认导入到导出时的集合")
+    import_parser.add_argument("--force", action="store_true", help="忽略向量模型名不一致（维度仍须一致）")
+    import_parser.set_defaults(func=import_snapshot)
+    
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+if __name__ == "__main__":
+    main()